@@ -0,0 +1,113 @@
+"""Atomic File - Replace files without readers seeing partial writes."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# Atomic File - Replace files without readers seeing partial writes.
+# Copyright (C) 2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Atomic File"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+
+import contextlib
+import os
+import secrets
+import stat
+from contextlib import asynccontextmanager, contextmanager
+from typing import IO, TYPE_CHECKING, Final
+
+import trio
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Generator
+
+# Mode new files get before the umask is applied, same as open uses
+DEFAULT_MODE: Final = 0o666
+
+
+def create_temp(filepath: str) -> tuple[int, str]:
+    """Create temporary file next to filepath for writing.
+
+    Return file descriptor and path of temporary file. It is created
+    with the permissions a new file at filepath would get from open,
+    unlike tempfile which always makes files only the owner can read.
+    """
+    directory, filename = os.path.split(os.path.abspath(filepath))
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    while True:
+        temp = os.path.join(
+            directory,
+            f".{filename}.{secrets.token_hex(4)}.tmp",
+        )
+        with contextlib.suppress(FileExistsError):
+            return os.open(temp, flags, DEFAULT_MODE), temp
+
+
+def replace_file(temp: str, filepath: str) -> None:
+    """Rename temporary file over filepath.
+
+    If filepath already exists, its permissions are kept.
+    """
+    with contextlib.suppress(FileNotFoundError):
+        os.chmod(temp, stat.S_IMODE(os.stat(filepath).st_mode))
+    os.replace(temp, filepath)
+
+
+def remove_temp(temp: str) -> None:
+    """Remove temporary file if it is still there."""
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(temp)
+
+
+@contextmanager
+def open_atomic(filepath: str) -> Generator[IO[bytes], None, None]:
+    """Open temporary file to write bytes, replacing filepath once done.
+
+    If writing fails, filepath is left as it was.
+    """
+    handle, temp = create_temp(filepath)
+    try:
+        with os.fdopen(handle, "wb") as fp:
+            yield fp
+        replace_file(temp, filepath)
+    except BaseException:
+        remove_temp(temp)
+        raise
+
+
+@asynccontextmanager
+async def temp_path_async(filepath: str) -> AsyncGenerator[str, None]:
+    """Yield path of temporary file to write, replacing filepath once done.
+
+    If writing fails or is cancelled, filepath is left as it was.
+    """
+    handle, temp = await trio.to_thread.run_sync(create_temp, filepath)
+    os.close(handle)
+    try:
+        yield temp
+    except BaseException:
+        # Still clean up if this task is being cancelled
+        with trio.CancelScope(shield=True):
+            await trio.to_thread.run_sync(remove_temp, temp)
+        raise
+    await trio.to_thread.run_sync(replace_file, temp, filepath)
+
+
+if __name__ == "__main__":
+    print(f"{__title__}\nProgrammed by {__author__}.\n")
@@ -0,0 +1,93 @@
+"""Classify - Decide which text is worth translating."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# Classify - Decide which text is worth translating.
+# Copyright (C) 2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Classify"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+
+import re
+from typing import TYPE_CHECKING, Final
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+_TIMESTAMP: Final = r"\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?"
+
+# Rule name to regular expression source matching whole text that does
+# not need to be translated
+RULES: Final = {
+    "empty": r"\s*",
+    "music": r"[\s♩♪♫♬🎵🎶]+",
+    "numbers": r"[\s\d.,:;%+\-\u2013\u2014/]*\d[\s\d.,:;%+\-\u2013\u2014/]*",
+    "punctuation": r"[\W_]+",
+    "timestamps": rf"\s*{_TIMESTAMP}(?:\s*(?:-->|-|\u2013)\s*{_TIMESTAMP})?\s*",
+    "urls": r"\s*(?:https?|ftp)://\S+\s*",
+    "brackets": r"\s*[\[(\uff08\u3010][^\])\uff09\u3011]*[\])\uff09\u3011]\s*",
+}
+# Sound effects in brackets are still useful to translate, so they are
+# not skipped unless asked for.
+DEFAULT_RULES: Final = (
+    "empty",
+    "music",
+    "numbers",
+    "punctuation",
+    "timestamps",
+    "urls",
+)
+
+
+class TextClassifier:
+    """Decide which text should be sent to be translated.
+
+    Text matching any of the enabled rules in full is passed through
+    unchanged instead.
+    """
+
+    __slots__ = ("_pattern",)
+
+    def __init__(self, rules: Iterable[str] = DEFAULT_RULES) -> None:
+        """Initialize TextClassifier."""
+        sources: list[str] = []
+        for rule in rules:
+            if rule not in RULES:
+                raise ValueError(
+                    f"Unknown rule {rule!r}, expected one of {', '.join(RULES)}",
+                )
+            sources.append(f"(?:{RULES[rule]})")
+        # All rules are compiled together so text is only matched once
+        self._pattern = re.compile("|".join(sources)) if sources else None
+
+    def should_translate(self, text: str) -> bool:
+        """Return if text is worth translating."""
+        return self._pattern is None or self._pattern.fullmatch(text) is None
+
+    def __call__(self, text: str) -> bool:
+        """Return if text is worth translating."""
+        return self.should_translate(text)
+
+
+DEFAULT_CLASSIFIER: Final = TextClassifier()
+
+
+if __name__ == "__main__":
+    print(f"{__title__}\nProgrammed by {__author__}.\n")
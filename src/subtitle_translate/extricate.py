@@ -25,10 +25,11 @@ __author__ = "CoolCat467"
 __license__ = "GNU General Public License Version 3"
 
 
-from typing import TYPE_CHECKING, Any, Final
+import re
+from typing import TYPE_CHECKING, Any, Final, TypeAlias
 
 if TYPE_CHECKING:
-    from collections.abc import Callable, Iterable
+    from collections.abc import Callable, Generator, Iterable, Iterator
 
 
 def wrap_quotes(text: str, quotes: str = '"') -> str:
@@ -64,198 +65,507 @@ CHAR_TYPE: Final = {v: k for k, v in TYPE_CHAR.items()}
 
 SEP: Final = "\x00"
 
+# Matches any character that can not be in dict keys
+_RESERVED_RE: Final = re.compile(f"[{re.escape(SEP + ''.join(CHAR_TYPE))}]")
 
-def dict_to_list(data: Any) -> tuple[list[str], list[str]]:
-    """Convert dictionary to two lists, one of keys, one of values."""
+_STR_CHAR: Final = TYPE_CHAR["str"]
+_INT_CHAR: Final = TYPE_CHAR["int"]
 
-    def read_block(data: Any) -> tuple[list[str], list[str]]:
-        """Read block."""
-        keys: list[str] = []
-        values: list[str] = []
-
-        match type(data).__name__:
-            case "dict" as dtype:
-                assert isinstance(data, dict)  # Mypy doesn't understand
-                # If empty dict
-                if not data:
-                    keys.append(wrap_quotes(SEP, TYPE_CHAR[dtype]))
-                    values.append("")
-                # Will not run if no data to enumerate
-                for key, value in data.items():
-                    # Ensure key won't break everything
-                    intersect = set(str(key)) & (set(CHAR_TYPE) | {SEP})
-                    if intersect:
-                        raise ValueError(
-                            'Dict key contains CHAR_TYPE value(s) "'
-                            f"{''.join(intersect)}" + '"',
-                        )
-
-                    key = wrap_quotes(key, TYPE_CHAR[type(key).__name__])
-                    for block_k, block_v in zip(
-                        *read_block(value),
-                        strict=True,
-                    ):
-                        keys.append(
-                            wrap_quotes(
-                                f"{key}{SEP}{block_k}",
-                                TYPE_CHAR[dtype],
-                            ),
-                        )
-                        values.append(block_v)
-            case "list" as dtype:
-                assert isinstance(data, list)  # Mypy doesn't understand
-                # If empty list
-                if not data:
-                    keys.append(wrap_quotes(f"{SEP}", TYPE_CHAR[dtype]))
-                    values.append("")
-                # Will not run if no data to enumerate
-                for key, value in enumerate(data):
-                    for block_k, block_v in zip(
-                        *read_block(value),
-                        strict=True,
-                    ):
-                        keys.append(
-                            wrap_quotes(
-                                f"{key}{SEP}{block_k}",
-                                TYPE_CHAR[dtype],
-                            ),
-                        )
-                        values.append(block_v)
-            case "str" | "int" | "bool" | "float" | "NoneType" as dtype:
-                keys.append(wrap_quotes("", TYPE_CHAR[dtype]))
-                values.append(str(data))
-            case _ as dtype:
+_CONTAINER_TYPES: Final = frozenset(("dict", "list"))
+_CLOSING_CHARS: Final = TYPE_CHAR["dict"] + TYPE_CHAR["list"]
+
+# Most dict shapes and key tails remembered at once, so documents
+# without repeated structure can not grow caches without bound.
+_SHAPE_CACHE_SIZE: Final = 1024
+
+# Compiled key part for list index
+_INDEX_PART: Final = ("{}" + SEP).format
+_LEAF_TYPES: Final = frozenset(("str", "int", "bool", "float", "NoneType"))
+
+
+# Convert string values back to the leaf type their key says they are
+_LEAF_FROM_STR: Final[dict[str, Callable[[str], Any]]] = {
+    "str": str,
+    "int": int,
+    "float": float,
+    "bool": lambda value: value == "True",
+    "NoneType": lambda value: None,
+    "dict": lambda value: {},
+    "list": lambda value: [],
+}
+
+
+def _reserved_key_error(key: str) -> ValueError:
+    """Return error for dict key containing reserved characters."""
+    intersect = set(key) & (set(CHAR_TYPE) | {SEP})
+    return ValueError(
+        f'Dict key contains CHAR_TYPE value(s) "{"".join(intersect)}"',
+    )
+
+
+def _encode_dict_keys(keys: tuple[Any, ...]) -> tuple[str, ...]:
+    """Return compiled key parts for dict keys."""
+    parts: list[str] = []
+    for key in keys:
+        key_str = str(key)
+        # Ensure key won't break everything
+        if _RESERVED_RE.search(key_str) is not None:
+            raise _reserved_key_error(key_str)
+        key_char = TYPE_CHAR[type(key).__name__]
+        parts.append(f"{key_char}{key_str}{key_char}{SEP}")
+    return tuple(parts)
+
+
+def iter_leaves(data: Any) -> Generator[tuple[str, str], None, None]:
+    """Yield compiled key and value pairs lazily, in document order."""
+    # Stack of (child iterator, key head, key tail) for each container
+    # being read. Children are (key part, value) pairs. Heads and tails
+    # are built once per container and shared by all children, instead
+    # of re-wrapping every key at every level.
+    stack: list[tuple[Iterator[tuple[str, Any]], str, str]] = [
+        (iter((("", data),)), "", ""),
+    ]
+    # Encoded keys of dict shapes already seen, so arrays of dicts with
+    # the same keys only encode and check those keys once.
+    shapes: dict[tuple[Any, ...], tuple[str, ...]] = {}
+    while stack:
+        children, head, tail = stack[-1]
+        for part, value in children:
+            dtype = type(value).__name__
+            if dtype in _LEAF_TYPES:
+                char = TYPE_CHAR[dtype]
+                yield f"{head}{part}{char}{char}{tail}", str(value)
+                continue
+            if dtype not in _CONTAINER_TYPES:
                 raise TypeError(
                     f'Expected type {combine_end(TYPE_CHAR, "or")}, got "{dtype}"',
                 )
-        return keys, values
-
-    return read_block(data)
-
-
-class Segment:
-    """Segment with item. Basically like a pointer."""
-
-    __slots__ = ("item",)
-
-    def __init__(self, item: Any = None) -> None:
-        """Initialize Segment."""
-        self.item = item
-
-    def __repr__(self) -> str:
-        """Return representation of self."""
-        if self.item is None:
-            return "Segment()"
-        return f"Segment({self.item!r})"
-
-    def is_container(self) -> bool:
-        """Return if is container."""
-        return isinstance(self.item, list | dict)
-
-    def unwrap(self) -> Any:
-        """Unwrap contained item."""
-        if not self.is_container():
-            return self.item
-        match type(self.item).__name__:
-            case "dict":
-                assert isinstance(self.item, dict)  # Mypy doesn't understand
-                dict_data = {}
-                for key, item in self.item.items():
-                    if isinstance(item, Segment):
-                        dict_data[key] = item.unwrap()
-                        continue
-                    dict_data[key] = item
-                return dict_data
-            case "list":
-                assert isinstance(self.item, list)  # Mypy doesn't understand
-                list_data = []
-                for item in self.item:
-                    if isinstance(item, Segment):
-                        list_data.append(item.unwrap())
-                        continue
-                    list_data.append(item)
-                return list_data
-            case _ as dtype:
-                raise ValueError(f'Expected dict or list, got "{dtype}"')
+            char = TYPE_CHAR[dtype]
+            if not value:
+                yield f"{head}{part}{char}{SEP}{char}{tail}", ""
+                continue
+            if dtype == "dict":
+                shape = tuple(value)
+                parts = shapes.get(shape)
+                if parts is None:
+                    parts = _encode_dict_keys(shape)
+                    # Only string keys, 1 and True are equal as keys
+                    if len(shapes) < _SHAPE_CACHE_SIZE and all(
+                        type(key) is str for key in shape
+                    ):
+                        shapes[shape] = parts
+                items: Iterator[tuple[str, Any]] = zip(
+                    parts,
+                    value.values(),
+                    strict=True,
+                )
+            else:
+                items = zip(
+                    map(_INDEX_PART, range(len(value))),
+                    value,
+                    strict=True,
+                )
+            # Read new container's children before the rest of these
+            stack.append((items, f"{head}{part}{char}", char + tail))
+            break
+        else:
+            stack.pop()
+
+
+def leaf_type(key: str) -> str:
+    """Return type name of leaf compiled key points to."""
+    # Key ends with leaf type characters followed by one closing
+    # container type character per level, so skip past those.
+    end = key.rstrip(_CLOSING_CHARS)
+    if not end:
+        raise ValueError("Key has no leaf type character")
+    char = end[-1]
+    if char == SEP:
+        # Empty container
+        char = end[-2]
+    if char not in CHAR_TYPE:
+        raise ValueError(f'Key type character "{char}" unrecognized')
+    return CHAR_TYPE[char]
+
+
+def is_text_leaf(key: str, value: str) -> bool:
+    """Return if compiled key and value pair is text worth translating.
+
+    Only non-empty strings are, numbers, booleans, None, and empty
+    containers are passed through as they are.
+    """
+    return bool(value) and leaf_type(key) == "str"
 
 
-def list_to_dict(keys: list[str], values: list[str]) -> Any:
-    """Convert split lists of compiled keys and values back into dictionary."""
-
-    def handle_map(
-        segment: Segment,
-        key: str,
-        value: str,
-        map_func: Callable[[Any], Any],
-    ) -> None:
-        """Unwrap key and either set segment item or continue to unwrap."""
-        index = unwrap_quotes(key)
-        if index == "":
-            segment.item = map_func(value)
+def dict_to_list(data: Any) -> tuple[list[str], list[str]]:
+    """Convert dictionary to two lists, one of keys, one of values."""
+    keys: list[str] = []
+    values: list[str] = []
+    for key, value in iter_leaves(data):
+        keys.append(key)
+        values.append(value)
+    return keys, values
+
+
+# Path from root of data to a leaf, as (container type, key) elements,
+# where container type is "dict" or "list". Unlike compiled string keys,
+# paths are cheap to build and apply and allow any dict key.
+KeyPath: TypeAlias = tuple[tuple[str, Any], ...]
+
+
+def iter_paths(data: Any) -> Generator[tuple[KeyPath, Any], None, None]:
+    """Yield path and leaf value pairs lazily, in document order.
+
+    Leaves are values that are not containers, or empty containers.
+    """
+    stack: list[tuple[Iterator[tuple[Any, Any]], str, KeyPath]] = []
+    value = data
+    path: KeyPath = ()
+    while True:
+        dtype = type(value).__name__
+        if dtype in _CONTAINER_TYPES and value:
+            children = (
+                iter(value.items()) if dtype == "dict" else enumerate(value)
+            )
+            stack.append((children, dtype, path))
+        elif dtype in _CONTAINER_TYPES or dtype in _LEAF_TYPES:
+            yield path, value
+        else:
+            raise TypeError(
+                f'Expected type {combine_end(TYPE_CHAR, "or")}, got "{dtype}"',
+            )
+
+        # Find next value to read
+        while stack:
+            children, kind, parent_path = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                continue
+            key, value = child
+            path = (*parent_path, (kind, key))
+            break
+        else:
             return
-        unwrap_key(segment, index, map_func(value))
 
-    def unwrap_key(segment: Segment, key: str, value: Any) -> None:
-        """Take apart key and set segment item to value in the right place."""
-        head = key[0]
-        if head == "":
-            segment.item = value
-            return
-        if head not in CHAR_TYPE:
-            raise ValueError(f'Key type character "{head}" unrecognized')
-        match CHAR_TYPE[head]:
-            case "dict":
-                if not isinstance(segment.item, dict):
-                    segment.item = {}
-                raw_key, index = unwrap_quotes(key).split(SEP, 1)
-
-                if raw_key:
-                    dkey: int | str
-                    if raw_key[0] not in CHAR_TYPE:
-                        raise ValueError(
-                            f'Key type character "{raw_key[0]}" unrecognized',
-                        )
-                    match CHAR_TYPE[raw_key[0]]:
-                        case "str":
-                            dkey = unwrap_quotes(raw_key)
-                        case "int":
-                            dkey = int(unwrap_quotes(raw_key))
-                        case _ as dtype:
-                            raise TypeError(
-                                f'Expected str or int, got "{dtype}"',
-                            )
-
-                    if dkey not in segment.item:
-                        segment.item[dkey] = Segment()
-                    unwrap_key(segment.item[dkey], index, value)
-            case "list":
-                if not isinstance(segment.item, list):
-                    segment.item = []
-                indice_str, index = unwrap_quotes(key).split(SEP, 1)
-                if indice_str:
-                    indice = int(indice_str)
-                    while indice >= len(segment.item):
-                        segment.item.append(Segment())
-                    unwrap_key(segment.item[indice], index, value)
+
+def iter_references(
+    data: Any,
+) -> Generator[tuple[Any, Any, Any], None, None]:
+    """Yield container, key, and value for every non-container leaf in data.
+
+    Setting container[key] patches the leaf in place. Data itself is
+    never yielded, so wrap it in a list to be able to replace a root leaf.
+    """
+    stack: list[tuple[Any, Iterator[tuple[Any, Any]]]] = []
+    dtype = type(data).__name__
+    if dtype == "dict":
+        stack.append((data, iter(data.items())))
+    elif dtype == "list":
+        stack.append((data, enumerate(data)))
+    while stack:
+        container, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            continue
+        key, value = child
+        dtype = type(value).__name__
+        if dtype == "dict":
+            stack.append((value, iter(value.items())))
+        elif dtype == "list":
+            stack.append((value, enumerate(value)))
+        elif dtype in _LEAF_TYPES:
+            yield container, key, value
+        else:
+            raise TypeError(
+                f'Expected type {combine_end(TYPE_CHAR, "or")}, got "{dtype}"',
+            )
+
+
+def leaf_from_str(leaf_type: str, value: str) -> Any:
+    """Return value converted from string to leaf type with given name."""
+    return _LEAF_FROM_STR[leaf_type](value)
+
+
+def path_to_key(path: KeyPath, leaf_type: str) -> str:
+    """Return compiled string key for path to leaf of given type name."""
+    head: list[str] = []
+    tail: list[str] = []
+    for kind, key in path:
+        char = TYPE_CHAR[kind]
+        if kind == "dict":
+            key_str = str(key)
+            if _RESERVED_RE.search(key_str) is not None:
+                raise _reserved_key_error(key_str)
+            key_char = TYPE_CHAR[type(key).__name__]
+            head.append(f"{char}{key_char}{key_str}{key_char}{SEP}")
+        else:
+            head.append(f"{char}{key}{SEP}")
+        tail.append(char)
+    char = TYPE_CHAR[leaf_type]
+    leaf = f"{char}{SEP}{char}" if leaf_type in _CONTAINER_TYPES else char * 2
+    return "".join((*head, leaf, *reversed(tail)))
+
+
+def key_to_path(key: str) -> tuple[KeyPath, str]:
+    """Return path and leaf type name from compiled string key."""
+    path: list[tuple[str, Any]] = []
+    position = 0
+    while True:
+        char = key[position]
+        if char not in CHAR_TYPE:
+            raise ValueError(f'Key type character "{char}" unrecognized')
+        kind = CHAR_TYPE[char]
+        position += 1
+        if kind not in _CONTAINER_TYPES:
+            return tuple(path), kind
+        if key[position] == SEP:
+            # Empty container
+            return tuple(path), kind
+        if kind == "list":
+            end = key.index(SEP, position)
+            path.append((kind, int(key[position:end])))
+            position = end + 1
+            continue
+        key_char = key[position]
+        end = key.index(key_char, position + 1)
+        raw_key = key[position + 1 : end]
+        if key_char not in CHAR_TYPE:
+            raise ValueError(f'Key type character "{key_char}" unrecognized')
+        match CHAR_TYPE[key_char]:
             case "str":
-                handle_map(segment, key, value, str)
+                path.append((kind, raw_key))
             case "int":
-                handle_map(segment, key, value, int)
-            case "bool":
-                handle_map(segment, key, value, bool)
-            case "float":
-                handle_map(segment, key, value, float)
-            case "NoneType":
-                handle_map(segment, key, value, lambda x: None)
+                path.append((kind, int(raw_key)))
             case _ as dtype:
+                raise TypeError(f'Expected str or int, got "{dtype}"')
+        # Skip closing key type character and separator
+        position = end + 2
+
+
+def set_path(data: Any, path: KeyPath, value: Any) -> Any:
+    """Set value at path in data, creating containers as needed.
+
+    Lists are padded with None up to the index being set.
+    Return data, which is new if data was None or path is empty.
+    """
+    if not path:
+        return value
+    if data is None:
+        data = {} if path[0][0] == "dict" else []
+    container = data
+    for index, (kind, key) in enumerate(path):
+        if index + 1 < len(path):
+            next_kind = path[index + 1][0]
+            child = _get_child(container, kind, key)
+            if child is None:
+                child = {} if next_kind == "dict" else []
+                _set_child(container, kind, key, child)
+            container = child
+        else:
+            _set_child(container, kind, key, value)
+    return data
+
+
+def _get_child(container: Any, kind: str, key: Any) -> Any:
+    """Return child of container at key or None if not set."""
+    if kind == "dict":
+        return container.get(key)
+    if key < len(container):
+        return container[key]
+    return None
+
+
+def _set_child(container: Any, kind: str, key: Any, value: Any) -> None:
+    """Set child of container at key to value."""
+    if kind == "list" and key >= len(container):
+        container.extend([None] * (key + 1 - len(container)))
+    container[key] = value
+
+
+def format_path(path: KeyPath) -> str:
+    """Return path as keys joined by slashes, for matching selectors."""
+    return "/".join([str(key) for _kind, key in path])
+
+
+def _translate_selector(pattern: str) -> str:
+    """Return regular expression source for glob path selector pattern."""
+    segments = pattern.strip("/").split("/")
+    parts: list[str] = []
+    for index, segment in enumerate(segments):
+        last = index + 1 == len(segments)
+        if segment == "**":
+            # Any number of whole segments, including none
+            parts.append(".*" if last else "(?:[^/]*/)*")
+            continue
+        for char in segment:
+            if char == "*":
+                parts.append("[^/]*")
+            elif char == "?":
+                parts.append("[^/]")
+            else:
+                parts.append(re.escape(char))
+        if not last:
+            parts.append("/")
+    return "".join(parts)
+
+
+def _compile_selectors(patterns: Iterable[str]) -> re.Pattern[str] | None:
+    """Return one regular expression matching any of patterns, or None."""
+    sources = [f"(?:{_translate_selector(pattern)})" for pattern in patterns]
+    if not sources:
+        return None
+    return re.compile("|".join(sources), re.DOTALL)
+
+
+class PathSelector:
+    """Select leaf paths with include and exclude glob patterns.
+
+    Patterns match paths formatted with format_path. In a pattern,
+    `*` matches any part of one key, `?` one character of a key,
+    and `**` any number of keys. Paths match if they match any include
+    pattern, or there are none, and do not match any exclude pattern.
+    """
+
+    __slots__ = ("_exclude", "_include")
+
+    def __init__(
+        self,
+        include: Iterable[str] = (),
+        exclude: Iterable[str] = (),
+    ) -> None:
+        """Initialize PathSelector."""
+        # All patterns of a kind are compiled together so a path only
+        # has to be matched once against each kind.
+        self._include = _compile_selectors(include)
+        self._exclude = _compile_selectors(exclude)
+
+    def match(self, path: str) -> bool:
+        """Return if formatted path is selected."""
+        if self._include is not None and self._include.fullmatch(path) is None:
+            return False
+        return self._exclude is None or self._exclude.fullmatch(path) is None
+
+    def __call__(self, path: KeyPath) -> bool:
+        """Return if path is selected."""
+        return self.match(format_path(path))
+
+
+class Rebuilder:
+    """Rebuild data from compiled key and value pairs as they arrive.
+
+    Pairs may be added in any order. Adding a key again replaces its
+    value, and dict keys stay in the order they were first added.
+    Values are written straight into the dicts and lists being built.
+    """
+
+    __slots__ = ("_root", "_tails")
+
+    def __init__(self) -> None:
+        """Initialize Rebuilder."""
+        # Holds rebuilt data at index zero so the root can be set
+        # the same way as any other child.
+        self._root: list[Any] = [None]
+        # Decoded paths for the part of keys after the first list index.
+        # Elements of arrays with the same shape share these, so they
+        # are only decoded once.
+        self._tails: dict[str, tuple[KeyPath, str]] = {}
+
+    def add(self, key: str, value: str) -> None:
+        """Add compiled key and value pair.
+
+        Key is read left to right while walking down the data,
+        creating containers as needed.
+        """
+        container: Any = self._root
+        slot: Any = 0
+        position = 0
+        while True:
+            char = key[position]
+            if char not in CHAR_TYPE:
+                raise ValueError(f'Key type character "{char}" unrecognized')
+            kind = CHAR_TYPE[char]
+            position += 1
+            if kind not in _CONTAINER_TYPES or key[position] == SEP:
+                # Leaf value or empty container
+                container[slot] = _LEAF_FROM_STR[kind](value)
+                return
+            child = container[slot]
+            if kind == "list":
+                if type(child) is not list:
+                    child = container[slot] = []
+                end = key.index(SEP, position)
+                index = int(key[position:end])
+                position = end + 1
+                if index >= len(child):
+                    # Grow to size at once instead of one item at a time
+                    child.extend([None] * (index + 1 - len(child)))
+                self._add_tail(child, index, key[position:], value)
+                return
+            if type(child) is not dict:
+                child = container[slot] = {}
+            key_char = key[position]
+            end = key.index(key_char, position + 1)
+            raw_key = key[position + 1 : end]
+            # Skip closing key type character and separator
+            position = end + 2
+            if key_char == _STR_CHAR:
+                slot = raw_key
+            elif key_char == _INT_CHAR:
+                slot = int(raw_key)
+            elif key_char in CHAR_TYPE:
                 raise TypeError(
-                    f'Expected type {combine_end(TYPE_CHAR, "or")}, got "{dtype}"',
+                    f'Expected str or int, got "{CHAR_TYPE[key_char]}"',
                 )
+            else:
+                raise ValueError(
+                    f'Key type character "{key_char}" unrecognized',
+                )
+            if slot not in child:
+                child[slot] = None
+            container = child
+
+    def _add_tail(
+        self,
+        container: Any,
+        slot: Any,
+        tail: str,
+        value: str,
+    ) -> None:
+        """Add value at remaining part of compiled key below container[slot]."""
+        decoded = self._tails.get(tail)
+        if decoded is None:
+            decoded = key_to_path(tail)
+            if len(self._tails) < _SHAPE_CACHE_SIZE:
+                self._tails[tail] = decoded
+        path, leaf_type = decoded
+        for kind, key in path:
+            child = container[slot]
+            if kind == "list":
+                if type(child) is not list:
+                    child = container[slot] = []
+                if key >= len(child):
+                    child.extend([None] * (key + 1 - len(child)))
+            else:
+                if type(child) is not dict:
+                    child = container[slot] = {}
+                if key not in child:
+                    child[key] = None
+            container, slot = child, key
+        container[slot] = _LEAF_FROM_STR[leaf_type](value)
+
+    def result(self) -> Any:
+        """Return rebuilt data."""
+        return self._root[0]
+
 
-    data = Segment()
+def list_to_dict(keys: list[str], values: list[str]) -> Any:
+    """Convert split lists of compiled keys and values back into dictionary."""
+    rebuilder = Rebuilder()
     for key, value in zip(keys, values, strict=True):
-        unwrap_key(data, key, value)
-    return data.unwrap()
+        rebuilder.add(key, value)
+    return rebuilder.result()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,158 @@
+"""Fuzzy - Find similar text with an n-gram index."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# Fuzzy - Find similar text with an n-gram index.
+# Copyright (C) 2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Fuzzy"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+
+import math
+import re
+from typing import Final, NamedTuple
+
+DEFAULT_N: Final = 3
+# Words and numbers, everything else is punctuation and spacing
+WORD_RE: Final = re.compile(r"\w+")
+# Slack for float rounding when bounding similarity, so bounds never
+# rule out a candidate that is exactly threshold similar
+EPSILON: Final = 1e-9
+
+
+class FuzzyMatch(NamedTuple):
+    """Indexed text similar to what was searched for."""
+
+    text: str
+    # Jaccard similarity of n-grams, 1.0 for the same n-grams
+    similarity: float
+
+
+def ngrams(text: str, n: int = DEFAULT_N) -> frozenset[str]:
+    """Return set of character n-grams of text.
+
+    Text is padded with a space on both sides, so words at the start
+    and end count as much as the rest.
+    """
+    padded = f" {text} "
+    return frozenset(
+        padded[index : index + n]
+        for index in range(max(len(padded) - n + 1, 1))
+    )
+
+
+def same_words(text: str, other: str) -> bool:
+    """Return if texts only differ in punctuation, spacing or case.
+
+    Similar texts with any other difference, even one changed number,
+    can mean something else and need their own translation.
+    """
+    return WORD_RE.findall(text.casefold()) == WORD_RE.findall(
+        other.casefold(),
+    )
+
+
+class NGramIndex:
+    """Index of texts by their character n-grams."""
+
+    __slots__ = ("_grams", "_postings", "n")
+
+    def __init__(self, n: int = DEFAULT_N) -> None:
+        """Initialize NGramIndex."""
+        self.n = n
+        self._grams: dict[str, frozenset[str]] = {}
+        self._postings: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        """Return number of indexed texts."""
+        return len(self._grams)
+
+    def __contains__(self, text: object) -> bool:
+        """Return if text is indexed."""
+        return text in self._grams
+
+    def add(self, text: str) -> None:
+        """Add text to index."""
+        if text in self._grams:
+            return
+        grams = ngrams(text, self.n)
+        self._grams[text] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(text)
+
+    def discard(self, text: str) -> None:
+        """Remove text from index if it is there."""
+        grams = self._grams.pop(text, None)
+        if grams is None:
+            return
+        for gram in grams:
+            texts = self._postings[gram]
+            texts.discard(text)
+            if not texts:
+                del self._postings[gram]
+
+    def best_match(self, text: str, threshold: float) -> FuzzyMatch | None:
+        """Return most similar indexed text at least threshold similar.
+
+        Return None if no indexed text is similar enough.
+        """
+        grams = ngrams(text, self.n)
+        size = len(grams)
+        # Similarity is at most shared n-grams over the n-grams of text,
+        # and at most the smaller n-gram count over the larger, which
+        # rules out most candidates without comparing them
+        min_shared = math.ceil(threshold * size - EPSILON)
+        min_size = threshold * size - EPSILON
+        max_size = size / threshold + EPSILON if threshold > 0 else math.inf
+        # A candidate sharing min_shared n-grams shares at least one of
+        # any size - min_shared + 1 of them, so only the postings of
+        # the rarest ones are read instead of common ones like "the"
+        rarest = sorted(
+            grams,
+            key=lambda gram: len(self._postings.get(gram, ())),
+        )[: size - min_shared + 1]
+
+        best: FuzzyMatch | None = None
+        seen: set[str] = set()
+        for gram in rarest:
+            for candidate in self._postings.get(gram, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                candidate_grams = self._grams[candidate]
+                if not min_size <= len(candidate_grams) <= max_size:
+                    continue
+                count = len(grams & candidate_grams)
+                similarity = count / (size + len(candidate_grams) - count)
+                if similarity < threshold:
+                    continue
+                if (
+                    best is None
+                    or similarity > best.similarity
+                    or (
+                        similarity == best.similarity and candidate < best.text
+                    )
+                ):
+                    best = FuzzyMatch(candidate, similarity)
+        return best
+
+
+if __name__ == "__main__":
+    print(f"{__title__}\nProgrammed by {__author__}.\n")
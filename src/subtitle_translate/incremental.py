@@ -0,0 +1,139 @@
+"""Incremental - Reuse translations from a previous version of a file."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# Incremental - Reuse translations from a previous version of a file.
+# Copyright (C) 2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Incremental"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+
+from collections import defaultdict, deque
+from typing import TYPE_CHECKING
+
+from subtitle_translate import subtitle_parser
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping
+
+    from subtitle_translate.subtitle_parser import Subtitle
+
+    Convert = Callable[
+        [Iterable[tuple[int, Subtitle]]],
+        tuple[dict[int, Subtitle], dict[int, tuple[str, ...]]],
+    ]
+
+
+class PreviousTranslation:
+    """Text runs of a previous source file and what they were translated to.
+
+    Runs are looked up by cue timing and text first, so the same line
+    keeps the translation it had in that cue, then by text alone, so
+    moved and retimed cues are reused too.
+    """
+
+    __slots__ = ("_by_text", "_by_timing")
+
+    def __init__(self) -> None:
+        """Initialize PreviousTranslation."""
+        self._by_timing: dict[tuple[tuple[int, int], str], str] = {}
+        self._by_text: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        """Return number of remembered text runs."""
+        return len(self._by_text)
+
+    def add(
+        self,
+        duration: tuple[int, int],
+        source: tuple[str, ...],
+        translated: tuple[str, ...],
+    ) -> None:
+        """Remember translated text runs of cue with given timing."""
+        for source_text, translated_text in zip(
+            source,
+            translated,
+            strict=True,
+        ):
+            self._by_timing[(duration, source_text)] = translated_text
+            self._by_text.setdefault(source_text, translated_text)
+
+    def lookup(self, duration: tuple[int, int], text: str) -> str | None:
+        """Return previous translation of text in cue with timing or None."""
+        found = self._by_timing.get((duration, text))
+        if found is None:
+            found = self._by_text.get(text)
+        return found
+
+    def match(
+        self,
+        subs: Mapping[int, Subtitle],
+        texts: Mapping[int, tuple[str, ...]],
+    ) -> dict[tuple[int, int], str]:
+        """Return previous translations for text runs that have one.
+
+        Keys are subtitle id and position of text run in that subtitle.
+        """
+        known: dict[tuple[int, int], str] = {}
+        for subtitle_id, runs in texts.items():
+            duration = subs[subtitle_id].duration
+            for position, text in enumerate(runs):
+                found = self.lookup(duration, text)
+                if found is not None:
+                    known[(subtitle_id, position)] = found
+        return known
+
+    @classmethod
+    def from_subtitles(
+        cls,
+        source: Iterable[tuple[int, Subtitle]],
+        translated: Iterable[tuple[int, Subtitle]],
+        convert: Convert = subtitle_parser.convert_text,
+    ) -> PreviousTranslation:
+        """Return PreviousTranslation from previous source and its translation.
+
+        Cues are aligned by timing, in order, since translating keeps
+        timing as it is. Cues that do not line up are ignored.
+        """
+        source_subs, source_texts = convert(source)
+        translated_subs, translated_texts = convert(translated)
+
+        # Translated text runs for each timing, in file order
+        by_duration: defaultdict[tuple[int, int], deque[tuple[str, ...]]]
+        by_duration = defaultdict(deque)
+        for subtitle_id, subtitle in translated_subs.items():
+            by_duration[subtitle.duration].append(
+                translated_texts.get(subtitle_id, ()),
+            )
+
+        previous = cls()
+        for subtitle_id, subtitle in source_subs.items():
+            candidates = by_duration.get(subtitle.duration)
+            if not candidates:
+                continue
+            translated_runs = candidates.popleft()
+            source_runs = source_texts.get(subtitle_id, ())
+            if len(translated_runs) == len(source_runs):
+                previous.add(subtitle.duration, source_runs, translated_runs)
+        return previous
+
+
+if __name__ == "__main__":
+    print(f"{__title__}\nProgrammed by {__author__}.\n")
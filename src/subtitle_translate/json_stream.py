@@ -0,0 +1,383 @@
+"""JSON Stream - Translate JSON documents without loading them whole."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# JSON Stream - Translate JSON documents without loading them whole.
+# Copyright (C) 2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "JSON Stream"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+
+import re
+from collections import deque
+from typing import TYPE_CHECKING, Any, Final, NamedTuple
+
+import orjson
+import trio
+
+from subtitle_translate import translate
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterable, Awaitable, Callable
+
+    import httpx
+
+    from subtitle_translate.extricate import KeyPath
+    from subtitle_translate.translation_cache import TranslationCache
+
+DEFAULT_BUFFER_SIZE: Final = 1 << 16
+
+# One token after optional whitespace. Groups are punctuation, string,
+# and other scalar values.
+TOKEN_RE: Final = re.compile(
+    rb"[ \t\r\n]*(?:"
+    rb"([{}\[\]:,])"
+    rb'|("[^"\\]*(?:\\.[^"\\]*)*")'
+    rb"|(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?"
+    rb"|true|false|null))",
+)
+WHITESPACE: Final = b" \t\r\n"
+# Bytes a token that is not complete yet can start with
+_PARTIAL_START: Final = frozenset(b'"-0123456789tfn')
+# Longest word token ("false")
+_LONGEST_WORD: Final = 5
+# Bytes after a scalar that mean it might not be complete yet. Empty
+# bytes are in any bytes, so the end of the buffer counts too.
+_NUMBER_CONTINUE: Final = b".eE"
+
+_INDENT: Final = b"  "
+
+
+class Token(NamedTuple):
+    """JSON token. Value is only set for strings and scalar values."""
+
+    kind: str
+    value: Any = None
+
+
+class JSONTokenizer:
+    """Incremental push tokenizer for JSON byte streams.
+
+    Feed bytes as they arrive and get back tokens as soon as they are
+    complete. Chunks may split tokens anywhere.
+    """
+
+    __slots__ = ("_buffer", "_scanned")
+
+    def __init__(self) -> None:
+        """Initialize tokenizer."""
+        self._buffer = bytearray()
+        # If buffer starts with a string that is not complete yet, how
+        # far it has been searched for the closing quote, otherwise 0.
+        # Long strings are then only searched once instead of rescanned
+        # from the start for every chunk.
+        self._scanned = 0
+
+    def _string_end(self, start: int) -> int | None:
+        """Return index of quote closing string at start of buffer or None.
+
+        Searching starts at start, which must be after the opening quote.
+        """
+        buffer = self._buffer
+        while True:
+            quote = buffer.find(b'"', start)
+            if quote < 0:
+                return None
+            # Quote is escaped if an odd number of backslashes are before it
+            backslash = quote
+            while buffer[backslash - 1] == ord("\\"):
+                backslash -= 1
+            if (quote - backslash) % 2 == 0:
+                return quote
+            start = quote + 1
+
+    def _scan(self, final: bool) -> list[Token]:
+        """Return complete tokens from buffer and keep the rest."""
+        buffer = self._buffer
+        position = 0
+        tokens: list[Token] = []
+        while True:
+            match = TOKEN_RE.match(buffer, position)
+            if match is None:
+                break
+            punctuation, string, scalar = match.groups()
+            if (
+                scalar is not None
+                and not final
+                and buffer[match.end() : match.end() + 1] in _NUMBER_CONTINUE
+            ):
+                # Number might continue in next chunk
+                break
+            position = match.end()
+            if punctuation is not None:
+                tokens.append(Token(punctuation.decode("ascii")))
+            elif string is not None:
+                tokens.append(Token("string", orjson.loads(string)))
+            else:
+                tokens.append(Token("scalar", orjson.loads(scalar)))
+        rest = buffer[position:].lstrip(WHITESPACE)
+        if rest and (
+            final
+            or rest[0] not in _PARTIAL_START
+            or (rest[0] in b"tfn" and len(rest) > _LONGEST_WORD)
+        ):
+            raise ValueError(f"Invalid JSON near {bytes(rest[:20])!r}")
+        self._buffer = rest
+        # A string left over has no closing quote anywhere in it yet
+        self._scanned = len(rest) if rest[:1] == b'"' else 0
+        return tokens
+
+    def feed(self, data: bytes) -> list[Token]:
+        """Feed data to tokenizer. Return tokens completed by this data."""
+        self._buffer += data
+        if self._scanned and self._string_end(self._scanned) is None:
+            self._scanned = len(self._buffer)
+            return []
+        return self._scan(final=False)
+
+    def close(self) -> list[Token]:
+        """Signal end of stream. Return any remaining tokens."""
+        return self._scan(final=True)
+
+
+class _Frame:
+    """Container being formatted."""
+
+    __slots__ = ("count", "expect", "key", "kind")
+
+    def __init__(self, kind: str, expect: str) -> None:
+        """Initialize frame."""
+        self.kind = kind
+        self.expect = expect
+        self.key: Any = None
+        self.count = 0
+
+
+class JSONFormatter:
+    """Format JSON tokens the same way orjson.OPT_INDENT_2 does.
+
+    Output pieces are bytes, or str for text that should be translated
+    and then encoded in its place. Text is non-empty string values at
+    paths select returns True for, or all of them if select is None.
+    """
+
+    __slots__ = ("_done", "_frames", "_select")
+
+    def __init__(
+        self,
+        select: Callable[[KeyPath], bool] | None = None,
+    ) -> None:
+        """Initialize formatter."""
+        self._select = select
+        self._frames: list[_Frame] = []
+        self._done = False
+
+    def path(self) -> KeyPath:
+        """Return path to value currently being read."""
+        return tuple([(frame.kind, frame.key) for frame in self._frames])
+
+    def _expect(
+        self,
+        frame: _Frame,
+        allowed: tuple[str, ...],
+        kind: str,
+    ) -> None:
+        """Raise ValueError if token kind is not allowed next."""
+        if frame.expect not in allowed:
+            raise ValueError(f"Unexpected {kind!r} in JSON {frame.kind}")
+
+    def feed(self, token: Token) -> list[bytes | str]:
+        """Handle one token. Return output pieces."""
+        kind = token.kind
+        frames = self._frames
+        if not frames:
+            if self._done:
+                raise ValueError(f"Extra data {kind!r} after JSON document")
+            if kind in "]},:":
+                raise ValueError(f"Unexpected {kind!r} at start of JSON")
+            self._done = True
+            return self._value(token)
+
+        frame = frames[-1]
+        if kind in "]}":
+            # Closing bracket must match and can not follow a comma
+            if frame.kind != ("list" if kind == "]" else "dict"):
+                raise ValueError(f"Unexpected {kind!r} in JSON {frame.kind}")
+            self._expect(frame, ("open", "after"), kind)
+            frames.pop()
+            if not frame.count:
+                return [kind.encode("ascii")]
+            return [b"\n" + _INDENT * len(frames) + kind.encode("ascii")]
+        if kind == ",":
+            self._expect(frame, ("after",), kind)
+            frame.expect = "next"
+            return []
+        if kind == ":":
+            self._expect(frame, ("colon",), kind)
+            frame.expect = "value"
+            return []
+
+        prefix = b",\n" if frame.count else b"\n"
+        if frame.kind == "dict" and frame.expect in ("open", "next"):
+            if kind != "string":
+                raise ValueError("Expected string key in JSON dict")
+            frame.key = token.value
+            frame.expect = "colon"
+            return [
+                prefix
+                + _INDENT * len(frames)
+                + orjson.dumps(token.value)
+                + b": ",
+            ]
+        if frame.kind == "dict":
+            self._expect(frame, ("value",), kind)
+            frame.count += 1
+            frame.expect = "after"
+            return self._value(token)
+        self._expect(frame, ("open", "next"), kind)
+        frame.key = frame.count
+        frame.count += 1
+        frame.expect = "after"
+        return [prefix + _INDENT * len(frames), *self._value(token)]
+
+    def _value(self, token: Token) -> list[bytes | str]:
+        """Return output pieces for start of value."""
+        kind = token.kind
+        if kind == "{":
+            self._frames.append(_Frame("dict", "open"))
+            return [b"{"]
+        if kind == "[":
+            self._frames.append(_Frame("list", "open"))
+            return [b"["]
+        value = token.value
+        if (
+            kind == "string"
+            and value
+            and (self._select is None or self._select(self.path()))
+        ):
+            return [value]
+        return [orjson.dumps(value)]
+
+    def close(self) -> None:
+        """Signal end of tokens. Raise ValueError if document is incomplete."""
+        if self._frames or not self._done:
+            raise ValueError("JSON document ended early")
+
+
+class _Slot:
+    """Place in output for translated text."""
+
+    __slots__ = ("done", "value")
+
+    def __init__(self) -> None:
+        """Initialize slot."""
+        self.done = trio.Event()
+        self.value = b""
+
+
+async def translate_json_stream(
+    client: httpx.AsyncClient,
+    chunks: AsyncIterable[bytes],
+    write: Callable[[bytes], Awaitable[object]],
+    to_lang: str,
+    source_lang: str,
+    select: Callable[[KeyPath], bool] | None = None,
+    window: int = translate.MAX_IN_FLIGHT,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    cache: TranslationCache | None = None,
+) -> int:
+    """Translate JSON document read from chunks, writing output in order.
+
+    Output is formatted like orjson.OPT_INDENT_2. At most window
+    translations are waiting to be written at once, and reading stops
+    while output waiting behind them is over buffer_size, so memory
+    use does not grow with document size.
+    Return number of sentences translated.
+    """
+    tokenizer = JSONTokenizer()
+    formatter = JSONFormatter(select)
+    queue: deque[bytes | _Slot] = deque()
+    output = bytearray()
+    # Number of slots and bytes waiting in queue
+    slot_count = 0
+    queued_size = 0
+    count = 0
+
+    async def translate_slot(slot: _Slot, text: str) -> None:
+        translated = await translate.get_translated_cached(
+            client,
+            text,
+            to_lang,
+            source_lang,
+            cache,
+        )
+        slot.value = orjson.dumps(translated)
+        slot.done.set()
+
+    async def flush(limit: int) -> None:
+        """Move finished pieces to output and write if over limit."""
+        nonlocal slot_count, queued_size
+        while queue:
+            piece = queue[0]
+            if isinstance(piece, _Slot):
+                if not piece.done.is_set():
+                    break
+                slot_count -= 1
+                output.extend(piece.value)
+            else:
+                queued_size -= len(piece)
+                output.extend(piece)
+            queue.popleft()
+        if output and len(output) >= limit:
+            await write(bytes(output))
+            output.clear()
+
+    async def handle(tokens: list[Token]) -> None:
+        nonlocal slot_count, queued_size, count
+        for token in tokens:
+            for piece in formatter.feed(token):
+                if isinstance(piece, bytes):
+                    queue.append(piece)
+                    queued_size += len(piece)
+                    continue
+                slot = _Slot()
+                queue.append(slot)
+                slot_count += 1
+                count += 1
+                nursery.start_soon(translate_slot, slot, piece)
+            await flush(buffer_size)
+            # Head of queue is always a slot still being translated here
+            while slot_count >= window or queued_size > buffer_size:
+                head = queue[0]
+                assert isinstance(head, _Slot)
+                await head.done.wait()
+                await flush(buffer_size)
+
+    async with trio.open_nursery() as nursery:
+        async for chunk in chunks:
+            await handle(tokenizer.feed(chunk))
+        await handle(tokenizer.close())
+        formatter.close()
+    await flush(0)
+    return count
+
+
+if __name__ == "__main__":
+    print(f"{__title__}\nProgrammed by {__author__}.\n")
@@ -0,0 +1,257 @@
+"""Language ID - Tiny offline language identification."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# Language ID - Tiny offline language identification.
+# Copyright (C) 2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Language ID"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+
+import re
+from bisect import bisect_right
+from collections import Counter
+from typing import TYPE_CHECKING, Final
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# Sorted (first code point, last code point, script name) ranges of the
+# letters that are counted
+SCRIPT_RANGES: Final = (
+    (0x0041, 0x005A, "Latin"),
+    (0x0061, 0x007A, "Latin"),
+    (0x00C0, 0x024F, "Latin"),
+    (0x0370, 0x03FF, "Greek"),
+    (0x0400, 0x052F, "Cyrillic"),
+    (0x0531, 0x058F, "Armenian"),
+    (0x0590, 0x05FF, "Hebrew"),
+    (0x0600, 0x06FF, "Arabic"),
+    (0x0900, 0x097F, "Devanagari"),
+    (0x0E00, 0x0E7F, "Thai"),
+    (0x10A0, 0x10FF, "Georgian"),
+    (0x1100, 0x11FF, "Hangul"),
+    (0x1E00, 0x1EFF, "Latin"),
+    (0x3040, 0x30FF, "Kana"),
+    (0x3130, 0x318F, "Hangul"),
+    (0x3400, 0x4DBF, "Han"),
+    (0x4E00, 0x9FFF, "Han"),
+    (0xAC00, 0xD7AF, "Hangul"),
+    (0xFF66, 0xFF9F, "Kana"),
+)
+_RANGE_STARTS: Final = tuple(start for start, _end, _script in SCRIPT_RANGES)
+
+# Scripts only one language we know of is written in
+SCRIPT_LANGUAGES: Final = {
+    "Greek": "el",
+    "Armenian": "hy",
+    "Hebrew": "he",
+    "Arabic": "ar",
+    "Devanagari": "hi",
+    "Thai": "th",
+    "Georgian": "ka",
+    "Hangul": "ko",
+    "Kana": "ja",
+    "Han": "zh",
+}
+
+# Common words of languages that share a script, which are told apart
+# by how many of their common words text uses
+STOPWORDS: Final = {
+    "Latin": {
+        "en": "the be to of and in that have it for not on with he as you "
+        "do at this but his by from they we her she or an will my all "
+        "would there their what so if about who get me when can like just "
+        "him know your is are was were am has had did don",
+        "fr": "le la les des du une et est pas que qui dans pour ne je tu "
+        "il elle nous vous ils au aux ce cette sur avec mais ou son sa ses "
+        "mon ma mes se plus qu suis tout bien oui non",
+        "es": "el la los las del una que en es se por con para lo su al "
+        "como pero sus ya este sí porque esta muy sin también yo hay qué "
+        "está estoy eso bien tengo",
+        "de": "der die das und ist nicht ich du er sie es wir ihr ein eine "
+        "einen zu den dem mit auf für von sich auch aber was wie noch nur "
+        "dass im wenn hat bin bist sind war",
+        "it": "il lo gli di che è un una non per con sono mi ti si ho ha "
+        "del della questo come ma anche io lui lei noi voi sei",
+        "pt": "os do da dos das que não é um uma para com na no por mais "
+        "mas eu você ele ela isso está muito também já seu sua",
+        "nl": "het een en van ik je is niet dat die er zijn op te met voor "
+        "maar wat hij zij we als dit ook nog bij naar",
+        "pl": "w nie na się z to że jest do co jak ale jestem mnie tak ja "
+        "ty czy już tylko jego",
+        "tr": "ve bir bu da de ne için ben sen ile çok ama mı mi değil var "
+        "yok gibi daha",
+        "id": "yang dan di itu ini dengan untuk tidak aku kamu ada saya dari "
+        "ke apa akan",
+        "sv": "och att det som en är på för med jag inte har av till den du "
+        "om vi men",
+    },
+    "Cyrillic": {
+        "ru": "и в не на я что он с как а это все она так его но ты к у же "
+        "вы за бы по только мне было вот от меня еще нет из ему когда "
+        "даже ну если уже или быть тебя ничего",
+        "uk": "і в не на я що він з як а це все вона так його але ти до у "
+        "ви за б по тільки мені було ось від мене ще ні про якщо вже або "
+        "бути тебе нічого та",
+        "bg": "и в не на аз че той с как а това всичко тя така но ти към у "
+        "вие за по само ми беше от мен още ако вече или",
+    },
+}
+
+
+def _index_words(
+    languages: dict[str, str],
+) -> dict[str, tuple[str, ...]]:
+    """Return word to languages it is a common word of."""
+    index: dict[str, tuple[str, ...]] = {}
+    for language, words in languages.items():
+        for word in set(words.split()):
+            index[word] = (*index.get(word, ()), language)
+    return index
+
+
+# Word to languages it is a common word of, for each script
+_WORD_LANGUAGES: Final = {
+    script: _index_words(languages) for script, languages in STOPWORDS.items()
+}
+
+WORD_RE: Final = re.compile(r"[^\W\d_]+")
+
+# Common words a line needs to be identified
+MIN_LINE_HITS: Final = 2
+# Common words a whole document needs to be identified
+MIN_DOCUMENT_HITS: Final = 5
+# How many times more common words the best language needs than the next
+MARGIN: Final = 1.5
+# Share of the words of a line that need to be common words of a
+# language for the line to certainly be in it
+MIN_LINE_SHARE: Final = 1 / 3
+
+
+def script_of(char: str) -> str | None:
+    """Return name of script character is a letter of, or None."""
+    code = ord(char)
+    index = bisect_right(_RANGE_STARTS, code) - 1
+    if index < 0:
+        return None
+    _start, end, script = SCRIPT_RANGES[index]
+    return script if code <= end else None
+
+
+def script_counts(text: str) -> Counter[str]:
+    """Return number of letters of each script in text."""
+    counts: Counter[str] = Counter()
+    for char in text:
+        script = script_of(char)
+        if script is not None:
+            counts[script] += 1
+    return counts
+
+
+def detect_language(
+    text: str,
+    min_hits: int = MIN_LINE_HITS,
+    guess_han: bool = True,
+) -> str | None:
+    """Return ISO 639-1 code of language text is in, or None if unsure.
+
+    Languages are identified by script, or if more than one language
+    uses a script, by counting common words. Those need at least
+    min_hits common words and a clear lead over the next best language.
+    Han text without kana is taken to be Chinese if guess_han, as
+    longer Japanese text nearly always has kana. Otherwise it is None.
+    """
+    scripts = script_counts(text)
+    if not scripts:
+        return None
+    script = scripts.most_common(1)[0][0]
+    if script == "Han" and scripts["Kana"]:
+        # Japanese is mostly written with Han characters too
+        return "ja"
+    if script == "Han" and not guess_han:
+        return None
+    if script in SCRIPT_LANGUAGES:
+        return SCRIPT_LANGUAGES[script]
+
+    word_languages = _WORD_LANGUAGES[script]
+    scores: Counter[str] = Counter()
+    for word in WORD_RE.findall(text.lower()):
+        scores.update(word_languages.get(word, ()))
+    ranked = scores.most_common(2)
+    if not ranked or ranked[0][1] < min_hits:
+        return None
+    if len(ranked) > 1 and ranked[0][1] < ranked[1][1] * MARGIN:
+        return None
+    return ranked[0][0]
+
+
+def detect_dominant_language(texts: Iterable[str]) -> str | None:
+    """Return ISO 639-1 code of language most of texts are in, or None."""
+    return detect_language("\n".join(texts), MIN_DOCUMENT_HITS)
+
+
+def base_language(language: str) -> str:
+    """Return language code without region, for example zh for zh-CN."""
+    return language.split("-", 1)[0].split("_", 1)[0].lower()
+
+
+def is_language(
+    text: str,
+    language: str,
+    source_language: str | None = None,
+) -> bool:
+    """Return if text is certainly in language.
+
+    Han text without kana is never certain, since short Japanese lines
+    such as names can be written with only Han characters.
+    For scripts several languages share, each common word is counted
+    once, and only if it is a common word of no other language, which
+    includes source_language if it is known. Those words also need to
+    be at least MIN_LINE_SHARE of the words of text.
+    """
+    language = base_language(language)
+    scripts = script_counts(text)
+    if not scripts:
+        return False
+    script = scripts.most_common(1)[0][0]
+    word_languages = _WORD_LANGUAGES.get(script)
+    if word_languages is None:
+        return detect_language(text, guess_han=False) == language
+
+    source = (
+        None if source_language is None else base_language(source_language)
+    )
+    words = set(WORD_RE.findall(text.lower()))
+    scores: Counter[str] = Counter()
+    for word in words:
+        languages = word_languages.get(word, ())
+        if len(languages) == 1 and languages[0] != source:
+            scores[languages[0]] += 1
+    hits = scores.pop(language, 0)
+    return (
+        hits >= MIN_LINE_HITS
+        and hits >= len(words) * MIN_LINE_SHARE
+        and hits >= max(scores.values(), default=0) * MARGIN
+    )
+
+
+if __name__ == "__main__":
+    print(f"{__title__}\nProgrammed by {__author__}.\n")
@@ -28,24 +28,63 @@ __license__ = "GNU General Public License Version 3"
 
 import argparse
 import sys
-from typing import TYPE_CHECKING
+from functools import partial
+from typing import TYPE_CHECKING, Any, Final
 
 import httpx
 import orjson
 import trio
 
-from subtitle_translate import extricate, subtitle_parser, translate
+from subtitle_translate import (
+    atomic_file,
+    classify,
+    extricate,
+    incremental,
+    json_stream,
+    langid,
+    normalize,
+    output_cache,
+    sentences,
+    subtitle_parser,
+    translate,
+    translation_cache,
+    translation_memory,
+)
+
+if sys.version_info < (3, 11):
+    from exceptiongroup import BaseExceptionGroup
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import (
+        AsyncGenerator,
+        Awaitable,
+        Callable,
+        Generator,
+        Iterable,
+        Mapping,
+        Sequence,
+    )
 
 
 async def translate_texts(
     texts: dict[int, tuple[str, ...]],
     source_lang: str,
     dest_lang: str = "en",
+    classifier: Callable[[str], bool] | None = classify.DEFAULT_CLASSIFIER,
+    detect_language: bool = True,
+    known: Mapping[tuple[int, int], str] | None = None,
+    sentence_cache: translation_cache.TranslationCache | None = None,
 ) -> dict[int, tuple[str, ...]]:
-    """Translate text from source_lang to dest_lang."""
+    """Translate text from source_lang to dest_lang.
+
+    Text classifier returns False for is kept as it is instead of being
+    translated. If classifier is None, all text is translated.
+    If detect_language, source_lang is identified locally when it is
+    auto, and text already in dest_lang is kept as it is.
+    Known maps text key and position to translations to use instead
+    of translating that text again. If sentence_cache is given,
+    sentences found there are not requested again.
+    """
     # Need keys and values to be separated so we can translate only the
     # values and not the keys.
     # Values have to be lists for extricate as of writing.
@@ -53,14 +92,74 @@ async def translate_texts(
         {k: [x.replace("\n", " ") for x in v] for k, v in texts.items()},
     )
 
+    if detect_language and source_lang == "auto":
+        detected = langid.detect_dominant_language(values)
+        # Text left to translate in a file mostly in dest_lang is in
+        # some other language, so it is still detected by the service
+        if detected is not None and langid.base_language(
+            detected,
+        ) != langid.base_language(dest_lang):
+            print(f"Detected source language {detected!r}.")
+            source_lang = detected
+
+    # Values are in the same order as texts and their positions. Text
+    # that is not translated is kept as it was, line breaks and all.
+    new_values = [text for runs in texts.values() for text in runs]
+    reused: set[int] = set()
+    if known:
+        positions = (
+            (key, position)
+            for key, text in texts.items()
+            for position in range(len(text))
+        )
+        for index, position_key in enumerate(positions):
+            found = known.get(position_key)
+            if found is not None:
+                new_values[index] = found
+                reused.add(index)
+        print(f"Reused {len(reused)} previous translations.")
+
+    # Common words of the source language do not show a line is
+    # already in dest_lang, close languages share many of them
+    known_source = None if source_lang == "auto" else source_lang
+    indexes = [
+        index
+        for index, value in enumerate(values)
+        if index not in reused
+        and (classifier is None or classifier(value))
+        and not (
+            detect_language
+            and langid.is_language(value, dest_lang, known_source)
+        )
+    ]
+    skipped = len(values) - len(indexes) - len(reused)
+    if skipped:
+        print(f"Skipped {skipped} untranslatable texts.")
+
+    # Texts that only differ by decoration around them are translated
+    # once, and their decoration is put back around the translation.
+    groups: dict[str, list[tuple[int, normalize.Decoration]]] = {}
+    for index in indexes:
+        core, decoration = normalize.normalize_text(values[index])
+        if core:
+            groups.setdefault(core, []).append((index, decoration))
+    merged = sum(map(len, groups.values())) - len(groups)
+    if merged:
+        print(f"Merged {merged} repeated texts.")
+
     async with httpx.AsyncClient(http2=True) as client:
-        new_values = await translate.translate_async(
+        translated = await translate.translate_async(
             client,
-            values,
+            list(groups),
             dest_lang,
             source_lang,
+            sentence_cache,
         )
 
+    for group, value in zip(groups.values(), translated, strict=True):
+        for index, decoration in group:
+            new_values[index] = normalize.restore_text(value, decoration)
+
     new_texts = extricate.list_to_dict(keys, new_values)
     # Convert back to tuples
     return {k: tuple(v) for k, v in new_texts.items()}
@@ -70,14 +169,65 @@ async def translate_subtitles(
     generator: Iterable[tuple[int, subtitle_parser.Subtitle]],
     source_language: str = "auto",
     dest_language: str = "en",
+    convert: Callable[
+        [Iterable[tuple[int, subtitle_parser.Subtitle]]],
+        tuple[dict[int, subtitle_parser.Subtitle], dict[int, tuple[str, ...]]],
+    ] = subtitle_parser.convert_text,
+    classifier: Callable[[str], bool] | None = classify.DEFAULT_CLASSIFIER,
+    detect_language: bool = True,
+    previous: incremental.PreviousTranslation | None = None,
+    sentence_cache: translation_cache.TranslationCache | None = None,
+    merge_sentences: bool = False,
 ) -> tuple[dict[int, subtitle_parser.Subtitle], dict[int, tuple[str, ...]]]:
-    """Translate subtitles file asynchronously."""
-    subs, texts = subtitle_parser.convert_text(generator)
+    """Translate subtitles file asynchronously.
+
+    If previous is given, text it has a translation for is not
+    translated again. If merge_sentences, sentences split over
+    several cues are translated whole and split back over them.
+    """
+    subs, texts = convert(generator)
 
     print(f"Parsed {len(subs)} subtitles")
 
+    known = previous.match(subs, texts) if previous is not None else None
+
     print("Translating...")
-    new_texts = await translate_texts(texts, source_language, dest_language)
+    if merge_sentences:
+        # Text with a previous translation is kept on its own to reuse it
+        groups = sentences.group_sentences(subs, texts, known or ())
+        group_known = None
+        if known:
+            group_known = {
+                (index, 0): known[group[0]]
+                for index, group in enumerate(groups)
+                if group[0] in known
+            }
+        joined = sum(len(group) - 1 for group in groups)
+        if joined:
+            print(f"Joined {joined} text runs into sentences.")
+        new_texts = sentences.split_groups(
+            texts,
+            groups,
+            await translate_texts(
+                sentences.join_groups(texts, groups),
+                source_language,
+                dest_language,
+                classifier,
+                detect_language,
+                group_known,
+                sentence_cache,
+            ),
+        )
+    else:
+        new_texts = await translate_texts(
+            texts,
+            source_language,
+            dest_language,
+            classifier,
+            detect_language,
+            known,
+            sentence_cache,
+        )
 
     sentence_count = sum(map(len, texts.values()))
     print(f"Translated {sentence_count} sentences.")
@@ -90,27 +240,37 @@ async def translate_subtitles_srt(
     dest_file: str | None = None,
     source_language: str = "auto",
     dest_language: str = "en",
-) -> None:
-    """Translate subtitles file asynchronously."""
+    classifier: Callable[[str], bool] | None = classify.DEFAULT_CLASSIFIER,
+    detect_language: bool = True,
+    previous: incremental.PreviousTranslation | None = None,
+    sentence_cache: translation_cache.TranslationCache | None = None,
+    merge_sentences: bool = False,
+) -> str:
+    """Translate subtitles file asynchronously. Return destination file."""
     # Set destination if not provided
     if dest_file is None:
-        name, ext = source_file.rsplit(".", 1)
-        dest_file = f"{name}.{dest_language}.{ext}"
+        dest_file = default_dest_file(source_file, dest_language)
 
     print(f"Loading subtitles file {source_file!r}...")
     subs, new_texts = await translate_subtitles(
-        subtitle_parser.parse_file_srt(source_file),
+        await subtitle_parser.parse_file_srt_async(source_file),
         source_language=source_language,
         dest_language=dest_language,
+        classifier=classifier,
+        detect_language=detect_language,
+        previous=previous,
+        sentence_cache=sentence_cache,
+        merge_sentences=merge_sentences,
     )
 
     print("Updating subtitle texts...")
     subs = subtitle_parser.modify_subtitles(subs, new_texts)
 
     print("Saving...")
-    subtitle_parser.write_subtitles_srt_file(dest_file, subs)
+    await subtitle_parser.write_subtitles_srt_file_async(dest_file, subs)
     print("Save complete.")
     print(f"Saved to {dest_file!r}")
+    return dest_file
 
 
 async def translate_subtitles_vtt(
@@ -118,15 +278,18 @@ async def translate_subtitles_vtt(
     dest_file: str | None = None,
     source_language: str = "auto",
     dest_language: str = "en",
-) -> None:
-    """Translate subtitles file asynchronously."""
+    classifier: Callable[[str], bool] | None = classify.DEFAULT_CLASSIFIER,
+    detect_language: bool = True,
+    previous: incremental.PreviousTranslation | None = None,
+    sentence_cache: translation_cache.TranslationCache | None = None,
+    merge_sentences: bool = False,
+) -> str:
+    """Translate subtitles file asynchronously. Return destination file."""
     print(f"Loading subtitles file {source_file!r}...")
-    gen = subtitle_parser.parse_file_vtt(source_file)
-    header = next(gen)
+    header, blocks = await subtitle_parser.parse_file_vtt_async(source_file)
 
     new_header = []
     for line in header:
-        assert isinstance(line, str)
         if source_language == "auto" and line.startswith("Language: "):
             key, value = line.split(" ", 1)
             source_language = value
@@ -135,27 +298,40 @@ async def translate_subtitles_vtt(
 
     # Set destination if not provided
     if dest_file is None:
-        name, ext = source_file.rsplit(".", 1)
-        source_lang_ext = f".{source_language}"
-        if source_lang_ext in name:
-            name = name.removesuffix(source_lang_ext)
-        dest_file = f"{name}.{dest_language}.{ext}"
+        dest_file = default_dest_file(
+            source_file,
+            dest_language,
+            source_language,
+        )
 
     subs, new_texts = await translate_subtitles(
-        enumerate(x for x in gen if isinstance(x, subtitle_parser.Subtitle)),
+        (
+            (index, block)
+            for index, block in enumerate(blocks)
+            if isinstance(block, subtitle_parser.Subtitle)
+        ),
+        source_language=source_language,
+        dest_language=dest_language,
+        convert=subtitle_parser.convert_text_vtt,
+        classifier=classifier,
+        detect_language=detect_language,
+        previous=previous,
+        sentence_cache=sentence_cache,
+        merge_sentences=merge_sentences,
     )
 
     print("Updating subtitle texts...")
-    subs = subtitle_parser.modify_subtitles_plain(subs, new_texts)
+    subs = subtitle_parser.modify_subtitles_vtt(subs, new_texts)
 
     print("Saving...")
-    subtitle_parser.write_subtitles_vtt_file(
+    await subtitle_parser.write_subtitles_vtt_file_async(
         dest_file,
         new_header,
-        subs.values(),
+        (subs.get(index, block) for index, block in enumerate(blocks)),
     )
     print("Save complete.")
     print(f"Saved to {dest_file!r}")
+    return dest_file
 
 
 async def translate_json(
@@ -163,44 +339,427 @@ async def translate_json(
     dest_file: str | None = None,
     source_language: str = "auto",
     dest_language: str = "en",
-) -> None:
-    """Translate subtitles file asynchronously."""
+    in_place: bool = False,
+    select: Callable[[extricate.KeyPath], bool] | None = None,
+    stream: bool = False,
+    sentence_cache: translation_cache.TranslationCache | None = None,
+) -> str:
+    """Translate subtitles file asynchronously. Return destination file.
+
+    If in_place, translations are written straight into the loaded
+    document instead of rebuilding a new one from compiled keys.
+    If select is given, only strings at paths it returns True for
+    are translated. If stream, the document is never loaded whole.
+    """
     # Set destination if not provided
     if dest_file is None:
-        name, ext = source_file.rsplit(".", 1)
-        dest_file = f"{name}.{dest_language}.{ext}"
+        dest_file = default_dest_file(source_file, dest_language)
+
+    if stream:
+        await translate_json_stream(
+            source_file,
+            dest_file,
+            source_language,
+            dest_language,
+            select,
+            sentence_cache,
+        )
+        return dest_file
 
     print(f"Loading subtitles file {source_file!r}...")
 
     async with await trio.open_file(source_file, "rb") as fp:
         texts = orjson.loads(await fp.read())
 
-    # Need keys and values to be separated so we can translate only the
-    # values and not the keys.
-    # Values have to be lists for extricate as of writing.
-    keys, values = extricate.dict_to_list(texts)
-
-    print(f"Parsed {len(keys)} subtitles")
-
     print("Translating...")
 
-    async with httpx.AsyncClient(http2=True) as client:
-        new_values = await translate.translate_async(
-            client,
-            values,
+    if in_place:
+        new_texts, count = await translate_json_in_place(
+            texts,
+            source_language,
             dest_language,
+            select,
+            sentence_cache,
+        )
+    else:
+        new_texts, count = await translate_json_rebuild(
+            texts,
             source_language,
+            dest_language,
+            select,
+            sentence_cache,
         )
 
-    new_texts = extricate.list_to_dict(keys, new_values)
-
-    print(f"Translated {len(new_values)} sentences.")
+    print(f"Translated {count} sentences.")
 
     print("Saving...")
     async with await trio.open_file(dest_file, "wb") as fp:
         await fp.write(orjson.dumps(new_texts, option=orjson.OPT_INDENT_2))
     print("Save complete.")
     print(f"Saved to {dest_file!r}")
+    return dest_file
+
+
+async def translate_json_stream(
+    source_file: str,
+    dest_file: str,
+    source_language: str = "auto",
+    dest_language: str = "en",
+    select: Callable[[extricate.KeyPath], bool] | None = None,
+    sentence_cache: translation_cache.TranslationCache | None = None,
+) -> None:
+    """Translate JSON file while reading it, writing output as it is ready.
+
+    Output is written to a temporary file that replaces dest_file once
+    done, so dest_file can be the same as source_file.
+    """
+    print(f"Streaming subtitles file {source_file!r}...")
+
+    async with (
+        atomic_file.temp_path_async(dest_file) as temp_file,
+        await trio.open_file(source_file, "rb") as source,
+        await trio.open_file(temp_file, "wb") as dest,
+        httpx.AsyncClient(http2=True) as client,
+    ):
+
+        async def read_chunks() -> AsyncGenerator[bytes, None]:
+            while chunk := await source.read(json_stream.DEFAULT_BUFFER_SIZE):
+                yield chunk
+
+        count = await json_stream.translate_json_stream(
+            client,
+            read_chunks(),
+            dest.write,
+            dest_language,
+            source_language,
+            select,
+            cache=sentence_cache,
+        )
+
+    print(f"Translated {count} sentences.")
+    print("Save complete.")
+    print(f"Saved to {dest_file!r}")
+
+
+async def translate_json_in_place(
+    texts: Any,
+    source_language: str,
+    dest_language: str,
+    select: Callable[[extricate.KeyPath], bool] | None = None,
+    sentence_cache: translation_cache.TranslationCache | None = None,
+) -> tuple[Any, int]:
+    """Translate leaves of JSON data in place.
+
+    Return translated data and number of sentences translated.
+    """
+    # Root may be a leaf itself, so keep it in a container
+    holder = [texts]
+
+    def patch(reference: tuple[Any, Any], translated: str) -> None:
+        """Write translated value to where it was read from."""
+        container, key = reference
+        container[key] = translated
+
+    def patch_path(path: extricate.KeyPath, translated: str) -> None:
+        """Write translated value to path it was read from."""
+        extricate.set_path(holder, path, translated)
+
+    # Only text is translated, everything else is left as is
+    items: Iterable[tuple[Any, str]]
+    if select is None:
+        items = (
+            ((container, key), value)
+            for container, key, value in extricate.iter_references(holder)
+            if value and isinstance(value, str)
+        )
+        callback: Callable[[Any, str], object] = patch
+    else:
+        # Paths are only tracked when they are needed. First path
+        # element is always the holder, which is not part of the data.
+        items = (
+            (path, value)
+            for path, value in extricate.iter_paths(holder)
+            if value and isinstance(value, str) and select(path[1:])
+        )
+        callback = patch_path
+
+    async with httpx.AsyncClient(http2=True) as client:
+        count = await translate.translate_stream_async(
+            client,
+            items,
+            dest_language,
+            source_language,
+            callback,
+            cache=sentence_cache,
+        )
+    return holder[0], count
+
+
+async def translate_json_rebuild(
+    texts: Any,
+    source_language: str,
+    dest_language: str,
+    select: Callable[[extricate.KeyPath], bool] | None = None,
+    sentence_cache: translation_cache.TranslationCache | None = None,
+) -> tuple[Any, int]:
+    """Translate leaves of JSON data into a rebuilt copy.
+
+    Return translated data and number of sentences translated.
+    """
+    # Translation starts as soon as the first leaf is read, and the
+    # result is rebuilt from translations as they arrive.
+    rebuilder = extricate.Rebuilder()
+
+    def read_leaves() -> Generator[tuple[str, str], None, None]:
+        """Yield leaves, adding originals first to keep document order."""
+        for key, value in extricate.iter_leaves(texts):
+            rebuilder.add(key, value)
+            # Only text is translated, everything else is left as is
+            if extricate.is_text_leaf(key, value) and (
+                select is None or select(extricate.key_to_path(key)[0])
+            ):
+                yield key, value
+
+    async with httpx.AsyncClient(http2=True) as client:
+        count = await translate.translate_stream_async(
+            client,
+            read_leaves(),
+            dest_language,
+            source_language,
+            rebuilder.add,
+            cache=sentence_cache,
+        )
+    return rebuilder.result(), count
+
+
+SOURCE_TYPES: Final = ("srt", "vtt", "json")
+# Default number of files translated at once
+DEFAULT_JOBS: Final = 4
+
+
+def get_source_type(source_file: str, source_type: str = "auto") -> str:
+    """Return source type, guessing from filename if source_type is auto."""
+    if source_type == "auto":
+        _name, source_type = source_file.rsplit(".", 1)
+    return source_type
+
+
+def default_dest_file(
+    source_file: str,
+    dest_language: str,
+    source_language: str | None = None,
+) -> str:
+    """Return default destination file for source_file.
+
+    If source_language is given, it is removed from the name first.
+    """
+    name, ext = source_file.rsplit(".", 1)
+    if source_language is not None:
+        source_lang_ext = f".{source_language}"
+        if source_lang_ext in name:
+            name = name.removesuffix(source_lang_ext)
+    return f"{name}.{dest_language}.{ext}"
+
+
+def header_language_vtt(filepath: str) -> str | None:
+    """Return language from header of vtt file, or None."""
+    with open(filepath, encoding="utf-8") as fp:
+        header = subtitle_parser.read_header_vtt(fp)
+    for line in header:
+        if line.startswith("Language: "):
+            return line.split(" ", 1)[1]
+    return None
+
+
+async def translate_file(
+    source_file: str,
+    dest_file: str | None = None,
+    source_type: str = "auto",
+    source_language: str = "auto",
+    dest_language: str = "en",
+    json_in_place: bool = False,
+    json_select: Callable[[extricate.KeyPath], bool] | None = None,
+    json_streaming: bool = False,
+    classifier: Callable[[str], bool] | None = classify.DEFAULT_CLASSIFIER,
+    detect_language: bool = True,
+    previous: incremental.PreviousTranslation | None = None,
+    cache: output_cache.OutputCache | None = None,
+    cache_options: str = "",
+    sentence_cache: translation_cache.TranslationCache | None = None,
+    merge_sentences: bool = False,
+) -> str:
+    """Translate source_file using handler for source_type.
+
+    If cache is given, output stored for the same file contents,
+    languages and cache_options is written instead of translating
+    again, and new output is stored. Return destination file.
+    """
+    source_type = get_source_type(source_file, source_type)
+
+    key = None
+    # Output also depends on the previous translation, so it is not cached
+    if cache is not None and previous is None:
+        key = output_cache.cache_key(
+            await trio.to_thread.run_sync(
+                output_cache.file_digest,
+                source_file,
+            ),
+            __version__,
+            source_type,
+            source_language,
+            dest_language,
+            cache_options,
+        )
+        cached_dest = dest_file
+        if cached_dest is None and source_type == "vtt":
+            # Named the same way translate_subtitles_vtt would
+            header_language = source_language
+            if header_language == "auto":
+                header_language = (
+                    await trio.to_thread.run_sync(
+                        header_language_vtt,
+                        source_file,
+                    )
+                    or "auto"
+                )
+            cached_dest = default_dest_file(
+                source_file,
+                dest_language,
+                header_language,
+            )
+        elif cached_dest is None:
+            cached_dest = default_dest_file(source_file, dest_language)
+        if await trio.to_thread.run_sync(cache.get, key, cached_dest):
+            dest_file = cached_dest
+            print(f"Reused cached translation of {source_file!r}.")
+            print(f"Saved to {dest_file!r}")
+            return dest_file
+
+    if source_type == "srt":
+        dest_file = await translate_subtitles_srt(
+            source_file,
+            dest_file,
+            source_language,
+            dest_language,
+            classifier,
+            detect_language,
+            previous,
+            sentence_cache,
+            merge_sentences,
+        )
+    elif source_type == "vtt":
+        dest_file = await translate_subtitles_vtt(
+            source_file,
+            dest_file,
+            source_language,
+            dest_language,
+            classifier,
+            detect_language,
+            previous,
+            sentence_cache,
+            merge_sentences,
+        )
+    elif source_type == "json":
+        dest_file = await translate_json(
+            source_file,
+            dest_file,
+            source_language,
+            dest_language,
+            json_in_place,
+            json_select,
+            json_streaming,
+            sentence_cache,
+        )
+    else:
+        raise ValueError(f"Unhandled source type {source_type!r}.")
+
+    if cache is not None and key is not None:
+        await trio.to_thread.run_sync(cache.put, key, dest_file)
+    return dest_file
+
+
+def error_messages(exc: BaseException) -> list[str]:
+    """Return messages of exception, or of every exception in a group."""
+    if isinstance(exc, BaseExceptionGroup):
+        return [
+            message
+            for inner in exc.exceptions
+            for message in error_messages(inner)
+        ]
+    return [f"{type(exc).__name__}: {exc}"]
+
+
+async def translate_files(
+    source_files: Sequence[str],
+    translate_one: Callable[[str], Awaitable[object]],
+    jobs: int = DEFAULT_JOBS,
+) -> list[str]:
+    """Translate source files with translate_one, at most jobs at once.
+
+    A file failing to translate is reported and does not stop the
+    others. Return files that failed, in the order they were given.
+    """
+    limiter = trio.CapacityLimiter(jobs)
+    failed: set[str] = set()
+
+    async def run_one(source_file: str) -> None:
+        async with limiter:
+            try:
+                await translate_one(source_file)
+            except Exception as exc:
+                failed.add(source_file)
+                for message in error_messages(exc):
+                    print(
+                        f"Failed to translate {source_file!r}: {message}",
+                        file=sys.stderr,
+                    )
+
+    async with trio.open_nursery() as nursery:
+        for source_file in source_files:
+            nursery.start_soon(run_one, source_file)
+    return [
+        source_file for source_file in source_files if source_file in failed
+    ]
+
+
+async def load_previous_translation(
+    source_file: str,
+    translated_file: str,
+    source_type: str = "auto",
+) -> incremental.PreviousTranslation:
+    """Return translations from previous source and its translated output."""
+    source_type = get_source_type(source_file, source_type)
+    if source_type == "srt":
+        return incremental.PreviousTranslation.from_subtitles(
+            await subtitle_parser.parse_file_srt_async(source_file),
+            await subtitle_parser.parse_file_srt_async(translated_file),
+        )
+    if source_type == "vtt":
+        _header, source_blocks = await subtitle_parser.parse_file_vtt_async(
+            source_file,
+        )
+        (
+            _header,
+            translated_blocks,
+        ) = await subtitle_parser.parse_file_vtt_async(
+            translated_file,
+        )
+        return incremental.PreviousTranslation.from_subtitles(
+            (
+                (index, block)
+                for index, block in enumerate(source_blocks)
+                if isinstance(block, subtitle_parser.Subtitle)
+            ),
+            (
+                (index, block)
+                for index, block in enumerate(translated_blocks)
+                if isinstance(block, subtitle_parser.Subtitle)
+            ),
+            subtitle_parser.convert_text_vtt,
+        )
+    raise ValueError(
+        f"Previous translations are not supported for {source_type!r} files.",
+    )
 
 
 async def run_async() -> None:
@@ -220,9 +779,14 @@ async def run_async() -> None:
         help="Show the program version and exit.",
     )
     parser.add_argument(
-        "source_file",
+        "source_files",
         type=str,
-        help="The source subtitle file to translate.",
+        nargs="+",
+        metavar="source_file",
+        help=(
+            "The source subtitle file to translate.\n"
+            "More than one file can be given to translate them all at once."
+        ),
     )
     parser.add_argument(
         "--source-lang",
@@ -257,35 +821,401 @@ async def run_async() -> None:
         help="The destination subtitle file (default: '<source-file>.<source-lang>.<source-file ext>').",
     )
 
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=(
+            "Most source files to translate at once "
+            f"(default: {DEFAULT_JOBS})."
+        ),
+    )
+
+    parser.add_argument(
+        "--json-in-place",
+        action="store_true",
+        help=(
+            "Write translations straight into the loaded JSON document "
+            "instead of rebuilding it, which uses about half the memory."
+        ),
+    )
+
+    parser.add_argument(
+        "--json-stream",
+        action="store_true",
+        help=(
+            "Read, translate and write JSON documents incrementally, so "
+            "memory use stays the same no matter how large they are."
+        ),
+    )
+    parser.add_argument(
+        "--include",
+        type=str,
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help=(
+            "Only translate JSON strings whose key path matches PATTERN. "
+            "Paths are keys joined by '/', '*' matches within one key and "
+            "'**' any number of keys, for example 'items/*/text'. "
+            "Can be given more than once."
+        ),
+    )
+    parser.add_argument(
+        "--exclude",
+        type=str,
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help=(
+            "Do not translate JSON strings whose key path matches PATTERN, "
+            "for example '**/id'. Can be given more than once."
+        ),
+    )
+
+    parser.add_argument(
+        "--skip-rules",
+        type=str,
+        default=",".join(classify.DEFAULT_RULES),
+        help=(
+            "Comma separated rules for subtitle text that is kept as it is "
+            "instead of being translated, or '' to translate everything "
+            f"(default: '{','.join(classify.DEFAULT_RULES)}'). "
+            f"Rules are {', '.join(classify.RULES)}."
+        ),
+    )
+
+    parser.add_argument(
+        "--no-detect-language",
+        action="store_false",
+        dest="detect_language",
+        help=(
+            "Do not identify the source language locally when it is 'auto', "
+            "and translate subtitle lines already in the destination "
+            "language too."
+        ),
+    )
+
+    parser.add_argument(
+        "--merge-sentences",
+        action="store_true",
+        help=(
+            "Translate sentences split over consecutive subtitles as one "
+            "sentence, then split the translation back over them by "
+            "length. Fewer, better translated requests, but where the "
+            "translation is split might not match the timing exactly."
+        ),
+    )
+
+    parser.add_argument(
+        "--previous-source",
+        type=str,
+        help=(
+            "Previous version of the source subtitle file. Together with "
+            "--previous-translation, text that has not changed since then "
+            "reuses its previous translation instead of being translated "
+            "again."
+        ),
+    )
+    parser.add_argument(
+        "--previous-translation",
+        type=str,
+        help="Translated output of the previous source subtitle file.",
+    )
+
+    parser.add_argument(
+        "--output-cache",
+        type=str,
+        metavar="DIRECTORY",
+        help=(
+            "Directory to keep translated files in. A file with the same "
+            "contents, languages and options as one translated before is "
+            "copied from here instead of being translated again."
+        ),
+    )
+    parser.add_argument(
+        "--output-cache-size",
+        type=int,
+        default=output_cache.DEFAULT_MAX_BYTES >> 20,
+        metavar="MEGABYTES",
+        help=(
+            "Largest total size of the output cache, least recently used "
+            "files are removed past it "
+            f"(default: {output_cache.DEFAULT_MAX_BYTES >> 20})."
+        ),
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_false",
+        dest="cache",
+        help=(
+            "Do not remember translated sentences in memory, so repeated "
+            "sentences are requested again."
+        ),
+    )
+    parser.add_argument(
+        "--cache-entries",
+        type=int,
+        default=translation_cache.DEFAULT_MAX_ENTRIES,
+        metavar="COUNT",
+        help=(
+            "Most sentences to remember translations of "
+            f"(default: {translation_cache.DEFAULT_MAX_ENTRIES}). Least "
+            "recently used ones are forgotten first."
+        ),
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=translation_cache.DEFAULT_MAX_BYTES >> 20,
+        metavar="MEGABYTES",
+        help=(
+            "Most memory remembered translations may take "
+            f"(default: {translation_cache.DEFAULT_MAX_BYTES >> 20})."
+        ),
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        metavar="SECONDS",
+        help="Forget remembered translations after this many seconds.",
+    )
+    parser.add_argument(
+        "--fuzzy-threshold",
+        type=float,
+        metavar="SIMILARITY",
+        help=(
+            "Reuse the remembered translation of the most similar sentence "
+            "if it is at least this similar, from 0 to 1, and only differs "
+            "in punctuation, spacing or case. Similarity is how many "
+            "character trigrams sentences share, which short sentences "
+            "lose more of: 'Stop!' and 'Stop?' are 0.43 similar, 'Where "
+            "are you going?' and 'Where are you going!' 0.81. Off by "
+            "default."
+        ),
+    )
+    parser.add_argument(
+        "--load-memory",
+        type=str,
+        action="append",
+        default=[],
+        metavar="FILE",
+        help=(
+            "Remember translations from translation memory FILE before "
+            "translating, as long as they fit in the cache. Can be given "
+            "more than once."
+        ),
+    )
+    parser.add_argument(
+        "--warm-cache",
+        type=str,
+        nargs=2,
+        action="append",
+        default=[],
+        metavar=("SOURCE", "TRANSLATED"),
+        help=(
+            "Remember translations made by people from subtitle file SOURCE "
+            "and its translation TRANSLATED, aligned by when cues are "
+            "shown. Needs --source-lang. Can be given more than once."
+        ),
+    )
+    parser.add_argument(
+        "--save-memory",
+        type=str,
+        metavar="FILE",
+        help=(
+            "When done, add remembered translations that translation "
+            "memory FILE does not have yet to it."
+        ),
+    )
+
     args = parser.parse_args()
 
-    if args.source_type == "auto":
-        _name, ext = args.source_file.rsplit(".", 1)
-        args.source_type = ext
+    skip_rules = sorted({rule for rule in args.skip_rules.split(",") if rule})
+    try:
+        classifier = classify.TextClassifier(skip_rules)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    json_select = None
+    if args.include or args.exclude:
+        json_select = extricate.PathSelector(args.include, args.exclude)
 
-    if args.source_type == "srt":
-        await translate_subtitles_srt(
-            args.source_file,
-            args.dest_file,
-            args.source_lang,
-            args.dest_lang,
+    if args.dest_file is not None and len(args.source_files) > 1:
+        parser.error("--dest-file can only be used with one source file")
+    if args.json_in_place and args.json_stream:
+        parser.error("--json-in-place and --json-stream can not be combined")
+    if (args.previous_source is None) != (args.previous_translation is None):
+        parser.error(
+            "--previous-source and --previous-translation must be used together",
         )
-    elif args.source_type == "vtt":
-        await translate_subtitles_vtt(
-            args.source_file,
-            args.dest_file,
-            args.source_lang,
-            args.dest_lang,
+    if args.previous_source is not None and len(args.source_files) > 1:
+        parser.error("--previous-source can only be used with one source file")
+    if args.jobs < 1:
+        parser.error("--jobs must be positive")
+    if args.cache_entries < 1 or args.cache_size < 1:
+        parser.error("--cache-entries and --cache-size must be positive")
+    if args.cache_ttl is not None and args.cache_ttl <= 0:
+        parser.error("--cache-ttl must be positive")
+    if args.fuzzy_threshold is not None and not 0 < args.fuzzy_threshold <= 1:
+        parser.error("--fuzzy-threshold must be more than 0 and at most 1")
+    if not args.cache and (
+        args.load_memory
+        or args.warm_cache
+        or args.save_memory
+        or args.fuzzy_threshold
+    ):
+        parser.error(
+            "--load-memory, --warm-cache, --save-memory and "
+            "--fuzzy-threshold can not be used with --no-cache",
+        )
+    if args.warm_cache and args.source_lang == "auto":
+        parser.error("--warm-cache needs --source-lang")
+
+    for source_file in args.source_files:
+        source_type = get_source_type(source_file, args.source_type)
+        if source_type not in SOURCE_TYPES:
+            print(f"Unhandled source type {source_type!r}.")
+            sys.exit(1)
+
+    cache = None
+    cache_options = ""
+    if args.output_cache is not None:
+        cache = output_cache.OutputCache(
+            args.output_cache,
+            args.output_cache_size << 20,
         )
-    elif args.source_type == "json":
-        await translate_json(
-            args.source_file,
-            args.dest_file,
-            args.source_lang,
-            args.dest_lang,
+        # Translations loaded into the sentence cache change the output
+        # too, so they are part of the key by the contents of their files
+        try:
+            memory_digests = [
+                await trio.to_thread.run_sync(output_cache.file_digest, path)
+                for path in args.load_memory
+            ]
+            warm_digests = [
+                [
+                    await trio.to_thread.run_sync(
+                        output_cache.file_digest,
+                        path,
+                    )
+                    for path in pair
+                ]
+                for pair in args.warm_cache
+            ]
+        except OSError as exc:
+            parser.error(str(exc))
+        # Everything besides languages that changes the output
+        cache_options = orjson.dumps(
+            {
+                "skip_rules": skip_rules,
+                "detect_language": args.detect_language,
+                "include": args.include,
+                "exclude": args.exclude,
+                "merge_sentences": args.merge_sentences,
+                "fuzzy_threshold": args.fuzzy_threshold,
+                "load_memory": memory_digests,
+                "warm_cache": warm_digests,
+            },
+        ).decode("utf-8")
+
+    previous = None
+    if args.previous_source is not None:
+        try:
+            previous = await load_previous_translation(
+                args.previous_source,
+                args.previous_translation,
+                get_source_type(args.source_files[0], args.source_type),
+            )
+        except ValueError as exc:
+            parser.error(str(exc))
+        print(f"Loaded {len(previous)} previous translations.")
+
+    sentence_cache = None
+    if args.cache:
+        # Shared by all files, so sentences repeated between them are
+        # only requested once
+        sentence_cache = translation_cache.TranslationCache(
+            args.cache_entries,
+            args.cache_size << 20,
+            args.cache_ttl,
+            fuzzy_threshold=args.fuzzy_threshold,
+        )
+        for memory_file in args.load_memory:
+            try:
+                count = await trio.to_thread.run_sync(
+                    translation_memory.load_into_cache,
+                    sentence_cache,
+                    translation_memory.read_memory(memory_file),
+                )
+            except (OSError, ValueError) as exc:
+                parser.error(str(exc))
+            print(f"Loaded {count} translations from {memory_file!r}.")
+        for source_file, translated_file in args.warm_cache:
+            try:
+                count = await trio.to_thread.run_sync(
+                    translation_memory.load_into_cache,
+                    sentence_cache,
+                    translation_memory.parallel_entries(
+                        source_file,
+                        translated_file,
+                        args.source_lang,
+                        args.dest_lang,
+                    ),
+                )
+            except (OSError, ValueError) as exc:
+                parser.error(str(exc))
+            print(
+                f"Loaded {count} translations from {source_file!r} "
+                f"and {translated_file!r}.",
+            )
+
+    failed = await translate_files(
+        args.source_files,
+        partial(
+            translate_file,
+            dest_file=args.dest_file,
+            source_type=args.source_type,
+            source_language=args.source_lang,
+            dest_language=args.dest_lang,
+            json_in_place=args.json_in_place,
+            json_select=json_select,
+            json_streaming=args.json_stream,
+            classifier=classifier,
+            detect_language=args.detect_language,
+            previous=previous,
+            cache=cache,
+            cache_options=cache_options,
+            sentence_cache=sentence_cache,
+            merge_sentences=args.merge_sentences,
+        ),
+        args.jobs,
+    )
+
+    if sentence_cache is not None:
+        stats = sentence_cache.stats
+        print(
+            f"Translation cache: {stats.hits} hits, {stats.misses} misses, "
+            f"{stats.evictions} evictions.",
+        )
+        if stats.fuzzy_hits:
+            print(
+                f"Reused {stats.fuzzy_hits} translations of similar "
+                f"sentences, {stats.fuzzy_similarity:.0%} similar on average.",
+            )
+        if args.save_memory is not None:
+            count = await trio.to_thread.run_sync(
+                translation_memory.append_new,
+                args.save_memory,
+                list(translation_memory.cache_entries(sentence_cache)),
+            )
+            print(f"Saved {count} new translations to {args.save_memory!r}.")
+
+    if failed:
+        print(
+            f"Failed to translate {len(failed)} of "
+            f"{len(args.source_files)} files.",
         )
-    else:
-        print(f"Unhandled source type {args.source_type!r}.")
         sys.exit(1)
 
 
@@ -0,0 +1,98 @@
+"""Normalize - Canonical form of text for caching and translating."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# Normalize - Canonical form of text for caching and translating.
+# Copyright (C) 2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Normalize"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+
+import re
+import unicodedata
+from typing import Final, NamedTuple
+
+# Decoration around text that does not change what it means, in the
+# order it is peeled off. Each pattern matches the prefix and suffix
+# around the text in groups 1 and 3.
+DECORATIONS: Final = (
+    # Surrounding whitespace
+    re.compile(r"(\s+)(.*?)(\s*)", re.DOTALL),
+    re.compile(r"()(.*?)(\s+)", re.DOTALL),
+    # Dialogue dashes
+    re.compile(r"([-\u2010\u2013\u2014]\s*)(.+)()", re.DOTALL),
+)
+# Speaker names, like JOHN: or DR. SMITH:, which are only taken off when
+# the name is all upper case
+SPEAKER_RE: Final = re.compile(
+    r"([^\W\d_][\w .'\-]*?\.?:\s+)(.+)()",
+    re.DOTALL,
+)
+
+WHITESPACE_RE: Final = re.compile(r"\s+")
+
+
+class Decoration(NamedTuple):
+    """Text removed from around normalized text."""
+
+    prefix: str = ""
+    suffix: str = ""
+
+
+def _is_speaker(label: str) -> bool:
+    """Return if label is an upper case speaker name of at least two letters."""
+    return label.isupper() and sum(map(str.isalpha, label)) > 1
+
+
+def normalize_text(text: str) -> tuple[str, Decoration]:
+    """Return canonical text and decoration removed from around it.
+
+    Text is NFC normalized, decoration is peeled off until none is
+    left, and runs of whitespace inside are collapsed to one space.
+    Decoration can be put back around a translation of the canonical
+    text with restore_text.
+    """
+    core = unicodedata.normalize("NFC", text)
+    prefixes: list[str] = []
+    suffixes: list[str] = []
+    changed = True
+    while changed:
+        changed = False
+        for pattern in (*DECORATIONS, SPEAKER_RE):
+            match = pattern.fullmatch(core)
+            if match is None:
+                continue
+            if pattern is SPEAKER_RE and not _is_speaker(match.group(1)):
+                continue
+            prefix, core, suffix = match.groups()
+            prefixes.append(prefix)
+            suffixes.append(suffix)
+            changed = True
+    core = WHITESPACE_RE.sub(" ", core)
+    return core, Decoration("".join(prefixes), "".join(reversed(suffixes)))
+
+
+def restore_text(text: str, decoration: Decoration) -> str:
+    """Return text with decoration from normalize_text put back around it."""
+    return f"{decoration.prefix}{text}{decoration.suffix}"
+
+
+if __name__ == "__main__":
+    print(f"{__title__}\nProgrammed by {__author__}.\n")
@@ -0,0 +1,150 @@
+"""Output Cache - Reuse translated files for input seen before."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# Output Cache - Reuse translated files for input seen before.
+# Copyright (C) 2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Output Cache"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+
+import contextlib
+import hashlib
+import os
+import shutil
+from typing import Final
+
+from subtitle_translate import atomic_file
+
+DEFAULT_MAX_BYTES: Final = 256 << 20
+# Cache entries are named with this suffix so nothing else in the
+# directory is ever evicted
+ENTRY_SUFFIX: Final = ".out"
+
+
+def cache_key(source_digest: str, *parts: str) -> str:
+    """Return hex digest identifying source translated with parts.
+
+    source_digest is the file_digest of the source file. Parts should
+    be everything that changes the output, such as the languages,
+    options and program version.
+    """
+    digest = hashlib.sha256()
+    for part in (source_digest, *parts):
+        encoded = part.encode("utf-8")
+        # Length prefixed so parts can not run into each other
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+def file_digest(path: str | os.PathLike[str]) -> str:
+    """Return hex digest of contents of file at path."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        while chunk := fp.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OutputCache:
+    """Directory of translated files stored by cache key.
+
+    Total size is kept under max_bytes by removing the least recently
+    used entries, tracked with file modification times so it carries
+    over between runs.
+    """
+
+    __slots__ = ("directory", "max_bytes")
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        """Initialize OutputCache."""
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> str:
+        """Return path of entry for key."""
+        return os.path.join(self.directory, f"{key}{ENTRY_SUFFIX}")
+
+    def get(self, key: str, dest: str | os.PathLike[str]) -> bool:
+        """Copy stored output for key to dest, marking it recently used.
+
+        Return False without touching dest if there is none.
+        """
+        path = self._path(key)
+        # Opened before dest so a missing entry does not touch dest
+        try:
+            source = open(path, "rb")  # noqa: SIM115
+        except FileNotFoundError:
+            return False
+        with source, atomic_file.open_atomic(os.fspath(dest)) as fp:
+            shutil.copyfileobj(source, fp)
+        # Another job may have evicted it since it was opened
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        return True
+
+    def put(self, key: str, source: str | os.PathLike[str]) -> None:
+        """Store file source as output for key, then evict over size limit."""
+        if os.stat(source).st_size > self.max_bytes:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # Written to a temporary file first so other jobs never read a
+        # partial entry
+        with (
+            open(source, "rb") as source_fp,
+            atomic_file.open_atomic(self._path(key)) as fp,
+        ):
+            shutil.copyfileobj(source_fp, fp)
+        self.evict()
+
+    def evict(self) -> int:
+        """Remove least recently used entries until under max_bytes.
+
+        Return number of entries removed.
+        """
+        entries: list[tuple[int, str, int]] = []
+        total = 0
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if not entry.name.endswith(ENTRY_SUFFIX):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, entry.path, stat.st_size))
+                total += stat.st_size
+        removed = 0
+        entries.sort()
+        for _mtime, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            # Another job may have evicted it first
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+            total -= size
+            removed += 1
+        return removed
+
+
+if __name__ == "__main__":
+    print(f"{__title__}\nProgrammed by {__author__}.\n")
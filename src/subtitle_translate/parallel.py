@@ -0,0 +1,164 @@
+"""Parallel - Align subtitle files that are translations of each other."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# Parallel - Align subtitle files that are translations of each other.
+# Copyright (C) 2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Parallel"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+
+from typing import TYPE_CHECKING, Final
+
+from subtitle_translate import normalize, subtitle_parser
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Mapping
+
+    from subtitle_translate.subtitle_parser import Subtitle
+
+# How much of their combined time cues need to share to be aligned
+DEFAULT_MIN_OVERLAP: Final = 0.5
+
+
+def overlap_ratio(first: tuple[int, int], second: tuple[int, int]) -> float:
+    """Return time two ranges share divided by time they cover together."""
+    shared = min(first[1], second[1]) - max(first[0], second[0])
+    covered = max(first[1], second[1]) - min(first[0], second[0])
+    if shared <= 0 or covered <= 0:
+        return 0.0
+    return shared / covered
+
+
+def align_cues(
+    source: Mapping[int, Subtitle],
+    translated: Mapping[int, Subtitle],
+    min_overlap: float = DEFAULT_MIN_OVERLAP,
+) -> Generator[tuple[int, int], None, None]:
+    """Yield ids of source and translated cues showing at the same time.
+
+    Each source cue is paired with the unused translated cue it overlaps
+    the most, if they overlap at least min_overlap.
+    """
+    source_order = sorted(source, key=lambda key: source[key].duration)
+    translated_order = sorted(
+        translated,
+        key=lambda key: translated[key].duration,
+    )
+    used: set[int] = set()
+    # Translated cues before this index end before current source cue
+    first = 0
+    for source_id in source_order:
+        duration = source[source_id].duration
+        while (
+            first < len(translated_order)
+            and translated[translated_order[first]].duration[1] <= duration[0]
+        ):
+            first += 1
+        best_id: int | None = None
+        best_ratio = min_overlap
+        for translated_id in translated_order[first:]:
+            translated_duration = translated[translated_id].duration
+            if translated_duration[0] >= duration[1]:
+                break
+            if translated_id in used:
+                continue
+            ratio = overlap_ratio(duration, translated_duration)
+            if ratio >= best_ratio and (best_id is None or ratio > best_ratio):
+                best_id = translated_id
+                best_ratio = ratio
+        if best_id is not None:
+            used.add(best_id)
+            yield source_id, best_id
+
+
+def aligned_texts(
+    source_subs: Mapping[int, Subtitle],
+    source_texts: Mapping[int, tuple[str, ...]],
+    translated_subs: Mapping[int, Subtitle],
+    translated_texts: Mapping[int, tuple[str, ...]],
+    min_overlap: float = DEFAULT_MIN_OVERLAP,
+) -> Generator[tuple[str, str], None, None]:
+    """Yield text and its translation from aligned cues.
+
+    Cues are only used if they have the same number of text runs. Text
+    is normalized the same way it is before being translated, so it
+    matches what would be looked up.
+    """
+    for source_id, translated_id in align_cues(
+        source_subs,
+        translated_subs,
+        min_overlap,
+    ):
+        runs = source_texts.get(source_id, ())
+        translated_runs = translated_texts.get(translated_id, ())
+        if not runs or len(runs) != len(translated_runs):
+            continue
+        for text, translation in zip(runs, translated_runs, strict=True):
+            core, _decoration = normalize.normalize_text(
+                text.replace("\n", " "),
+            )
+            translated_core, _decoration = normalize.normalize_text(
+                translation.replace("\n", " "),
+            )
+            if core and translated_core:
+                yield core, translated_core
+
+
+def load_subtitles(
+    filepath: str,
+) -> tuple[dict[int, Subtitle], dict[int, tuple[str, ...]]]:
+    """Return subtitles and their text runs from srt or vtt file."""
+    _name, source_type = filepath.rsplit(".", 1)
+    if source_type == "srt":
+        return subtitle_parser.convert_text(
+            subtitle_parser.parse_file_srt(filepath),
+        )
+    if source_type == "vtt":
+        blocks = subtitle_parser.parse_file_vtt(filepath)
+        # First item is the header
+        next(blocks)
+        return subtitle_parser.convert_text_vtt(
+            (index, block)
+            for index, block in enumerate(blocks)
+            if isinstance(block, subtitle_parser.Subtitle)
+        )
+    raise ValueError(f"Unhandled source type {source_type!r}.")
+
+
+def parallel_texts(
+    source_file: str,
+    translated_file: str,
+    min_overlap: float = DEFAULT_MIN_OVERLAP,
+) -> Generator[tuple[str, str], None, None]:
+    """Yield text and its translation from subtitle file and translation."""
+    source_subs, source_texts = load_subtitles(source_file)
+    translated_subs, translated_texts = load_subtitles(translated_file)
+    yield from aligned_texts(
+        source_subs,
+        source_texts,
+        translated_subs,
+        translated_texts,
+        min_overlap,
+    )
+
+
+if __name__ == "__main__":
+    print(f"{__title__}\nProgrammed by {__author__}.\n")
@@ -0,0 +1,184 @@
+"""Sentences - Join sentences split over cues and split them back."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# Sentences - Join sentences split over cues and split them back.
+# Copyright (C) 2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Sentences"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+
+import re
+from typing import TYPE_CHECKING, Final
+
+if TYPE_CHECKING:
+    from collections.abc import Container, Mapping, Sequence
+
+    from subtitle_translate.subtitle_parser import Subtitle
+
+# Subtitle id and position of text run in that subtitle
+Position = tuple[int, int]
+
+# Longest time between cues in milliseconds a sentence can continue over
+DEFAULT_MAX_GAP: Final = 1000
+# Most text runs one sentence is joined from
+DEFAULT_MAX_PARTS: Final = 3
+
+# Text ending a sentence. Trailing ellipses usually mean the sentence
+# goes on in the next cue, so they do not count.
+SENTENCE_END_RE: Final = re.compile(
+    r"(?<!\.\.)[.!?\u3002\uff01\uff1f\u266a][\"'\u201d\u2019)\]]*\s*$",
+)
+# Text starting a new line of dialogue
+DIALOGUE_START_RE: Final = re.compile(r"^\s*[-\u2010\u2013\u2014]")
+
+
+def ends_sentence(text: str) -> bool:
+    """Return if text ends a sentence."""
+    return SENTENCE_END_RE.search(text) is not None
+
+
+def group_sentences(
+    subs: Mapping[int, Subtitle],
+    texts: Mapping[int, tuple[str, ...]],
+    keep: Container[Position] = (),
+    max_gap: int = DEFAULT_MAX_GAP,
+    max_parts: int = DEFAULT_MAX_PARTS,
+) -> list[list[Position]]:
+    """Return text run positions grouped into sentences, in order.
+
+    A sentence goes on from the last text run of a cue to the first
+    text run of the next cue if it does not end with punctuation, the
+    next cue starts at most max_gap milliseconds later and does not
+    start a new line of dialogue. Positions in keep are never joined.
+    Every position is in exactly one group.
+    """
+    groups: list[list[Position]] = []
+    previous_end: int | None = None
+    for subtitle_id in sorted(texts, key=lambda key: subs[key].duration):
+        start, end = subs[subtitle_id].duration
+        runs = texts[subtitle_id]
+        for position, text in enumerate(runs):
+            key = (subtitle_id, position)
+            if (
+                position == 0
+                and groups
+                and previous_end is not None
+                and start - previous_end <= max_gap
+                and len(groups[-1]) < max_parts
+                and key not in keep
+                and groups[-1][-1] not in keep
+                and not DIALOGUE_START_RE.match(text)
+            ):
+                last_id, last_position = groups[-1][-1]
+                last = texts[last_id][last_position]
+                if last_position == len(texts[last_id]) - 1 and not (
+                    ends_sentence(last)
+                ):
+                    groups[-1].append(key)
+                    continue
+            groups.append([key])
+        previous_end = end
+    return groups
+
+
+def split_translation(text: str, weights: Sequence[int]) -> list[str]:
+    """Return text split into one piece for each weight.
+
+    Pieces are about as long compared to each other as their weights,
+    and are split at spaces if there are enough of them.
+    """
+    count = len(weights)
+    if count <= 1:
+        return [text] * count
+    if len(text) < count:
+        # Too short to split, one character for each piece while it lasts
+        return [*text, *([""] * (count - len(text)))]
+    # Places text can be cut, as end of one piece and start of the next
+    cuts = [
+        (index, index + 1) for index, char in enumerate(text) if char == " "
+    ]
+    if len(cuts) < count - 1:
+        cuts = [(index, index) for index in range(1, len(text))]
+    total = sum(weights) or count
+
+    pieces: list[str] = []
+    start = 0
+    first_cut = 0
+    cumulative = 0
+    for piece_index, weight in enumerate(weights[:-1]):
+        cumulative += weight
+        target = len(text) * cumulative / total
+        # Leave enough cuts for the pieces after this one
+        last_cut = len(cuts) - (count - 1 - piece_index)
+        best = min(
+            range(first_cut, last_cut + 1),
+            key=lambda index: abs(cuts[index][0] - target),
+        )
+        end, next_start = cuts[best]
+        pieces.append(text[start:end])
+        start = next_start
+        first_cut = best + 1
+    pieces.append(text[start:])
+    return pieces
+
+
+def join_groups(
+    texts: Mapping[int, tuple[str, ...]],
+    groups: Sequence[Sequence[Position]],
+) -> dict[int, tuple[str, ...]]:
+    """Return text of each group joined with spaces, by group index."""
+    return {
+        index: (
+            " ".join(
+                texts[subtitle_id][position] for subtitle_id, position in group
+            ),
+        )
+        for index, group in enumerate(groups)
+    }
+
+
+def split_groups(
+    texts: Mapping[int, tuple[str, ...]],
+    groups: Sequence[Sequence[Position]],
+    translated: Mapping[int, tuple[str, ...]],
+) -> dict[int, tuple[str, ...]]:
+    """Return translated text runs from translations of joined groups.
+
+    Translation of a group is split over its text runs by how long the
+    original text runs are.
+    """
+    new_runs = {subtitle_id: list(runs) for subtitle_id, runs in texts.items()}
+    for index, group in enumerate(groups):
+        (translation,) = translated[index]
+        pieces = split_translation(
+            translation,
+            [
+                len(texts[subtitle_id][position])
+                for subtitle_id, position in group
+            ],
+        )
+        for (subtitle_id, position), piece in zip(group, pieces, strict=True):
+            new_runs[subtitle_id][position] = piece
+    return {subtitle_id: tuple(runs) for subtitle_id, runs in new_runs.items()}
+
+
+if __name__ == "__main__":
+    print(f"{__title__}\nProgrammed by {__author__}.\n")
@@ -26,13 +26,28 @@ __version__ = "0.0.0"
 __license__ = "GNU General Public License Version 3"
 
 
-from typing import IO, TYPE_CHECKING, Final, NamedTuple
-
+import codecs
+import itertools
+import re
+from abc import ABC, abstractmethod
+from contextlib import AsyncExitStack, contextmanager
+from html import escape as escape_html, unescape as unescape_html
+from io import StringIO, TextIOWrapper
+from typing import IO, TYPE_CHECKING, Final, Generic, NamedTuple, TypeVar
+
+import trio
 from bs4 import BeautifulSoup
 from bs4.element import Tag
 
+from subtitle_translate import atomic_file
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore[assignment,unused-ignore]
+
 if TYPE_CHECKING:
-    from collections.abc import Generator, Iterable
+    from collections.abc import Generator, Iterable, Sequence
 
 
 # Default text tags
@@ -61,11 +76,39 @@ TEXT_TAGS: Final = (
 )
 
 
+T = TypeVar("T")
+
+# Characters of output to collect before writing to file
+DEFAULT_BUFFER_SIZE: Final = 1 << 16
+
+# Zero padded lookup tables for timestamp formatting
+_PAD_2: Final = tuple(f"{i:02}" for i in range(100))
+_PAD_3: Final = tuple(f"{i:03}" for i in range(1000))
+
+# WebVTT blocks that are not cues
+VTT_BLOCK_KINDS: Final = ("NOTE", "STYLE", "REGION")
+
+# Splits cue text into text runs (even indexes) and tags (odd indexes)
+MARKUP_SPLIT_RE: Final = re.compile(r"(<[^>]*>)")
+
+
 class Subtitle(NamedTuple):
-    """Subtitle object."""
+    """Subtitle object.
+
+    Identifier and settings are only used by WebVTT cues.
+    """
 
     duration: tuple[int, int]
     html: str
+    identifier: str = ""
+    settings: str = ""
+
+
+class VTTBlock(NamedTuple):
+    """WebVTT block that is not a cue, such as a NOTE, STYLE, or REGION."""
+
+    kind: str
+    text: str
 
 
 def parse_timestamp_srt(timestamp: str) -> int:
@@ -80,7 +123,12 @@ def parse_timestamp_srt(timestamp: str) -> int:
 
 
 def parse_timestamp_vtt(timestamp: str) -> int:
-    """Parse timestamp. Return milliseconds."""
+    """Parse timestamp. Return milliseconds.
+
+    Hours are optional in WebVTT timestamps.
+    """
+    if timestamp.count(":") == 1:
+        timestamp = f"00:{timestamp}"
     return parse_timestamp_srt(timestamp.replace(".", ",", 1))
 
 
@@ -89,6 +137,8 @@ def time_to_timestamp_srt(time_: int) -> str:
     h, time_ = divmod(time_, 3600000)
     m, time_ = divmod(time_, 60000)
     s, ms = divmod(time_, 1000)
+    if 0 <= h < 100:
+        return f"{_PAD_2[h]}:{_PAD_2[m]}:{_PAD_2[s]},{_PAD_3[ms]}"
     return f"{h:02}:{m:02}:{s:02},{ms:03}"
 
 
@@ -104,9 +154,80 @@ def parse_time_fragment_srt(time_fragment: str) -> tuple[int, int]:
 
 
 def parse_time_fragment_vtt(time_fragment: str) -> tuple[int, int]:
-    """Parse time fragment."""
-    raw_start, raw_end = time_fragment.split(" --> ", 1)
-    return parse_timestamp_vtt(raw_start), parse_timestamp_vtt(raw_end)
+    """Parse time fragment. Cue settings after the end time are ignored."""
+    return parse_cue_timing_vtt(time_fragment)[0]
+
+
+def parse_cue_timing_vtt(timing_line: str) -> tuple[tuple[int, int], str]:
+    """Parse cue timing line. Return duration and cue settings."""
+    raw_start, raw_rest = timing_line.split("-->", 1)
+    raw_end, *settings = raw_rest.split(None, 1)
+    duration = (
+        parse_timestamp_vtt(raw_start.strip()),
+        parse_timestamp_vtt(
+            raw_end,
+        ),
+    )
+    return duration, "".join(settings).strip()
+
+
+def format_timestamps(
+    times: Sequence[int],
+    decimal: str = ",",
+    use_numpy: bool = True,
+) -> list[str]:
+    """Return timestamps for all given times.
+
+    Decimal should be "," for SRT and "." for VTT.
+    """
+    parts: Iterable[tuple[int, int, int, int]]
+    if use_numpy and np is not None and len(times):
+        array = np.asarray(times, dtype=np.int64)
+        hours, rest = np.divmod(array, 3600000)
+        minutes, rest = np.divmod(rest, 60000)
+        seconds, millis = np.divmod(rest, 1000)
+        parts = zip(
+            hours.tolist(),
+            minutes.tolist(),
+            seconds.tolist(),
+            millis.tolist(),
+            strict=True,
+        )
+    else:
+        parts = (
+            (
+                time_ // 3600000,
+                time_ // 60000 % 60,
+                time_ // 1000 % 60,
+                time_ % 1000,
+            )
+            for time_ in times
+        )
+    pad_2 = _PAD_2
+    pad_3 = _PAD_3
+    return [
+        f"{pad_2[h]}:{pad_2[m]}:{pad_2[s]}{decimal}{pad_3[ms]}"
+        if 0 <= h < 100
+        else f"{h:02}:{m:02}:{s:02}{decimal}{ms:03}"
+        for h, m, s, ms in parts
+    ]
+
+
+def format_time_fragments(
+    durations: Iterable[tuple[int, int]],
+    decimal: str = ",",
+    use_numpy: bool = True,
+) -> list[str]:
+    """Return time fragments for all given durations.
+
+    Decimal should be "," for SRT and "." for VTT.
+    """
+    times = [time_ for duration in durations for time_ in duration]
+    stamps = format_timestamps(times, decimal, use_numpy)
+    return [
+        f"{start} --> {end}"
+        for start, end in zip(stamps[::2], stamps[1::2], strict=True)
+    ]
 
 
 def duration_to_srt_fragment(duration: tuple[int, int]) -> str:
@@ -125,31 +246,181 @@ def duration_to_vtt_fragment(duration: tuple[int, int]) -> str:
     return f"{start_str} --> {end_str}"
 
 
+class PushParser(ABC, Generic[T]):
+    """Incremental push parser for subtitle byte streams.
+
+    Feed bytes as they arrive and get back items as soon as they are
+    complete. Chunks may split lines or UTF-8 sequences anywhere.
+    """
+
+    __slots__ = ("_decoder", "_partial")
+
+    def __init__(self, encoding: str = "utf-8") -> None:
+        """Initialize parser."""
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._partial = ""
+
+    @abstractmethod
+    def feed_line(self, line: str) -> T | None:
+        """Handle one line of text. Return item if one is complete."""
+
+    @abstractmethod
+    def finish(self) -> T | None:
+        """Handle end of input. Return last item if one is pending."""
+
+    def _feed_text(self, text: str) -> list[T]:
+        """Handle decoded text. Return completed items."""
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        items: list[T] = []
+        for line in lines:
+            item = self.feed_line(line)
+            if item is not None:
+                items.append(item)
+        return items
+
+    def feed(self, data: bytes) -> list[T]:
+        """Feed data to parser. Return items completed by this data."""
+        return self._feed_text(self._decoder.decode(data))
+
+    def close(self) -> list[T]:
+        """Signal end of stream. Return any remaining items."""
+        items = self._feed_text(self._decoder.decode(b"", final=True))
+        if self._partial:
+            item = self.feed_line(self._partial)
+            self._partial = ""
+            if item is not None:
+                items.append(item)
+        item = self.finish()
+        if item is not None:
+            items.append(item)
+        return items
+
+
+class SRTPushParser(PushParser[tuple[int, Subtitle]]):
+    """Push parser yielding subtitle id and subtitle pairs from SRT data."""
+
+    __slots__ = ("html", "id_", "mode", "time_fragment")
+
+    def __init__(self, encoding: str = "utf-8") -> None:
+        """Initialize parser."""
+        super().__init__(encoding)
+        self.mode = 0
+        self.id_ = 0
+        self.time_fragment: tuple[int, int] = (0, 0)
+        self.html: list[str] = []
+
+    def feed_line(self, line: str) -> tuple[int, Subtitle] | None:
+        """Handle one line of text. Return item if one is complete."""
+        line = line.strip()
+        if self.mode == 0:  # Read id number
+            self.id_ = int(line)
+            self.mode += 1
+        elif self.mode == 1:  # Read duration
+            self.time_fragment = parse_time_fragment_srt(line)
+            self.mode += 1
+        elif line:  # Read HTML until blank line
+            self.html.append(line)
+        else:  # Hit blank line
+            self.mode = 0
+            html = "\n".join(self.html)
+            self.html.clear()
+            return self.id_, Subtitle(self.time_fragment, html)
+        return None
+
+    def finish(self) -> None:
+        """Handle end of input."""
+        assert not self.html, "Missing newline after subtitle HTML"
+
+
+class VTTPushParser(PushParser["list[str] | Subtitle | VTTBlock"]):
+    """Push parser yielding header, then cues and other blocks from VTT data.
+
+    If read_header is False, data must start after the header.
+    """
+
+    __slots__ = ("lines", "read_header")
+
+    def __init__(
+        self,
+        encoding: str = "utf-8",
+        read_header: bool = True,
+    ) -> None:
+        """Initialize parser."""
+        super().__init__(encoding)
+        self.read_header = read_header
+        self.lines: list[str] = []
+
+    def _pop_block(self) -> list[str] | Subtitle | VTTBlock:
+        """Return pending lines as header or block."""
+        lines = self.lines
+        self.lines = []
+        if self.read_header:
+            self.read_header = False
+            return [line.strip() for line in lines]
+        return _read_block_vtt(lines)
+
+    def feed_line(self, line: str) -> list[str] | Subtitle | VTTBlock | None:
+        """Handle one line of text. Return item if one is complete."""
+        line = line.rstrip()
+        if line.strip():
+            self.lines.append(line)
+        elif self.lines or self.read_header:  # Hit blank line
+            return self._pop_block()
+        return None
+
+    def finish(self) -> list[str] | Subtitle | VTTBlock | None:
+        """Handle end of input. Return last item if one is pending."""
+        if self.lines or self.read_header:
+            return self._pop_block()
+        return None
+
+
 def parse_subtitle_text_srt(
     file: IO[str],
 ) -> Generator[tuple[int, Subtitle], None, None]:
     """Yield subtitle id and subtitles from file."""
-    mode = 0
-    id_: int = 0
-    time_fragment: tuple[int, int] = (0, 0)
-    html: str = ""
+    parser = SRTPushParser()
     for line in file:
-        line = line.strip()
-        if mode == 0:  # Read id number
-            id_ = int(line)
-            mode += 1
-        elif mode == 1:  # Read duration
-            raw_time_fragment = line
-            time_fragment = parse_time_fragment_srt(raw_time_fragment)
-            mode += 1
-        elif mode == 2:  # Read HTML until blank line
-            if line:
-                html += f"{line}\n"
-            else:  # Hit blank line
-                mode = 0
-                yield id_, Subtitle(time_fragment, html[:-1])
-                html = ""
-    assert not html, "Missing newline after subtitle HTML"
+        item = parser.feed_line(line)
+        if item is not None:
+            yield item
+    parser.finish()
+
+
+def _read_block_vtt(lines: list[str]) -> Subtitle | VTTBlock:
+    """Return cue or other block from lines of a WebVTT block."""
+    first = lines[0]
+    keyword = first.split(None, 1)[0]
+    if keyword in VTT_BLOCK_KINDS:
+        return VTTBlock(keyword, "\n".join(lines))
+    identifier = ""
+    if "-->" not in first:
+        identifier, *lines = lines
+    if not lines or "-->" not in lines[0]:
+        # Not a cue, keep it as is
+        return VTTBlock("", "\n".join((identifier, *lines)))
+    duration, settings = parse_cue_timing_vtt(lines[0])
+    return Subtitle(duration, "\n".join(lines[1:]), identifier, settings)
+
+
+def parse_subtitle_blocks_vtt(
+    file: Iterable[str],
+) -> Generator[Subtitle | VTTBlock, None, None]:
+    """Yield cues and other blocks from vtt file in order.
+
+    File must already have parsed header information.
+    """
+    parser = VTTPushParser(read_header=False)
+    for line in file:
+        item = parser.feed_line(line)
+        if item is not None:
+            assert not isinstance(item, list)
+            yield item
+    item = parser.finish()
+    if item is not None:
+        assert not isinstance(item, list)
+        yield item
 
 
 def parse_subtitle_text_vtt(
@@ -158,42 +429,125 @@ def parse_subtitle_text_vtt(
     """Yield subtitles from vtt file.
 
     File must already have parsed header information.
+    Blocks that are not cues are skipped.
     """
-    mode = 0
-    time_fragment: tuple[int, int] = (0, 0)
-    html: str = ""
-    for line in file:
-        line = line.strip()
-        if mode == 0:  # Read duration
-            raw_time_fragment = line
-            time_fragment = parse_time_fragment_vtt(raw_time_fragment)
-            mode += 1
-        elif mode == 1:  # Read HTML until blank line
-            if line:
-                html += f"{line}\n"
-            else:  # Hit blank line
-                mode = 0
-                yield Subtitle(time_fragment, html[:-1])
-                html = ""
-    assert not html, "Missing newline after subtitle content"
-
-
-def write_subtitles_srt(file: IO[str], subs_map: dict[int, Subtitle]) -> None:
+    for block in parse_subtitle_blocks_vtt(file):
+        if isinstance(block, Subtitle):
+            yield block
+
+
+def iter_subtitles_srt(
+    subs_map: dict[int, Subtitle],
+) -> Generator[str, None, None]:
+    """Yield text for each subtitle in SRT format."""
+    fragments = format_time_fragments(
+        (subtitle.duration for subtitle in subs_map.values()),
+        ",",
+    )
+    for (subtitle_id, subtitle), fragment in zip(
+        subs_map.items(),
+        fragments,
+        strict=True,
+    ):
+        yield f"{subtitle_id}\n{fragment}\n{subtitle.html}\n\n"
+
+
+def iter_subtitles_vtt(
+    subs: Iterable[Subtitle | VTTBlock],
+) -> Generator[str, None, None]:
+    """Yield text for each cue or other block in VTT format."""
+    subs = tuple(subs)
+    fragments = iter(
+        format_time_fragments(
+            (
+                subtitle.duration
+                for subtitle in subs
+                if isinstance(subtitle, Subtitle)
+            ),
+            ".",
+        ),
+    )
+    for subtitle in subs:
+        if isinstance(subtitle, VTTBlock):
+            yield f"{subtitle.text}\n\n"
+            continue
+        fragment = next(fragments)
+        if subtitle.identifier:
+            fragment = f"{subtitle.identifier}\n{fragment}"
+        if subtitle.settings:
+            fragment = f"{fragment} {subtitle.settings}"
+        yield f"{fragment}\n{subtitle.html}\n\n"
+
+
+def join_chunks(
+    chunks: Iterable[str],
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> Generator[str, None, None]:
+    """Yield chunks joined together until buffer_size is reached."""
+    buffer: list[str] = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            yield "".join(buffer)
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def write_chunks(
+    file: IO[str],
+    chunks: Iterable[str],
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> None:
+    """Write chunks to file, joining them until buffer_size is reached."""
+    for block in join_chunks(chunks, buffer_size):
+        file.write(block)
+
+
+def write_subtitles_srt(
+    file: IO[str],
+    subs_map: dict[int, Subtitle],
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> None:
     """Write subtitles to file."""
-    for subtitle_id, subtitle in subs_map.items():
-        file.write(f"{subtitle_id}\n")
-        file.write(f"{duration_to_srt_fragment(subtitle.duration)}\n")
-        file.write(f"{subtitle.html}\n\n")
+    write_chunks(file, iter_subtitles_srt(subs_map), buffer_size)
 
 
-def write_subtitles_vtt(file: IO[str], subs: Iterable[Subtitle]) -> None:
+def write_subtitles_vtt(
+    file: IO[str],
+    subs: Iterable[Subtitle | VTTBlock],
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> None:
     """Write subtitles to file.
 
     Does not handle writing file header.
     """
-    for subtitle in subs:
-        file.write(f"{duration_to_vtt_fragment(subtitle.duration)}\n")
-        file.write(f"{subtitle.html}\n\n")
+    write_chunks(file, iter_subtitles_vtt(subs), buffer_size)
+
+
+@contextmanager
+def open_output(
+    filepath: str,
+    atomic: bool = False,
+) -> Generator[IO[str], None, None]:
+    """Open filepath for writing text.
+
+    If atomic, write to a temporary file in the same directory and
+    rename it over filepath once writing succeeds, so readers never
+    see a partially written file.
+    """
+    if not atomic:
+        with open(filepath, "w", encoding="utf-8") as fp:
+            yield fp
+        return
+    with (
+        atomic_file.open_atomic(filepath) as raw,
+        TextIOWrapper(raw, encoding="utf-8") as fp,
+    ):
+        yield fp
 
 
 def parse_file_srt(
@@ -204,36 +558,135 @@ def parse_file_srt(
         yield from parse_subtitle_text_srt(fp)
 
 
+def read_header_vtt(file: IO[str]) -> list[str]:
+    """Read and return header lines of vtt file, up to first blank line."""
+    header: list[str] = []
+    for line in file:
+        stripped = line.strip()
+        if not stripped:
+            break
+        header.append(stripped)
+    return header
+
+
 def parse_file_vtt(
     filepath: str,
-) -> Generator[list[str] | Subtitle, None, None]:
-    """Yield file header, then subtitle id and subtitle from given filepath."""
+) -> Generator[list[str] | Subtitle | VTTBlock, None, None]:
+    """Yield file header, then cues and other blocks from given filepath."""
     with open(filepath, encoding="utf-8") as fp:
-        header: list[str] = []
-        for line in fp:
-            stripped = line.strip()
-            if not stripped:
-                break
-            header.append(stripped)
-        yield header
-        yield from parse_subtitle_text_vtt(fp)
+        yield read_header_vtt(fp)
+        yield from parse_subtitle_blocks_vtt(fp)
 
 
-def write_subtitles_srt_file(filepath: str, subs: dict[int, Subtitle]) -> None:
+def write_subtitles_srt_file(
+    filepath: str,
+    subs: dict[int, Subtitle],
+    atomic: bool = False,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> None:
     """Write subs to given filepath."""
-    with open(filepath, "w", encoding="utf-8") as fp:
-        write_subtitles_srt(fp, subs)
+    with open_output(filepath, atomic) as fp:
+        write_subtitles_srt(fp, subs, buffer_size)
 
 
 def write_subtitles_vtt_file(
     filepath: str,
     header: Iterable[str],
-    subs: Iterable[Subtitle],
+    subs: Iterable[Subtitle | VTTBlock],
+    atomic: bool = False,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
 ) -> None:
     """Write subs to given filepath."""
-    with open(filepath, "w", encoding="utf-8") as fp:
-        fp.write("\n".join(header) + "\n\n")
-        write_subtitles_vtt(fp, subs)
+    with open_output(filepath, atomic) as fp:
+        write_chunks(
+            fp,
+            itertools.chain(
+                ("\n".join(header) + "\n\n",),
+                iter_subtitles_vtt(subs),
+            ),
+            buffer_size,
+        )
+
+
+async def read_text_async(filepath: str) -> str:
+    """Return text contents of filepath without blocking the event loop."""
+    async with await trio.open_file(filepath, encoding="utf-8") as fp:
+        text = await fp.read()
+    assert isinstance(text, str)
+    return text
+
+
+async def parse_file_srt_async(
+    filepath: str,
+) -> list[tuple[int, Subtitle]]:
+    """Return subtitle ids and subtitles from given filepath."""
+    text = await read_text_async(filepath)
+    return list(parse_subtitle_text_srt(StringIO(text)))
+
+
+async def parse_file_vtt_async(
+    filepath: str,
+) -> tuple[list[str], list[Subtitle | VTTBlock]]:
+    """Return file header and cues and other blocks from given filepath."""
+    file = StringIO(await read_text_async(filepath))
+    header = read_header_vtt(file)
+    return header, list(parse_subtitle_blocks_vtt(file))
+
+
+async def write_chunks_file_async(
+    filepath: str,
+    chunks: Iterable[str],
+    atomic: bool = False,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> None:
+    """Write chunks to filepath without blocking the event loop.
+
+    If atomic, write to a temporary file in the same directory and
+    rename it over filepath once writing succeeds.
+    """
+    async with AsyncExitStack() as stack:
+        target = filepath
+        if atomic:
+            target = await stack.enter_async_context(
+                atomic_file.temp_path_async(filepath),
+            )
+        async with await trio.open_file(target, "w", encoding="utf-8") as fp:
+            for block in join_chunks(chunks, buffer_size):
+                await fp.write(block)
+
+
+async def write_subtitles_srt_file_async(
+    filepath: str,
+    subs: dict[int, Subtitle],
+    atomic: bool = False,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> None:
+    """Write subs to given filepath without blocking the event loop."""
+    await write_chunks_file_async(
+        filepath,
+        iter_subtitles_srt(subs),
+        atomic,
+        buffer_size,
+    )
+
+
+async def write_subtitles_vtt_file_async(
+    filepath: str,
+    header: Iterable[str],
+    subs: Iterable[Subtitle | VTTBlock],
+    atomic: bool = False,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> None:
+    """Write subs to given filepath without blocking the event loop."""
+    await write_chunks_file_async(
+        filepath,
+        itertools.chain(
+            ("\n".join(header) + "\n\n",),
+            iter_subtitles_vtt(subs),
+        ),
+        atomic,
+        buffer_size,
+    )
 
 
 def convert_text(
@@ -298,6 +751,65 @@ def modify_subtitles(
     return subs
 
 
+def extract_text_runs(html: str) -> tuple[str, ...]:
+    """Return text between markup tags, with entities unescaped.
+
+    Works for WebVTT cue text, where tags like `<v Speaker>`, `<c.class>`,
+    and `<00:00:01.000>` are not valid HTML.
+    """
+    parts = MARKUP_SPLIT_RE.split(html)
+    return tuple(
+        unescape_html(part).strip() for part in parts[::2] if part.strip()
+    )
+
+
+def replace_text_runs(html: str, new_texts: Iterable[str]) -> str:
+    """Return html with text runs replaced by new texts. Tags are kept.
+
+    Whitespace around each run is kept as well.
+    """
+    parts = MARKUP_SPLIT_RE.split(html)
+    new_iter = iter(new_texts)
+    for index in range(0, len(parts), 2):
+        part = parts[index]
+        core = part.strip()
+        if not core:
+            continue
+        start = len(part) - len(part.lstrip())
+        end = start + len(core)
+        new_text = escape_html(next(new_iter), quote=False)
+        parts[index] = f"{part[:start]}{new_text}{part[end:]}"
+    return "".join(parts)
+
+
+def convert_text_vtt(
+    gen: Iterable[tuple[int, Subtitle]],
+) -> tuple[dict[int, Subtitle], dict[int, tuple[str, ...]]]:
+    """Read WebVTT cue generator and return subs dictionary and text data."""
+    subs: dict[int, Subtitle] = {}
+    texts: dict[int, tuple[str, ...]] = {}
+    for subtitle_id, subtitle in gen:
+        text = extract_text_runs(subtitle.html)
+        # Only save if useful
+        if text:
+            texts[subtitle_id] = text
+        subs[subtitle_id] = subtitle
+    return subs, texts
+
+
+def modify_subtitles_vtt(
+    subs: dict[int, Subtitle],
+    new_texts: dict[int, tuple[str, ...]],
+) -> dict[int, Subtitle]:
+    """Rewrite WebVTT cue text to use new text. Runs MUST match."""
+    for subtitle_id, new_text_data in new_texts.items():
+        subtitle = subs[subtitle_id]
+        subs[subtitle_id] = subtitle._replace(
+            html=replace_text_runs(subtitle.html, new_text_data),
+        )
+    return subs
+
+
 def modify_subtitles_plain(
     subs: dict[int, Subtitle],
     new_texts: dict[int, tuple[str, ...]],
@@ -316,8 +828,6 @@ def modify_subtitles_plain(
 def run() -> None:
     """Run program."""
     # subs_gen = parse_file_srt("<filename>.srt")
-    from io import StringIO
-
     ##    file = StringIO(
     ##        """1
     ##00:00:00,000 --> 24:00:00,000
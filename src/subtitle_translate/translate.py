@@ -36,12 +36,17 @@ import trio
 from subtitle_translate import agents
 
 if TYPE_CHECKING:
-    from collections.abc import Awaitable, Sequence
+    from collections.abc import Awaitable, Callable, Iterable, Sequence
+
+    from subtitle_translate.translation_cache import TranslationCache
 
 TIMEOUT: Final[int] = 4
 AGENT = random.randint(0, 100000)  # noqa: S311
+# Default number of requests allowed in flight at once
+MAX_IN_FLIGHT: Final[int] = 128
 
 T = TypeVar("T")
+K = TypeVar("K")
 
 
 async def gather(*tasks: partial[Awaitable[T]]) -> list[T]:
@@ -232,22 +237,112 @@ async def get_translated_coroutine(
         headers["User-Agent"] = agents.USER_AGENTS[AGENT]
 
 
+async def get_translated_cached(
+    client: httpx.AsyncClient,
+    sentence: str,
+    to_lang: str,
+    source_lang: str = "auto",
+    cache: TranslationCache | None = None,
+) -> str:
+    """Return the sentence translated, from cache if it is there.
+
+    If cache does fuzzy matching, translation of a similar enough
+    sentence is used too.
+    """
+    if cache is None:
+        return await get_translated_coroutine(
+            client,
+            sentence,
+            to_lang,
+            source_lang,
+        )
+    translated = cache.get(source_lang, to_lang, sentence)
+    if translated is None:
+        fuzzy = cache.get_fuzzy(source_lang, to_lang, sentence)
+        if fuzzy is not None:
+            return fuzzy[0]
+        translated = await get_translated_coroutine(
+            client,
+            sentence,
+            to_lang,
+            source_lang,
+        )
+        cache.put(source_lang, to_lang, sentence, translated)
+    return translated
+
+
 async def translate_async(
     client: httpx.AsyncClient,
     sentences: Sequence[str],
     to_lang: str,
     source_lang: str,
+    cache: TranslationCache | None = None,
+    max_in_flight: int = MAX_IN_FLIGHT,
 ) -> list[str]:
-    """Translate multiple sentences asynchronously."""
+    """Translate multiple sentences asynchronously.
+
+    At most max_in_flight requests run at once.
+    """
+    limiter = trio.CapacityLimiter(max_in_flight)
+
+    async def translate_one(sentence: str) -> str:
+        async with limiter:
+            return await get_translated_cached(
+                client,
+                sentence,
+                to_lang,
+                source_lang,
+                cache,
+            )
+
     coros = cast(
         "list[partial[Awaitable[str]]]",
-        [
-            partial(get_translated_coroutine, client, q, to_lang, source_lang)
-            for q in sentences
-        ],
+        [partial(translate_one, q) for q in sentences],
     )
     return await gather(*coros)
 
 
+async def translate_stream_async(
+    client: httpx.AsyncClient,
+    items: Iterable[tuple[K, str]],
+    to_lang: str,
+    source_lang: str,
+    callback: Callable[[K, str], object],
+    max_in_flight: int = MAX_IN_FLIGHT,
+    cache: TranslationCache | None = None,
+) -> int:
+    """Translate key and sentence pairs while items is still producing them.
+
+    Call callback with key and translated sentence as each one finishes,
+    in whatever order they finish. At most max_in_flight requests run at
+    once, and items is only read when there is room for another request.
+    Return number of sentences translated.
+    """
+    limiter = trio.Semaphore(max_in_flight)
+
+    async def translate_item(key: K, sentence: str) -> None:
+        try:
+            callback(
+                key,
+                await get_translated_cached(
+                    client,
+                    sentence,
+                    to_lang,
+                    source_lang,
+                    cache,
+                ),
+            )
+        finally:
+            limiter.release()
+
+    count = 0
+    async with trio.open_nursery() as nursery:
+        for key, sentence in items:
+            await limiter.acquire()
+            nursery.start_soon(translate_item, key, sentence)
+            count += 1
+    return count
+
+
 if __name__ == "__main__":
     print(f"{__title__} \nProgrammed by {__author__}.")
@@ -0,0 +1,276 @@
+"""Translation Cache - Remember translations of sentences in memory."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# Translation Cache - Remember translations of sentences in memory.
+# Copyright (C) 2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Translation Cache"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Final, NamedTuple
+
+from subtitle_translate.fuzzy import NGramIndex, same_words
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator
+
+    from subtitle_translate.fuzzy import FuzzyMatch
+
+DEFAULT_MAX_ENTRIES: Final = 100_000
+DEFAULT_MAX_BYTES: Final = 64 << 20
+
+# Source language, destination language and sentence
+CacheKey = tuple[str, str, str]
+
+
+class _Entry(NamedTuple):
+    """Cached translation."""
+
+    translated: str
+    size: int
+    expires: float | None
+    trusted: bool = False
+
+
+class CacheStats(NamedTuple):
+    """Counters of how a TranslationCache has been used."""
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+    fuzzy_hits: int = 0
+    # Average similarity of fuzzy hits
+    fuzzy_similarity: float = 0.0
+
+
+def entry_size(key: CacheKey, translated: str) -> int:
+    """Return number of bytes an entry is counted as."""
+    return sum(len(part.encode("utf-8")) for part in (*key, translated))
+
+
+class TranslationCache:
+    """Bounded in memory cache of translated sentences.
+
+    Least recently used entries are evicted once there are more than
+    max_entries entries or they take more than max_bytes, and entries
+    expire ttl seconds after they were stored. Any limit can be None
+    to turn it off.
+    If fuzzy_threshold is given, sentences are also indexed by n-grams
+    so get_fuzzy can find translations of similar sentences.
+    Trusted entries, such as human translations, never expire and are
+    not replaced by entries that are not trusted.
+    """
+
+    __slots__ = (
+        "_clock",
+        "_entries",
+        "_fuzzy_similarity",
+        "_indexes",
+        "_size",
+        "evictions",
+        "fuzzy_hits",
+        "fuzzy_threshold",
+        "hits",
+        "max_bytes",
+        "max_entries",
+        "misses",
+        "ttl",
+    )
+
+    def __init__(
+        self,
+        max_entries: int | None = DEFAULT_MAX_ENTRIES,
+        max_bytes: int | None = DEFAULT_MAX_BYTES,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        fuzzy_threshold: float | None = None,
+    ) -> None:
+        """Initialize TranslationCache."""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.fuzzy_threshold = fuzzy_threshold
+        self._clock = clock
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+        # Language pair to index of sentences, if fuzzy matching
+        self._indexes: dict[tuple[str, str], NGramIndex] = {}
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.fuzzy_hits = 0
+        self._fuzzy_similarity = 0.0
+
+    def __len__(self) -> int:
+        """Return number of entries."""
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Number of bytes entries are counted as."""
+        return self._size
+
+    @property
+    def stats(self) -> CacheStats:
+        """Counters of how cache has been used."""
+        return CacheStats(
+            self.hits,
+            self.misses,
+            self.evictions,
+            len(self._entries),
+            self._size,
+            self.fuzzy_hits,
+            self._fuzzy_similarity / self.fuzzy_hits
+            if self.fuzzy_hits
+            else 0.0,
+        )
+
+    def _remove(self, key: CacheKey) -> None:
+        """Remove entry for key, counting it as evicted."""
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+        self.evictions += 1
+        self._unindex(key)
+
+    def _unindex(self, key: CacheKey) -> None:
+        """Remove sentence of key from fuzzy index."""
+        source_lang, to_lang, sentence = key
+        index = self._indexes.get((source_lang, to_lang))
+        if index is not None:
+            index.discard(sentence)
+
+    def _expired(self, entry: _Entry) -> bool:
+        """Return if entry has expired."""
+        return entry.expires is not None and entry.expires <= self._clock()
+
+    def get(self, source_lang: str, to_lang: str, sentence: str) -> str | None:
+        """Return cached translation of sentence or None."""
+        key = (source_lang, to_lang, sentence)
+        entry = self._entries.get(key)
+        if entry is None or self._expired(entry):
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.translated
+
+    def put(
+        self,
+        source_lang: str,
+        to_lang: str,
+        sentence: str,
+        translated: str,
+        trusted: bool = False,
+    ) -> None:
+        """Store translation of sentence, evicting entries over limits."""
+        key = (source_lang, to_lang, sentence)
+        old = self._entries.get(key)
+        if old is not None:
+            if old.trusted and not trusted:
+                return
+            self._size -= self._entries.pop(key).size
+        size = entry_size(key, translated)
+        if self.max_bytes is not None and size > self.max_bytes:
+            self._unindex(key)
+            return
+        expires = None
+        if self.ttl is not None and not trusted:
+            expires = self._clock() + self.ttl
+        self._entries[key] = _Entry(translated, size, expires, trusted)
+        self._size += size
+        if self.fuzzy_threshold is not None:
+            self._indexes.setdefault((source_lang, to_lang), NGramIndex()).add(
+                sentence,
+            )
+        self._enforce_limits()
+
+    def get_fuzzy(
+        self,
+        source_lang: str,
+        to_lang: str,
+        sentence: str,
+    ) -> tuple[str, FuzzyMatch] | None:
+        """Return translation of most similar cached sentence and match.
+
+        Sentences need to be at least fuzzy_threshold similar, and only
+        differ in punctuation, spacing or case. Return None if fuzzy
+        matching is off or no sentence is similar enough.
+        """
+        index = self._indexes.get((source_lang, to_lang))
+        if self.fuzzy_threshold is None or index is None:
+            return None
+        match = index.best_match(sentence, self.fuzzy_threshold)
+        if match is None:
+            return None
+        key = (source_lang, to_lang, match.text)
+        entry = self._entries[key]
+        if self._expired(entry):
+            self._remove(key)
+            # Next best match may still be fresh
+            return self.get_fuzzy(source_lang, to_lang, sentence)
+        if not same_words(sentence, match.text):
+            return None
+        self._entries.move_to_end(key)
+        self.fuzzy_hits += 1
+        self._fuzzy_similarity += match.similarity
+        return entry.translated, match
+
+    def _enforce_limits(self) -> None:
+        """Evict least recently used entries until within limits."""
+        while self._entries and (
+            (self.max_entries is not None and len(self) > self.max_entries)
+            or (self.max_bytes is not None and self._size > self.max_bytes)
+        ):
+            self._remove(next(iter(self._entries)))
+
+    def items(self) -> Generator[tuple[CacheKey, str, bool], None, None]:
+        """Yield keys, translations and if trusted, if not expired.
+
+        Least recently used entries come first. Counters are not changed.
+        """
+        for key, entry in list(self._entries.items()):
+            if not self._expired(entry):
+                yield key, entry.translated, entry.trusted
+
+    def expire(self) -> int:
+        """Remove expired entries. Return number of entries removed."""
+        expired = [
+            key for key, entry in self._entries.items() if self._expired(entry)
+        ]
+        for key in expired:
+            self._remove(key)
+        return len(expired)
+
+    def clear(self) -> None:
+        """Remove all entries, keeping counters."""
+        self._entries.clear()
+        self._indexes.clear()
+        self._size = 0
+
+
+if __name__ == "__main__":
+    print(f"{__title__}\nProgrammed by {__author__}.\n")
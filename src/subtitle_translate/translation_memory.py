@@ -0,0 +1,326 @@
+"""Translation Memory - Share translated sentences between machines."""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# Translation Memory - Share translated sentences between machines.
+# Copyright (C) 2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__title__ = "Translation Memory"
+__author__ = "CoolCat467"
+__license__ = "GNU General Public License Version 3"
+
+
+import argparse
+import gzip
+import hashlib
+import os
+from typing import TYPE_CHECKING, NamedTuple
+
+import orjson
+
+from subtitle_translate import atomic_file, parallel
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+
+    from subtitle_translate.translation_cache import TranslationCache
+
+# Memory files are gzip compressed JSON Lines, one entry per line like
+# {"src": "fr", "dst": "en", "hash": "...", "text": "...", "translation": "..."}
+# with "trusted": true added for translations made by people.
+# Appending writes a new gzip member, which readers see as more lines.
+
+
+def text_hash(text: str) -> str:
+    """Return hex digest identifying text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class MemoryEntry(NamedTuple):
+    """Translation of text from one language to another."""
+
+    source_lang: str
+    dest_lang: str
+    text: str
+    translation: str
+    trusted: bool = False
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        """Language pair and hash of text, which entries are unique by."""
+        return (self.source_lang, self.dest_lang, text_hash(self.text))
+
+    def dump(self) -> bytes:
+        """Return entry as one JSON line."""
+        data: dict[str, str | bool] = {
+            "src": self.source_lang,
+            "dst": self.dest_lang,
+            "hash": text_hash(self.text),
+            "text": self.text,
+            "translation": self.translation,
+        }
+        if self.trusted:
+            data["trusted"] = True
+        return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE)
+
+    def replaces(self, other: MemoryEntry) -> bool:
+        """Return if entry should replace other entry with the same key.
+
+        Newer entries win, unless only the older one is trusted.
+        """
+        return self.trusted or not other.trusted
+
+    @classmethod
+    def load(cls, line: bytes) -> MemoryEntry:
+        """Return entry from JSON line."""
+        data = orjson.loads(line)
+        try:
+            entry = cls(
+                data["src"],
+                data["dst"],
+                data["text"],
+                data["translation"],
+                data.get("trusted", False),
+            )
+        except (AttributeError, KeyError, TypeError) as exc:
+            raise ValueError(f"Invalid memory entry {line!r}") from exc
+        if not all(isinstance(field, str) for field in entry[:4]) or (
+            not isinstance(entry.trusted, bool)
+        ):
+            raise ValueError(f"Invalid memory entry {line!r}")
+        return entry
+
+
+def read_memory(path: str) -> Generator[MemoryEntry, None, None]:
+    """Yield entries of memory file, in the order they were written."""
+    with gzip.open(path, "rb") as fp:
+        for line_number, line in enumerate(fp, 1):
+            if not line.strip():
+                continue
+            try:
+                yield MemoryEntry.load(line)
+            except (ValueError, orjson.JSONDecodeError) as exc:
+                raise ValueError(f"{path}:{line_number}: {exc}") from exc
+
+
+def write_memory(
+    path: str,
+    entries: Iterable[MemoryEntry],
+    append: bool = False,
+) -> int:
+    """Write entries to memory file. Return number of entries written.
+
+    If append, entries are added after any already in the file.
+    Otherwise the file is replaced once all entries are written.
+    """
+    count = 0
+    if append:
+        with gzip.open(path, "ab") as fp:
+            for entry in entries:
+                fp.write(entry.dump())
+                count += 1
+        return count
+    with (
+        atomic_file.open_atomic(path) as tmp,
+        gzip.open(tmp, "wb") as fp,
+    ):
+        for entry in entries:
+            fp.write(entry.dump())
+            count += 1
+    return count
+
+
+def append_new(path: str, entries: Iterable[MemoryEntry]) -> int:
+    """Append entries the memory file does not have yet.
+
+    Trusted entries are also appended over ones that are not trusted.
+    Return number of entries appended.
+    """
+    # Key to if entry for it is trusted
+    seen: dict[tuple[str, str, str], bool] = {}
+    if os.path.exists(path):
+        for entry in read_memory(path):
+            seen[entry.key] = seen.get(entry.key, False) or entry.trusted
+
+    def new_entries() -> Generator[MemoryEntry, None, None]:
+        for entry in entries:
+            key = entry.key
+            if key not in seen or (entry.trusted and not seen[key]):
+                seen[key] = entry.trusted
+                yield entry
+
+    return write_memory(path, new_entries(), append=True)
+
+
+def merge_memory(output: str, inputs: Iterable[str]) -> tuple[int, int]:
+    """Merge memory files into output, keeping one entry for each key.
+
+    Entries read later replace earlier ones with the same key, unless
+    only the earlier one is trusted. Output may be one of inputs.
+    Return number of entries written and number of duplicates dropped.
+    """
+    merged: dict[tuple[str, str, str], MemoryEntry] = {}
+    read = 0
+    for path in inputs:
+        for entry in read_memory(path):
+            key = entry.key
+            old = merged.get(key)
+            if old is None or entry.replaces(old):
+                merged[key] = entry
+            read += 1
+    written = write_memory(output, merged.values())
+    return written, read - written
+
+
+def load_into_cache(
+    cache: TranslationCache,
+    entries: Iterable[MemoryEntry],
+) -> int:
+    """Store entries in cache. Return number of entries stored."""
+    count = 0
+    for entry in entries:
+        cache.put(
+            entry.source_lang,
+            entry.dest_lang,
+            entry.text,
+            entry.translation,
+            entry.trusted,
+        )
+        count += 1
+    return count
+
+
+def cache_entries(
+    cache: TranslationCache,
+) -> Generator[MemoryEntry, None, None]:
+    """Yield entries for translations in cache."""
+    for (source_lang, dest_lang, text), translation, trusted in cache.items():
+        yield MemoryEntry(source_lang, dest_lang, text, translation, trusted)
+
+
+def parallel_entries(
+    source_file: str,
+    translated_file: str,
+    source_lang: str,
+    dest_lang: str,
+    min_overlap: float = parallel.DEFAULT_MIN_OVERLAP,
+) -> Generator[MemoryEntry, None, None]:
+    """Yield trusted entries from subtitle file and its translation."""
+    for text, translation in parallel.parallel_texts(
+        source_file,
+        translated_file,
+        min_overlap,
+    ):
+        yield MemoryEntry(source_lang, dest_lang, text, translation, True)
+
+
+def run(argv: list[str] | None = None) -> None:
+    """Run memory file command line interface."""
+    parser = argparse.ArgumentParser(
+        description="Manage translation memory files.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    merge = commands.add_parser(
+        "merge",
+        help="Merge memory files into one, dropping duplicate entries.",
+    )
+    merge.add_argument("output", help="Memory file to write.")
+    merge.add_argument(
+        "inputs",
+        nargs="+",
+        metavar="input",
+        help="Memory files to merge. Later files win on duplicates.",
+    )
+    stats = commands.add_parser(
+        "stats",
+        help="Show number of distinct entries of each language pair.",
+    )
+    stats.add_argument("memory", help="Memory file to read.")
+    import_ = commands.add_parser(
+        "import",
+        help=(
+            "Add trusted entries from a subtitle file and its translation, "
+            "aligned by when cues are shown."
+        ),
+    )
+    import_.add_argument("memory", help="Memory file to add entries to.")
+    import_.add_argument("source", help="Source srt or vtt subtitle file.")
+    import_.add_argument("translated", help="Translated subtitle file.")
+    import_.add_argument(
+        "--source-lang",
+        required=True,
+        help="Language of source subtitle file.",
+    )
+    import_.add_argument(
+        "--dest-lang",
+        required=True,
+        help="Language of translated subtitle file.",
+    )
+    import_.add_argument(
+        "--min-overlap",
+        type=float,
+        default=parallel.DEFAULT_MIN_OVERLAP,
+        help=(
+            "How much of their combined time cues need to share to be "
+            f"aligned (default: {parallel.DEFAULT_MIN_OVERLAP})."
+        ),
+    )
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "merge":
+            written, duplicates = merge_memory(args.output, args.inputs)
+            print(
+                f"Wrote {written} entries to {args.output!r}, "
+                f"dropped {duplicates} duplicates.",
+            )
+        elif args.command == "import":
+            count = append_new(
+                args.memory,
+                parallel_entries(
+                    args.source,
+                    args.translated,
+                    args.source_lang,
+                    args.dest_lang,
+                    args.min_overlap,
+                ),
+            )
+            print(f"Added {count} entries to {args.memory!r}.")
+        else:
+            # Appended files can repeat entries, which are only counted
+            # once like merge would keep them
+            keys = {entry.key for entry in read_memory(args.memory)}
+            pairs: dict[tuple[str, str], int] = {}
+            for source_lang, dest_lang, _hash in keys:
+                pair = (source_lang, dest_lang)
+                pairs[pair] = pairs.get(pair, 0) + 1
+            for (source_lang, dest_lang), count in sorted(pairs.items()):
+                print(f"{source_lang} -> {dest_lang}: {count}")
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+
+
+def cli_run() -> None:
+    """Command Line Interface Run."""
+    run()
+
+
+if __name__ == "__main__":
+    print(f"{__title__}\nProgrammed by {__author__}.\n")
+    cli_run()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+import stat
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+from subtitle_translate.atomic_file import open_atomic
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from pathlib import Path
+
+posix_only = pytest.mark.skipif(
+    sys.platform == "win32",
+    reason="File permissions are POSIX only",
+)
+
+
+@pytest.fixture
+def umask_022() -> Generator[None, None, None]:
+    old = os.umask(0o022)
+    try:
+        yield
+    finally:
+        os.umask(old)
+
+
+def mode_of(path: Path) -> int:
+    return stat.S_IMODE(path.stat().st_mode)
+
+
+def test_open_atomic(tmp_path: Path) -> None:
+    path = tmp_path / "out.bin"
+    path.write_bytes(b"old")
+    with open_atomic(str(path)) as fp:
+        fp.write(b"new")
+        # Not replaced until writing is done
+        assert path.read_bytes() == b"old"
+    assert path.read_bytes() == b"new"
+    assert [p.name for p in tmp_path.iterdir()] == ["out.bin"]
+
+
+def test_open_atomic_failure(tmp_path: Path) -> None:
+    path = tmp_path / "out.bin"
+    path.write_bytes(b"old")
+
+    def write_broken() -> None:
+        with open_atomic(str(path)) as fp:
+            fp.write(b"partial")
+            raise ValueError("Broken")
+
+    with pytest.raises(ValueError, match="Broken"):
+        write_broken()
+    assert path.read_bytes() == b"old"
+    assert [p.name for p in tmp_path.iterdir()] == ["out.bin"]
+
+
+@posix_only
+@pytest.mark.usefixtures("umask_022")
+def test_open_atomic_new_file_mode(tmp_path: Path) -> None:
+    atomic = tmp_path / "atomic.txt"
+    with open_atomic(str(atomic)) as fp:
+        fp.write(b"text")
+    plain = tmp_path / "plain.txt"
+    plain.write_text("text", encoding="utf-8")
+    assert mode_of(atomic) == mode_of(plain) == 0o644
+
+
+@posix_only
+@pytest.mark.usefixtures("umask_022")
+def test_open_atomic_keeps_mode(tmp_path: Path) -> None:
+    path = tmp_path / "out.txt"
+    path.write_text("old", encoding="utf-8")
+    path.chmod(0o640)
+    with open_atomic(str(path)) as fp:
+        fp.write(b"new")
+    assert mode_of(path) == 0o640
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import pytest
+
+from subtitle_translate.classify import (
+    DEFAULT_CLASSIFIER,
+    RULES,
+    TextClassifier,
+)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "   ",
+        "♪ ♪",
+        "♫",
+        "12:30",
+        "00:01:02,500 --> 00:01:03,000",
+        "...",
+        "?!",
+        "42%",
+        "1,000",
+        "https://example.com/a?b=c",
+    ],
+)
+def test_skipped_by_default(text: str) -> None:
+    assert not DEFAULT_CLASSIFIER.should_translate(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Hello",
+        "♪ la la la ♪",
+        "3 cats",
+        "[door slams]",
+        "\uff08笑\uff09",
+        "Go to 12:30",
+    ],
+)
+def test_translated_by_default(text: str) -> None:
+    assert DEFAULT_CLASSIFIER(text)
+
+
+def test_brackets_rule() -> None:
+    classifier = TextClassifier(["brackets"])
+    assert not classifier("[door slams]")
+    assert not classifier("\uff08笑\uff09")
+    assert not classifier("(sighs)")
+    assert classifier("(sighs) Fine.")
+    assert classifier("...")
+
+
+def test_no_rules() -> None:
+    classifier = TextClassifier([])
+    assert all(classifier(text) for text in ("", "♪", "12"))
+
+
+def test_all_rules() -> None:
+    assert not TextClassifier(RULES)("[door slams]")
+
+
+def test_unknown_rule() -> None:
+    with pytest.raises(ValueError, match="Unknown rule 'nope'"):
+        TextClassifier(["music", "nope"])
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import random
+from typing import Any
+
 import pytest
 
 from subtitle_translate import extricate
@@ -168,3 +171,322 @@ def test_take_apart_and_recombine(test_v: object) -> None:
     assert len(keys) == len(values)
     result = extricate.list_to_dict(keys, values)
     assert test_v == result
+
+
+def test_dict_to_list_keys() -> None:
+    assert extricate.dict_to_list({"a": [1, {}], 2: None}) == (
+        [
+            "\x05\x01a\x01\x00\x06" + "0\x00\x02\x02" + "\x06\x05",
+            "\x05\x01a\x01\x00\x06" + "1\x00\x05\x00\x05" + "\x06\x05",
+            "\x05\x022\x02\x00\x07\x07\x05",
+        ],
+        ["1", "", "None"],
+    )
+
+
+def test_dict_to_list_deep_nesting() -> None:
+    depth = 5000
+    data: object = "leaf"
+    for _ in range(depth):
+        data = [data]
+    keys, values = extricate.dict_to_list(data)
+    assert keys == ["\x060\x00" * depth + "\x01\x01" + "\x06" * depth]
+    assert values == ["leaf"]
+
+
+def test_dict_to_list_reserved_key() -> None:
+    with pytest.raises(ValueError, match="CHAR_TYPE"):
+        extricate.dict_to_list({"ok": {"bad\x03key": 1}})
+
+
+def test_dict_to_list_bad_type() -> None:
+    with pytest.raises(TypeError, match="tuple"):
+        extricate.dict_to_list({"ok": (1, 2)})
+
+
+def test_iter_leaves() -> None:
+    data = {"a": [1, {}], 2: None}
+    leaves = extricate.iter_leaves(data)
+    assert next(leaves) == ("\x05\x01a\x01\x00\x060\x00\x02\x02\x06\x05", "1")
+    keys, values = extricate.dict_to_list(data)
+    assert list(leaves) == list(zip(keys, values, strict=True))[1:]
+
+
+def test_rebuilder_out_of_order() -> None:
+    data = {"b": ["x", "y", {"c": "z"}], "a": "w"}
+    pairs = list(extricate.iter_leaves(data))
+    rebuilder = extricate.Rebuilder()
+    # Add originals in order, then replacements in reverse
+    for key, value in pairs:
+        rebuilder.add(key, value)
+    for key, value in reversed(pairs):
+        rebuilder.add(key, value.upper())
+    result = rebuilder.result()
+    assert result == {"b": ["X", "Y", {"c": "Z"}], "a": "W"}
+    assert list(result) == ["b", "a"]
+
+
+def test_iter_paths() -> None:
+    data = {"a": [1, {}], 2: None, "b\x00": []}
+    assert list(extricate.iter_paths(data)) == [
+        ((("dict", "a"), ("list", 0)), 1),
+        ((("dict", "a"), ("list", 1)), {}),
+        ((("dict", 2),), None),
+        ((("dict", "b\x00"),), []),
+    ]
+
+
+def test_iter_paths_root_leaf() -> None:
+    assert list(extricate.iter_paths("cat")) == [((), "cat")]
+
+
+@pytest.mark.parametrize(
+    "test_v",
+    [
+        {"cat": {3: "5", 7: [4, 3, 3], 4: ["cat", {"": [235, [], None, {}]}]}},
+        [[[["cat", 0], 4], "8"], ["3", "nine", ["14"]]],
+        5,
+        {},
+        [],
+    ],
+)
+def test_path_key_round_trip(test_v: object) -> None:
+    keys = [key for key, _value in extricate.iter_leaves(test_v)]
+    result = None
+    path_keys = []
+    for path, leaf in extricate.iter_paths(test_v):
+        leaf_type = type(leaf).__name__
+        key = extricate.path_to_key(path, leaf_type)
+        path_keys.append(key)
+        assert extricate.key_to_path(key) == (path, leaf_type)
+        result = extricate.set_path(result, path, leaf)
+    assert path_keys == keys
+    assert result == test_v
+
+
+def test_path_to_key_reserved() -> None:
+    with pytest.raises(ValueError, match="CHAR_TYPE"):
+        extricate.path_to_key((("dict", "b\x00"),), "str")
+
+
+def test_set_path_pads_lists() -> None:
+    assert extricate.set_path(None, (("list", 2), ("dict", "a")), 1) == [
+        None,
+        None,
+        {"a": 1},
+    ]
+
+
+def test_list_to_dict_scalar_types() -> None:
+    data = {"t": True, "f": False, "n": None, "x": 1.5, "i": -3, "s": ""}
+    assert extricate.list_to_dict(*extricate.dict_to_list(data)) == data
+
+
+def test_list_to_dict_lists_out_of_order() -> None:
+    keys, values = extricate.dict_to_list([["a", "b"], "c", [], {}])
+    result = extricate.list_to_dict(keys[::-1], values[::-1])
+    assert result == [["a", "b"], "c", [], {}]
+
+
+def test_list_to_dict_bad_key() -> None:
+    with pytest.raises(ValueError, match="unrecognized"):
+        extricate.list_to_dict(["\x05\x08a\x08\x00\x01\x01\x05"], ["v"])
+    with pytest.raises(TypeError, match="float"):
+        extricate.list_to_dict(["\x05\x031.5\x03\x00\x01\x01\x05"], ["v"])
+
+
+def test_iter_references() -> None:
+    data = {"a": ["x", {"b": 1}, []], "c": None}
+    references = list(extricate.iter_references(data))
+    assert [(key, value) for _container, key, value in references] == [
+        (0, "x"),
+        ("b", 1),
+        ("c", None),
+    ]
+    for container, key, value in references:
+        container[key] = f"<{value}>"
+    assert data == {"a": ["<x>", {"b": "<1>"}, []], "c": "<None>"}
+
+
+def test_iter_references_root_leaf() -> None:
+    holder = ["cat"]
+    assert list(extricate.iter_references(holder)) == [(holder, 0, "cat")]
+    assert list(extricate.iter_references("cat")) == []
+
+
+def test_leaf_type() -> None:
+    data = {"a": ["x", 1, 2.5, True, None, [], {}], 3: {"b": ""}}
+    keys, values = extricate.dict_to_list(data)
+    assert [extricate.leaf_type(key) for key in keys] == [
+        "str",
+        "int",
+        "float",
+        "bool",
+        "NoneType",
+        "list",
+        "dict",
+        "str",
+    ]
+    assert [
+        value
+        for key, value in zip(keys, values, strict=True)
+        if extricate.is_text_leaf(key, value)
+    ] == ["x"]
+    assert extricate.leaf_type("\x01\x01") == "str"
+    with pytest.raises(ValueError, match="unrecognized"):
+        extricate.leaf_type("\x08\x08")
+
+
+@pytest.mark.parametrize(
+    ("pattern", "path", "expected"),
+    [
+        ("title", "title", True),
+        ("title", "subtitle", False),
+        ("items/*/name", "items/0/name", True),
+        ("items/*/name", "items/0/sub/name", False),
+        ("items/**/name", "items/0/sub/name", True),
+        ("items/**/name", "items/name", True),
+        ("**/id", "id", True),
+        ("**/id", "a/b/id", True),
+        ("**/id", "a/b/uid", False),
+        ("**/*id", "a/b/uid", True),
+        ("nested/**", "nested/deep/0", True),
+        ("nested/**", "other/deep/0", False),
+        ("/a?c/", "abc", True),
+        ("a.c", "abc", False),
+    ],
+)
+def test_path_selector_patterns(
+    pattern: str,
+    path: str,
+    expected: bool,
+) -> None:
+    assert extricate.PathSelector([pattern]).match(path) is expected
+
+
+def test_path_selector() -> None:
+    data = {
+        "items": [{"id": "x1", "text": "a"}, {"id": "x2", "text": "b"}],
+        "url": "https://example.com",
+        "title": "c",
+    }
+    everything = extricate.PathSelector()
+    assert all(everything(path) for path, _ in extricate.iter_paths(data))
+    selector = extricate.PathSelector(["items/**", "title"], ["**/id"])
+    assert [
+        value for path, value in extricate.iter_paths(data) if selector(path)
+    ] == ["a", "b", "c"]
+    assert extricate.format_path((("dict", "items"), ("list", 0))) == (
+        "items/0"
+    )
+
+
+def test_homogeneous_array_round_trip() -> None:
+    data = [
+        {"start": index, "end": index + 1, "text": f"line {index}"}
+        for index in range(50)
+    ]
+    data.append({"end": 1, "start": 0, "text": ""})
+    data.append({1: "a"})
+    data.append({"1": "b"})
+    data.append({"meta": {"tags": ["x", "y"]}, "text": "deep"})
+    data.append({"meta": {"tags": []}, "text": None})
+    keys, values = extricate.dict_to_list(data)
+    assert keys == [
+        extricate.path_to_key(path, type(value).__name__)
+        for path, value in extricate.iter_paths(data)
+    ]
+    result = extricate.list_to_dict(keys, values)
+    assert result == data
+    assert list(result[50]) == ["end", "start", "text"]
+
+
+def test_many_shapes_round_trip() -> None:
+    data = [{f"key{index}": index} for index in range(2000)]
+    keys, values = extricate.dict_to_list(data)
+    assert extricate.list_to_dict(keys, values) == data
+
+
+def test_homogeneous_array_reserved_key() -> None:
+    with pytest.raises(ValueError, match="CHAR_TYPE"):
+        extricate.dict_to_list([{"a": 1}, {"a": 2, "b\x01": 3}])
+
+
+# Characters for generated text, without surrogates which can not be
+# encoded and with the characters dict keys can not contain.
+TEXT_ALPHABET = "".join(
+    chr(code)
+    for code in (
+        *range(0x08, 0x80),
+        *range(0xA0, 0x250),
+        *range(0x3040, 0x30A0),
+    )
+)
+
+
+def random_text(rng: random.Random) -> str:
+    """Return random text, sometimes empty or long."""
+    length = rng.choice((0, 1, 5, 20, 300))
+    return "".join(rng.choices(TEXT_ALPHABET, k=length))
+
+
+def random_leaf(rng: random.Random) -> Any:
+    """Return random leaf value of any supported type."""
+    match rng.randrange(6):
+        case 0:
+            return random_text(rng) + "".join(rng.choices("\x00\x01\n", k=2))
+        case 1:
+            return rng.randint(-(2**70), 2**70)
+        case 2:
+            return rng.uniform(-1e9, 1e9)
+        case 3:
+            return rng.random() < 0.5
+        case 4:
+            return None
+        case _:
+            return random_text(rng)
+
+
+def random_document(rng: random.Random, depth: int) -> Any:
+    """Return random document nested up to depth levels."""
+    if depth <= 0 or rng.random() < 0.2:
+        return random_leaf(rng)
+    width = rng.choice((0, 1, 3, 8))
+    if rng.random() < 0.5:
+        return [random_document(rng, depth - 1) for _ in range(width)]
+    return {
+        (random_text(rng) if rng.random() < 0.8 else rng.randint(-50, 50)): (
+            random_document(rng, depth - 1)
+        )
+        for _ in range(width)
+    }
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_round_trip_property(seed: int) -> None:
+    rng = random.Random(seed)  # noqa: S311
+    data = random_document(rng, rng.randint(1, 6))
+    keys, values = extricate.dict_to_list(data)
+    assert extricate.list_to_dict(keys, values) == data
+
+    # Any order of keys gives the same data
+    pairs = list(zip(keys, values, strict=True))
+    rng.shuffle(pairs)
+    rebuilder = extricate.Rebuilder()
+    for key, value in pairs:
+        rebuilder.add(key, value)
+    assert rebuilder.result() == data
+
+    # Paths and compiled keys agree, and rebuild the same data
+    rebuilt: Any = None
+    for (path, value), key in zip(
+        extricate.iter_paths(data),
+        keys,
+        strict=True,
+    ):
+        leaf_type = type(value).__name__
+        assert extricate.path_to_key(path, leaf_type) == key
+        assert extricate.key_to_path(key) == (path, leaf_type)
+        assert extricate.leaf_type(key) == leaf_type
+        rebuilt = extricate.set_path(rebuilt, path, value)
+    assert rebuilt == data
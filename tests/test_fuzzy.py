@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from subtitle_translate.fuzzy import FuzzyMatch, NGramIndex, ngrams, same_words
+
+
+def test_ngrams() -> None:
+    assert ngrams("abc") == {" ab", "abc", "bc "}
+    assert ngrams("") == {"  "}
+    assert ngrams("a", 2) == {" a", "a "}
+
+
+@pytest.mark.parametrize(
+    ("text", "other", "same"),
+    [
+        ("Stop!", "stop", True),
+        ("Where are you going?", "  where are you, going!", True),
+        ("I have 3 apples.", "I have 4 apples.", False),
+        ("Stop!", "Stop it!", False),
+        ("No.", "Non.", False),
+    ],
+)
+def test_same_words(text: str, other: str, same: bool) -> None:
+    assert same_words(text, other) is same
+
+
+def test_best_match() -> None:
+    index = NGramIndex()
+    for text in ("Where are you going?", "Where were you?", "Hello"):
+        index.add(text)
+    assert len(index) == 3
+    match = index.best_match("Where are you going!", 0.5)
+    assert match is not None
+    assert match.text == "Where are you going?"
+    assert 0.5 < match.similarity < 1
+    assert index.best_match("Where are you going?", 0.5) == FuzzyMatch(
+        "Where are you going?",
+        1.0,
+    )
+    assert index.best_match("Something else", 0.5) is None
+
+
+def test_threshold() -> None:
+    index = NGramIndex()
+    index.add("Where are you going?")
+    match = index.best_match("Where are you going!", 0.0)
+    assert match is not None
+    assert index.best_match("Where are you going!", match.similarity) == match
+    assert (
+        index.best_match("Where are you going!", match.similarity + 0.01)
+        is None
+    )
+
+
+def test_discard() -> None:
+    index = NGramIndex()
+    index.add("Hello there")
+    index.add("Hello there")
+    assert "Hello there" in index
+    index.discard("Hello there")
+    index.discard("Hello there")
+    assert "Hello there" not in index
+    assert len(index) == 0
+    assert index.best_match("Hello there", 0.1) is None
+
+
+@pytest.mark.parametrize("n", [2, 3, 4])
+def test_similarity_matches_sets(n: int) -> None:
+    first, second = "the cat sat", "the cat sang"
+    index = NGramIndex(n)
+    index.add(first)
+    match = index.best_match(second, 0.0)
+    assert match is not None
+    a, b = ngrams(first, n), ngrams(second, n)
+    assert match.similarity == pytest.approx(len(a & b) / len(a | b))
+
+
+@pytest.mark.parametrize("threshold", [0.3, 0.5, 0.7, 0.8, 0.9, 1.0])
+def test_best_match_same_as_comparing_all(threshold: float) -> None:
+    rng = random.Random(threshold)  # noqa: S311
+    words = ["the", "you", "what", "cat", "going", "here", "no", "sang"]
+    texts = [
+        " ".join(rng.choices(words, k=rng.randint(1, 6))) for _ in range(300)
+    ]
+    index = NGramIndex()
+    for text in texts:
+        index.add(text)
+    for query in texts[:50] + [text + "!" for text in texts[50:100]]:
+        query_grams = ngrams(query)
+        similar = [
+            FuzzyMatch(
+                text,
+                len(query_grams & ngrams(text))
+                / len(query_grams | ngrams(text)),
+            )
+            for text in set(texts)
+        ]
+        expected = min(
+            (match for match in similar if match.similarity >= threshold),
+            key=lambda match: (-match.similarity, match.text),
+            default=None,
+        )
+        assert index.best_match(query, threshold) == expected
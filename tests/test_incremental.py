@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from subtitle_translate.incremental import PreviousTranslation
+from subtitle_translate.subtitle_parser import Subtitle, convert_text_vtt
+
+OLD_SOURCE = [
+    (1, Subtitle((0, 1000), "Hello")),
+    (2, Subtitle((1000, 2000), "<i>How</i> are you")),
+    (3, Subtitle((2000, 3000), "Bye")),
+    (4, Subtitle((3000, 4000), "Bye")),
+]
+OLD_TRANSLATED = [
+    (1, Subtitle((0, 1000), "Bonjour")),
+    (2, Subtitle((1000, 2000), "<i>Comment</i> vas-tu")),
+    (3, Subtitle((2000, 3000), "Salut")),
+    (4, Subtitle((3000, 4000), "Au revoir")),
+]
+
+
+def test_previous_translation_match() -> None:
+    previous = PreviousTranslation.from_subtitles(
+        OLD_SOURCE,
+        OLD_TRANSLATED,
+        convert_text_vtt,
+    )
+    assert len(previous) == 4
+    subs, texts = convert_text_vtt(
+        [
+            (1, Subtitle((0, 1000), "Hello")),
+            (2, Subtitle((1000, 2000), "<i>How</i> is it")),
+            (3, Subtitle((2500, 3500), "Bye")),
+            (4, Subtitle((3000, 4000), "Bye")),
+            (5, Subtitle((5000, 6000), "New line")),
+        ],
+    )
+    assert previous.match(subs, texts) == {
+        (1, 0): "Bonjour",
+        (2, 0): "Comment",
+        # Retimed cue falls back to first translation of the same text
+        (3, 0): "Salut",
+        # Same text keeps translation it had at that timing
+        (4, 0): "Au revoir",
+    }
+
+
+def test_previous_translation_misaligned() -> None:
+    previous = PreviousTranslation.from_subtitles(
+        OLD_SOURCE,
+        [
+            (1, Subtitle((0, 1000), "<b>Bon</b>jour")),
+            (2, Subtitle((1500, 2000), "Comment vas-tu")),
+        ],
+        convert_text_vtt,
+    )
+    assert len(previous) == 0
+    assert previous.lookup((0, 1000), "Hello") is None
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from typing import Any
+
+import httpx
+import orjson
+import pytest
+import trio
+
+from subtitle_translate import extricate, translate
+from subtitle_translate.json_stream import (
+    JSONFormatter,
+    JSONTokenizer,
+    Token,
+    translate_json_stream,
+)
+
+DOCUMENTS = [
+    {
+        "a": [1, {}],
+        "b": {"c": "d", "e": [[], [None]]},
+        "f": 1.5,
+        "g": [True, False, -0.25, 1e20, 12345678901234],
+        "h": 'ü\n"quoted" \\ \u2028',
+    },
+    [],
+    {},
+    "text",
+    5,
+    [[[]]],
+]
+
+
+def format_document(raw: bytes, chunk_size: int) -> bytes:
+    tokenizer = JSONTokenizer()
+    formatter = JSONFormatter()
+    tokens: list[Token] = []
+    for index in range(0, len(raw), chunk_size):
+        tokens.extend(tokenizer.feed(raw[index : index + chunk_size]))
+    tokens.extend(tokenizer.close())
+    output = bytearray()
+    for token in tokens:
+        for piece in formatter.feed(token):
+            output.extend(
+                piece if isinstance(piece, bytes) else orjson.dumps(piece),
+            )
+    formatter.close()
+    return bytes(output)
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_format_matches_orjson(document: Any, chunk_size: int) -> None:
+    for raw in (
+        orjson.dumps(document),
+        orjson.dumps(document, option=orjson.OPT_INDENT_2),
+    ):
+        assert format_document(raw, chunk_size) == orjson.dumps(
+            document,
+            option=orjson.OPT_INDENT_2,
+        )
+
+
+def test_tokenizer_split_number() -> None:
+    tokenizer = JSONTokenizer()
+    assert tokenizer.feed(b"[12") == [Token("[")]
+    assert tokenizer.feed(b".") == []
+    assert tokenizer.feed(b"5e") == []
+    assert tokenizer.feed(b"2, tr") == [Token("scalar", 12.5e2), Token(",")]
+    assert tokenizer.feed(b"ue]") == [Token("scalar", True), Token("]")]
+    assert tokenizer.close() == []
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5])
+def test_tokenizer_split_string_escapes(chunk_size: int) -> None:
+    # Escaped quotes and backslashes split at every possible place
+    document = ['a\\"b\\\\', '\\\\"', '"', "c\\"]
+    raw = orjson.dumps(document)
+    tokenizer = JSONTokenizer()
+    tokens: list[Token] = []
+    for index in range(0, len(raw), chunk_size):
+        tokens.extend(tokenizer.feed(raw[index : index + chunk_size]))
+    tokens.extend(tokenizer.close())
+    assert [token.value for token in tokens if token.kind == "string"] == (
+        document
+    )
+
+
+def test_tokenizer_long_string() -> None:
+    # Long strings are searched once, not rescanned for every chunk,
+    # so this takes well under a second
+    text = ("x" * 1000 + '\\"') * 9000
+    raw = orjson.dumps({"text": text})
+    assert len(raw) > 8 << 20
+    tokenizer = JSONTokenizer()
+    tokens: list[Token] = []
+    for index in range(0, len(raw), 4096):
+        tokens.extend(tokenizer.feed(raw[index : index + 4096]))
+    tokens.extend(tokenizer.close())
+    assert tokens == [
+        Token("{"),
+        Token("string", "text"),
+        Token(":"),
+        Token("string", text),
+        Token("}"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [b"[1, x]", b"[1,", b"[1 2]", b"{1: 2}", b'{"a" 1}', b"[1]]", b"[}"],
+)
+def test_invalid_json(raw: bytes) -> None:
+    with pytest.raises(ValueError, match="JSON"):
+        format_document(raw, 2)
+
+
+def test_formatter_select() -> None:
+    formatter = JSONFormatter(extricate.PathSelector(["a/*"]))
+    pieces: list[bytes | str] = []
+    for token in [
+        Token("{"),
+        Token("string", "a"),
+        Token(":"),
+        Token("["),
+        Token("string", "x"),
+        Token(","),
+        Token("string", ""),
+        Token("]"),
+        Token(","),
+        Token("string", "b"),
+        Token(":"),
+        Token("string", "y"),
+        Token("}"),
+    ]:
+        pieces.extend(formatter.feed(token))
+    assert [piece for piece in pieces if isinstance(piece, str)] == ["x"]
+
+
+@pytest.mark.trio
+async def test_translate_json_stream(monkeypatch: pytest.MonkeyPatch) -> None:
+    in_flight = 0
+    max_seen = 0
+
+    async def fake_translate(
+        client: httpx.AsyncClient,
+        sentence: str,
+        to_lang: str,
+        source_lang: str = "auto",
+    ) -> str:
+        nonlocal in_flight, max_seen
+        in_flight += 1
+        max_seen = max(max_seen, in_flight)
+        await trio.sleep(0.001 * (len(sentence) % 3))
+        in_flight -= 1
+        return sentence.upper()
+
+    monkeypatch.setattr(translate, "get_translated_coroutine", fake_translate)
+
+    document = [{"id": index, "text": f"line {index}"} for index in range(200)]
+    raw = orjson.dumps(document)
+
+    async def chunks() -> Any:
+        for index in range(0, len(raw), 50):
+            yield raw[index : index + 50]
+
+    writes: list[bytes] = []
+
+    async def write(data: bytes) -> None:
+        writes.append(data)
+
+    async with httpx.AsyncClient() as client:
+        count = await translate_json_stream(
+            client,
+            chunks(),
+            write,
+            "en",
+            "fr",
+            window=4,
+            buffer_size=256,
+        )
+    assert count == 200
+    assert max_seen <= 4
+    assert len(writes) > 1
+    expected = [{"id": index, "text": f"LINE {index}"} for index in range(200)]
+    assert b"".join(writes) == orjson.dumps(
+        expected,
+        option=orjson.OPT_INDENT_2,
+    )
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import pytest
+
+from subtitle_translate import langid
+
+
+@pytest.mark.parametrize(
+    ("text", "language"),
+    [
+        ("I love you so much", "en"),
+        ("Je ne sais pas ce que tu veux", "fr"),
+        ("Ich weiß nicht, was du willst", "de"),
+        ("No sé lo que quieres, pero está bien", "es"),
+        ("Я не знаю, что ты хочешь", "ru"),
+        ("Я не знаю, що ти хочеш", "uk"),
+        ("안녕하세요", "ko"),
+        ("こんにちは、元気ですか", "ja"),
+        ("今日は本当にありがとう", "ja"),
+        ("你好吗", "zh"),
+        ("Γεια σου", "el"),  # noqa: RUF001
+        ("No", None),
+        ("OK", None),
+        ("", None),
+        ("123 ...", None),
+    ],
+)
+def test_detect_language(text: str, language: str | None) -> None:
+    assert langid.detect_language(text) == language
+
+
+def test_detect_dominant_language() -> None:
+    lines = [
+        "Bonjour, comment vas-tu ?",
+        "Je suis très content de te voir.",
+        "OK",
+        "Il est où, le chat ?",
+        "C'est pas grave, on y va.",
+    ]
+    assert langid.detect_dominant_language(lines) == "fr"
+    assert langid.detect_dominant_language(["OK", "Hi"]) is None
+
+
+def test_is_language() -> None:
+    assert langid.is_language("What do you want from me?", "en")
+    # Could be Japanese written with only Han characters
+    assert not langid.is_language("你好吗", "zh-CN")
+    assert not langid.is_language("大丈夫", "zh")
+    assert langid.detect_language("大丈夫", guess_han=False) is None
+    assert not langid.is_language("Was willst du von mir?", "en")
+
+
+@pytest.mark.parametrize("source", ["es", None])
+@pytest.mark.parametrize(
+    "text",
+    ["No, no.", "Que no.", "No, no, no.", "Para m\u00ed no."],
+)
+def test_is_language_spanish_not_portuguese(
+    text: str,
+    source: str | None,
+) -> None:
+    assert not langid.is_language(text, "pt", source)
+
+
+@pytest.mark.parametrize("source", ["it", None])
+@pytest.mark.parametrize(
+    "text",
+    ["Per me \u00e8 lo stesso.", "Lo so, lo so.", "Non lo so."],
+)
+def test_is_language_italian_not_spanish(
+    text: str,
+    source: str | None,
+) -> None:
+    assert not langid.is_language(text, "es", source)
+
+
+def test_is_language_close_languages() -> None:
+    assert langid.is_language(
+        "Eu n\u00e3o sei o que voc\u00ea quer.",
+        "pt",
+        "es",
+    )
+    assert langid.is_language(
+        "Yo tengo lo que quieres, pero muy poco.",
+        "es",
+        "it",
+    )
+    # Too few of the words show the language
+    assert not langid.is_language(
+        "Voc\u00ea viu Ana, Maria, Pedro, Tiago e Lucas?",
+        "pt",
+    )
+
+
+def test_script_of() -> None:
+    assert langid.script_of("a") == "Latin"
+    assert langid.script_of("ж") == "Cyrillic"
+    assert langid.script_of("1") is None
+    assert langid.script_of("\x00") is None
@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING
+
+import orjson
+import pytest
+import trio
+
+from subtitle_translate import extricate, main, output_cache, translate
+
+if sys.version_info < (3, 11):
+    from exceptiongroup import ExceptionGroup
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import httpx
+
+
+@pytest.fixture
+def fake_translator(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Replace network translation with upper casing. Return requests."""
+    requests: list[str] = []
+
+    async def fake_translate(
+        client: httpx.AsyncClient,
+        sentence: str,
+        to_lang: str,
+        source_lang: str = "auto",
+    ) -> str:
+        requests.append(sentence)
+        await trio.lowlevel.checkpoint()
+        return sentence.upper()
+
+    monkeypatch.setattr(translate, "get_translated_coroutine", fake_translate)
+    return requests
+
+
+JSON_DATA = {
+    "title": "hello",
+    "items": [{"name": "cat", "count": 3}, {"name": "dog", "count": 4}],
+    "nested": {"deep": ["a", "b"]},
+    "flags": [True, None, 1.5, ""],
+}
+
+
+@pytest.mark.trio
+@pytest.mark.parametrize("in_place", [True, False])
+async def test_translate_json(
+    tmp_path: Path,
+    fake_translator: list[str],
+    in_place: bool,
+) -> None:
+    source = trio.Path(tmp_path / "data.json")
+    await source.write_bytes(orjson.dumps(JSON_DATA))
+    await main.translate_json(
+        str(source),
+        source_language="fr",
+        dest_language="en",
+        in_place=in_place,
+    )
+    result = orjson.loads(
+        await trio.Path(tmp_path / "data.en.json").read_bytes(),
+    )
+    assert result == {
+        "title": "HELLO",
+        "items": [{"name": "CAT", "count": 3}, {"name": "DOG", "count": 4}],
+        "nested": {"deep": ["A", "B"]},
+        "flags": [True, None, 1.5, ""],
+    }
+    assert list(result) == list(JSON_DATA)
+    # Only non-empty strings are sent to be translated
+    assert sorted(fake_translator) == ["a", "b", "cat", "dog", "hello"]
+
+
+@pytest.mark.trio
+@pytest.mark.parametrize("in_place", [True, False])
+async def test_translate_json_select(
+    tmp_path: Path,
+    fake_translator: list[str],
+    in_place: bool,
+) -> None:
+    source = trio.Path(tmp_path / "data.json")
+    await source.write_bytes(orjson.dumps(JSON_DATA))
+    await main.translate_json(
+        str(source),
+        str(tmp_path / "out.json"),
+        in_place=in_place,
+        select=extricate.PathSelector(["items/**", "nested/**"], ["**/1"]),
+    )
+    result = orjson.loads(await trio.Path(tmp_path / "out.json").read_bytes())
+    assert result["title"] == "hello"
+    assert result["items"][0]["name"] == "CAT"
+    assert result["items"][1]["name"] == "DOG"
+    assert result["nested"] == {"deep": ["A", "b"]}
+    assert sorted(fake_translator) == ["a", "cat", "dog"]
+
+
+@pytest.mark.trio
+async def test_translate_json_stream(
+    tmp_path: Path,
+    fake_translator: list[str],
+) -> None:
+    source = trio.Path(tmp_path / "data.json")
+    await source.write_bytes(orjson.dumps(JSON_DATA))
+    await main.translate_json(str(source), stream=True)
+    result = await trio.Path(tmp_path / "data.en.json").read_bytes()
+    await main.translate_json(str(source), str(tmp_path / "full.json"))
+    assert result == await trio.Path(tmp_path / "full.json").read_bytes()
+
+
+@pytest.mark.trio
+async def test_translate_json_stream_same_file(
+    tmp_path: Path,
+    fake_translator: list[str],
+) -> None:
+    source = trio.Path(tmp_path / "data.json")
+    await source.write_bytes(orjson.dumps(JSON_DATA))
+    await main.translate_json(str(source), str(source), stream=True)
+    result = orjson.loads(await source.read_bytes())
+    assert result["title"] == "HELLO"
+    assert [p.name for p in await trio.Path(tmp_path).iterdir()] == [
+        "data.json",
+    ]
+
+
+@pytest.mark.trio
+async def test_translate_texts_skips_untranslatable(
+    fake_translator: list[str],
+) -> None:
+    texts = {1: ("hello", "♪ ♪"), 2: ("...",), 3: ("42", "world")}
+    result = await main.translate_texts(texts, "fr", "en")
+    assert result == {1: ("HELLO", "♪ ♪"), 2: ("...",), 3: ("42", "WORLD")}
+    assert sorted(fake_translator) == ["hello", "world"]
+
+    fake_translator.clear()
+    # Skipped text keeps its line breaks
+    multi_line = {1: ("12\n34",), 2: ("\u266a \u266a\n\u266a \u266a",)}
+    assert await main.translate_texts(multi_line, "fr", "en") == multi_line
+    assert fake_translator == []
+
+    result = await main.translate_texts(texts, "fr", "en", classifier=None)
+    assert sorted(fake_translator) == ["...", "42", "hello", "world", "♪ ♪"]
+
+
+@pytest.mark.trio
+async def test_translate_texts_merges_repeated(
+    fake_translator: list[str],
+) -> None:
+    texts = {1: ("- Stop!", "Stop!"), 2: ("  Stop! ",), 3: ("go",)}
+    result = await main.translate_texts(texts, "fr", "en")
+    assert result == {
+        1: ("- STOP!", "STOP!"),
+        2: ("  STOP! ",),
+        3: ("GO",),
+    }
+    assert sorted(fake_translator) == ["Stop!", "go"]
+
+
+@pytest.mark.trio
+async def test_translate_subtitles_srt_merges_italic_repeated(
+    tmp_path: Path,
+    fake_translator: list[str],
+) -> None:
+    source = trio.Path(tmp_path / "movie.srt")
+    cue = "{}\n00:00:0{},000 --> 00:00:0{},900\n<i>{}</i>\n\n"
+    await source.write_text(
+        cue.format(1, 1, 1, "Stop!")
+        + cue.format(2, 2, 2, "- Stop!")
+        + cue.format(3, 3, 3, "JOHN: Stop!"),
+    )
+    await main.translate_subtitles_srt(
+        str(source),
+        source_language="en",
+        dest_language="fr",
+    )
+    assert fake_translator == ["Stop!"]
+    result = await trio.Path(tmp_path / "movie.fr.srt").read_text()
+    assert "<i>STOP!</i>" in result
+    assert "<i>- STOP!</i>" in result
+    assert "<i>JOHN: STOP!</i>" in result
+
+
+@pytest.mark.trio
+async def test_translate_texts_detects_language(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    requests: list[tuple[str, str]] = []
+
+    async def fake_translate(
+        client: httpx.AsyncClient,
+        sentence: str,
+        to_lang: str,
+        source_lang: str = "auto",
+    ) -> str:
+        requests.append((sentence, source_lang))
+        await trio.lowlevel.checkpoint()
+        return sentence.upper()
+
+    monkeypatch.setattr(translate, "get_translated_coroutine", fake_translate)
+    texts = {
+        1: ("Je ne sais pas ce que tu veux.",),
+        2: ("I love you so much",),
+        3: ("Il est où, le chat ?",),
+    }
+    result = await main.translate_texts(texts, "auto", "en")
+    assert result[2] == ("I love you so much",)
+    assert sorted(requests) == [
+        ("Il est où, le chat ?", "fr"),
+        ("Je ne sais pas ce que tu veux.", "fr"),
+    ]
+
+    requests.clear()
+    await main.translate_texts(texts, "auto", "en", detect_language=False)
+    assert len(requests) == 3
+    assert {source for _sentence, source in requests} == {"auto"}
+
+    # Mostly in the destination language, so the rest is not pinned to it
+    requests.clear()
+    mostly_english = {
+        1: ("I know what you want and it is not here.",),
+        2: ("Do you have it with you?",),
+        3: ("Je ne sais pas ce que tu veux.",),
+    }
+    await main.translate_texts(mostly_english, "auto", "en")
+    assert requests == [("Je ne sais pas ce que tu veux.", "auto")]
+
+
+@pytest.mark.trio
+async def test_translate_subtitles_srt_previous(
+    tmp_path: Path,
+    fake_translator: list[str],
+) -> None:
+    old_source = trio.Path(tmp_path / "old.srt")
+    old_translation = trio.Path(tmp_path / "old.fr.srt")
+    source = trio.Path(tmp_path / "new.srt")
+    cue = "{}\n00:00:0{},000 --> 00:00:0{},500\n<i>{}</i>\n\n"
+    await old_source.write_text(
+        cue.format(1, 1, 1, "Good morning") + cue.format(2, 2, 2, "Be quiet"),
+    )
+    await old_translation.write_text(
+        cue.format(1, 1, 1, "Bonjour") + cue.format(2, 2, 2, "Silence"),
+    )
+    await source.write_text(
+        cue.format(1, 1, 1, "Good morning")
+        + cue.format(2, 3, 3, "Be quiet")
+        + cue.format(3, 4, 4, "Sit down"),
+    )
+    previous = await main.load_previous_translation(
+        str(old_source),
+        str(old_translation),
+    )
+    await main.translate_subtitles_srt(
+        str(source),
+        source_language="en",
+        dest_language="fr",
+        previous=previous,
+    )
+    assert fake_translator == ["Sit down"]
+    result = await trio.Path(tmp_path / "new.fr.srt").read_text()
+    assert "Bonjour" in result
+    assert "Silence" in result
+    assert "SIT DOWN" in result
+
+
+@pytest.mark.trio
+async def test_translate_subtitles_srt_merge_sentences(
+    tmp_path: Path,
+    fake_translator: list[str],
+) -> None:
+    source = trio.Path(tmp_path / "movie.srt")
+    cue = "{}\n00:00:0{},000 --> 00:00:0{},900\n<i>{}</i>\n\n"
+    await source.write_text(
+        cue.format(1, 1, 1, "I was going")
+        + cue.format(2, 2, 2, "to the store.")
+        + cue.format(3, 3, 3, "Be quiet."),
+    )
+    await main.translate_subtitles_srt(
+        str(source),
+        source_language="en",
+        dest_language="de",
+        merge_sentences=True,
+    )
+    assert sorted(fake_translator) == [
+        "Be quiet.",
+        "I was going to the store.",
+    ]
+    result = await trio.Path(tmp_path / "movie.de.srt").read_text()
+    assert "<i>I WAS GOING</i>" in result
+    assert "<i>TO THE STORE.</i>" in result
+    assert "<i>BE QUIET.</i>" in result
+
+
+@pytest.mark.trio
+async def test_translate_file_output_cache(
+    tmp_path: Path,
+    fake_translator: list[str],
+) -> None:
+    cache = output_cache.OutputCache(tmp_path / "cache")
+    first = trio.Path(tmp_path / "first.ko.vtt")
+    second = trio.Path(tmp_path / "second.ko.vtt")
+    contents = (
+        "WEBVTT\nLanguage: ko\n\n"
+        "00:00:01.000 --> 00:00:02.000\n<i>hello there</i>\n\n"
+    )
+    await first.write_text(contents)
+    await second.write_text(contents)
+
+    dest = await main.translate_file(str(first), cache=cache)
+    assert dest == str(tmp_path / "first.en.vtt")
+    assert fake_translator == ["hello there"]
+
+    # Same contents are copied from the cache without translating
+    dest = await main.translate_file(str(second), cache=cache)
+    assert dest == str(tmp_path / "second.en.vtt")
+    assert fake_translator == ["hello there"]
+    assert (
+        await trio.Path(dest).read_text()
+        == await trio.Path(tmp_path / "first.en.vtt").read_text()
+    )
+
+    # Different options are translated again
+    await main.translate_file(str(second), cache=cache, cache_options="x")
+    assert fake_translator == ["hello there", "hello there"]
+
+
+@pytest.mark.trio
+async def test_translate_files_reports_failures(
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    running = 0
+    max_seen = 0
+    done: list[str] = []
+
+    async def translate_one(source_file: str) -> None:
+        nonlocal running, max_seen
+        running += 1
+        max_seen = max(max_seen, running)
+        await trio.sleep(0.01)
+        running -= 1
+        if source_file.startswith("bad"):
+            raise ValueError(f"Broken {source_file}")
+        done.append(source_file)
+
+    files = ["a", "bad1", "b", "c", "bad2", "d"]
+    failed = await main.translate_files(files, translate_one, jobs=2)
+    assert failed == ["bad1", "bad2"]
+    # One file failing does not stop the others
+    assert sorted(done) == ["a", "b", "c", "d"]
+    assert max_seen == 2
+    err = capsys.readouterr().err
+    assert "Failed to translate 'bad1': ValueError: Broken bad1" in err
+    assert "Failed to translate 'bad2': ValueError: Broken bad2" in err
+
+
+def test_error_messages_groups() -> None:
+    group = ExceptionGroup(
+        "nursery",
+        [ValueError("first"), ExceptionGroup("inner", [KeyError("second")])],
+    )
+    assert main.error_messages(group) == [
+        "ValueError: first",
+        "KeyError: 'second'",
+    ]
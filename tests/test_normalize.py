@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import pytest
+
+from subtitle_translate.normalize import (
+    Decoration,
+    normalize_text,
+    restore_text,
+)
+
+
+@pytest.mark.parametrize(
+    ("text", "core", "decoration"),
+    [
+        ("Hello", "Hello", Decoration()),
+        ("  Hello ", "Hello", Decoration("  ", " ")),
+        ("- Hello", "Hello", Decoration("- ")),
+        ("—Hello", "Hello", Decoration("—")),
+        ("JOHN: Hello", "Hello", Decoration("JOHN: ")),
+        ("DR. O'BRIEN: Hello", "Hello", Decoration("DR. O'BRIEN: ")),
+        (" - JOHN: Hello ", "Hello", Decoration(" - JOHN: ", " ")),
+        ("Note: this", "Note: this", Decoration()),
+        ("I: me", "I: me", Decoration()),
+        ("-", "-", Decoration()),
+        ("   ", "", Decoration("   ")),
+    ],
+)
+def test_normalize_restore(
+    text: str,
+    core: str,
+    decoration: Decoration,
+) -> None:
+    assert normalize_text(text) == (core, decoration)
+    assert restore_text(core, decoration) == text
+
+
+def test_normalize_variants_share_key() -> None:
+    variants = [
+        "Café time",
+        "Café time",
+        "  Café   time ",
+        "- Café time",
+        "ANNA: Café time",
+    ]
+    assert {normalize_text(text)[0] for text in variants} == {"Café time"}
+
+
+def test_restore_translation() -> None:
+    _core, decoration = normalize_text("- ANNA: Hello")
+    assert restore_text("Bonjour", decoration) == "- ANNA: Bonjour"
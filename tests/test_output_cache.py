@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+from subtitle_translate.output_cache import OutputCache, cache_key, file_digest
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_cache_key() -> None:
+    key = cache_key("digest", "fr", "en")
+    assert key == cache_key("digest", "fr", "en")
+    assert len(key) == 64
+    assert key != cache_key("digesu", "fr", "en")
+    assert key != cache_key("digest", "en", "fr")
+    # Parts can not run into each other or into the digest
+    assert cache_key("", "ab", "c") != cache_key("", "a", "bc")
+    assert cache_key("c", "ab") != cache_key("", "ab", "c")
+
+
+def test_file_digest(tmp_path: Path) -> None:
+    path = tmp_path / "memory.jsonl.gz"
+    path.write_bytes(b"entries")
+    digest = file_digest(path)
+    assert digest == file_digest(str(path))
+    assert len(digest) == 64
+    path.write_bytes(b"other entries")
+    assert file_digest(path) != digest
+
+
+def put_bytes(cache: OutputCache, key: str, data: bytes, path: Path) -> None:
+    """Store data as output for key by way of file at path."""
+    path.write_bytes(data)
+    cache.put(key, path)
+
+
+def get_bytes(cache: OutputCache, key: str, path: Path) -> bytes | None:
+    """Return stored output for key by way of file at path, or None."""
+    if not cache.get(key, path):
+        return None
+    return path.read_bytes()
+
+
+def test_get_put(tmp_path: Path) -> None:
+    cache = OutputCache(tmp_path / "cache")
+    output = tmp_path / "output.txt"
+    dest = tmp_path / "dest.txt"
+    dest.write_bytes(b"kept")
+    assert not cache.get("missing", dest)
+    assert dest.read_bytes() == b"kept"
+    put_bytes(cache, "key", b"output", output)
+    assert get_bytes(cache, "key", dest) == b"output"
+    put_bytes(cache, "key", b"replaced", output)
+    assert get_bytes(cache, "key", dest) == b"replaced"
+    # No temporary files are left behind
+    assert os.listdir(tmp_path / "cache") == ["key.out"]
+    assert sorted(os.listdir(tmp_path)) == ["cache", "dest.txt", "output.txt"]
+
+
+def test_get_put_large(tmp_path: Path) -> None:
+    cache = OutputCache(tmp_path / "cache")
+    data = bytes(range(256)) * (3 << 12)
+    put_bytes(cache, "key", data, tmp_path / "output.bin")
+    assert get_bytes(cache, "key", tmp_path / "dest.bin") == data
+
+
+def test_evict_least_recently_used(tmp_path: Path) -> None:
+    cache = OutputCache(tmp_path / "cache", max_bytes=10)
+    output = tmp_path / "output.txt"
+    dest = tmp_path / "dest.txt"
+    put_bytes(cache, "a", b"1234", output)
+    put_bytes(cache, "b", b"1234", output)
+    # Set access times explicitly so order does not depend on clock
+    os.utime(tmp_path / "cache" / "a.out", ns=(1, 1))
+    os.utime(tmp_path / "cache" / "b.out", ns=(2, 2))
+    assert get_bytes(cache, "a", dest) == b"1234"
+    put_bytes(cache, "c", b"1234", output)
+    assert get_bytes(cache, "b", dest) is None
+    assert get_bytes(cache, "a", dest) == b"1234"
+    assert get_bytes(cache, "c", dest) == b"1234"
+
+
+def test_evict_ignores_other_files(tmp_path: Path) -> None:
+    (tmp_path / "notes.txt").write_bytes(b"x" * 100)
+    cache = OutputCache(tmp_path, max_bytes=10)
+    put_bytes(cache, "a", b"1234", tmp_path / "output.txt")
+    assert cache.evict() == 0
+    assert (tmp_path / "notes.txt").exists()
+
+
+def test_put_too_large(tmp_path: Path) -> None:
+    cache = OutputCache(tmp_path / "cache", max_bytes=3)
+    put_bytes(cache, "a", b"1234", tmp_path / "output.txt")
+    assert get_bytes(cache, "a", tmp_path / "dest.txt") is None
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from subtitle_translate.parallel import (
+    align_cues,
+    aligned_texts,
+    load_subtitles,
+    overlap_ratio,
+    parallel_texts,
+)
+from subtitle_translate.subtitle_parser import Subtitle
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def cues(*durations: tuple[int, int]) -> dict[int, Subtitle]:
+    """Return subtitles with given durations, numbered from 1."""
+    return {
+        index: Subtitle(duration, "")
+        for index, duration in enumerate(durations, 1)
+    }
+
+
+@pytest.mark.parametrize(
+    ("first", "second", "ratio"),
+    [
+        ((0, 10), (0, 10), 1.0),
+        ((0, 10), (5, 15), 5 / 15),
+        ((0, 10), (10, 20), 0.0),
+        ((0, 10), (2, 8), 0.6),
+        ((5, 5), (5, 5), 0.0),
+    ],
+)
+def test_overlap_ratio(
+    first: tuple[int, int],
+    second: tuple[int, int],
+    ratio: float,
+) -> None:
+    assert overlap_ratio(first, second) == pytest.approx(ratio)
+    assert overlap_ratio(second, first) == pytest.approx(ratio)
+
+
+def test_align_cues() -> None:
+    source = cues((0, 1000), (1000, 2000), (5000, 6000), (9000, 9100))
+    # Translation is shifted a little, has an extra cue and merges none
+    translated = cues((50, 1050), (1100, 2100), (3000, 4000), (5000, 5900))
+    assert list(align_cues(source, translated)) == [(1, 1), (2, 2), (3, 4)]
+
+
+def test_align_cues_uses_each_once() -> None:
+    source = cues((0, 1000), (100, 1000))
+    translated = cues((0, 1000))
+    assert list(align_cues(source, translated)) == [(1, 1)]
+
+
+def test_align_cues_long_translated_cue() -> None:
+    source = cues((0, 100), (1000, 2000))
+    translated = cues((0, 2000), (10, 90))
+    assert list(align_cues(source, translated, 0.4)) == [(1, 2), (2, 1)]
+
+
+def test_aligned_texts() -> None:
+    source = cues((0, 1000), (1000, 2000), (2000, 3000))
+    translated = cues((0, 1000), (1000, 2000), (2000, 3000))
+    source_texts = {
+        1: ("- Hello\nthere",),
+        2: ("Yes", "No"),
+        3: ("Bye",),
+    }
+    translated_texts = {1: ("- Bonjour\ntoi",), 2: ("Oui",), 3: ("Salut",)}
+    assert list(
+        aligned_texts(source, source_texts, translated, translated_texts),
+    ) == [("Hello there", "Bonjour toi"), ("Bye", "Salut")]
+
+
+def test_parallel_texts(tmp_path: Path) -> None:
+    source = tmp_path / "movie.srt"
+    translated = tmp_path / "movie.fr.vtt"
+    source.write_text(
+        "1\n00:00:01,000 --> 00:00:02,000\n<i>Good morning</i>\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\n<i>Sit down</i>\n\n",
+        encoding="utf-8",
+    )
+    translated.write_text(
+        "WEBVTT\n\n"
+        "00:00:01.100 --> 00:00:02.000\n<i>Bonjour</i>\n\n"
+        "NOTE not a cue\n\n"
+        "00:00:03.000 --> 00:00:04.100\n<i>Assieds-toi</i>\n\n",
+        encoding="utf-8",
+    )
+    assert list(parallel_texts(str(source), str(translated))) == [
+        ("Good morning", "Bonjour"),
+        ("Sit down", "Assieds-toi"),
+    ]
+
+
+def test_load_subtitles_unhandled(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="Unhandled source type 'json'"):
+        load_subtitles(str(tmp_path / "data.json"))
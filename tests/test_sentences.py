@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import pytest
+
+from subtitle_translate.sentences import (
+    ends_sentence,
+    group_sentences,
+    join_groups,
+    split_groups,
+    split_translation,
+)
+from subtitle_translate.subtitle_parser import Subtitle
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Hello.", True),
+        ("Really?!", True),
+        ('Wait!"', True),
+        ("好。", True),
+        ("la la ♪", True),
+        ("I was going to", False),
+        ("I was...", False),
+        ("Well,", False),
+    ],
+)
+def test_ends_sentence(text: str, expected: bool) -> None:
+    assert ends_sentence(text) is expected
+
+
+SUBS = {
+    1: Subtitle((0, 1000), ""),
+    2: Subtitle((1200, 2000), ""),
+    3: Subtitle((2100, 3000), ""),
+    4: Subtitle((3100, 4000), ""),
+    5: Subtitle((9000, 10000), ""),
+    6: Subtitle((10100, 11000), ""),
+}
+
+
+def test_group_sentences() -> None:
+    texts = {
+        1: ("I was going",),
+        2: ("to the store.",),
+        3: ("And then",),
+        4: ("- What?",),
+        5: ("Later",),
+        6: ("on", "she left"),
+    }
+    assert group_sentences(SUBS, texts) == [
+        [(1, 0), (2, 0)],
+        # Dialogue dash starts a new sentence
+        [(3, 0)],
+        [(4, 0)],
+        # Gap is too long
+        [(5, 0), (6, 0)],
+        [(6, 1)],
+    ]
+
+
+def test_group_sentences_limits() -> None:
+    texts = {index: (f"part {index}",) for index in range(1, 5)}
+    assert group_sentences(SUBS, texts, max_parts=2) == [
+        [(1, 0), (2, 0)],
+        [(3, 0), (4, 0)],
+    ]
+    assert group_sentences(SUBS, texts, max_gap=100) == [
+        [(1, 0)],
+        [(2, 0), (3, 0), (4, 0)],
+    ]
+    assert group_sentences(SUBS, texts, keep={(2, 0)}) == [
+        [(1, 0)],
+        [(2, 0)],
+        [(3, 0), (4, 0)],
+    ]
+
+
+@pytest.mark.parametrize(
+    ("text", "weights", "expected"),
+    [
+        ("one two three four", [1], ["one two three four"]),
+        ("one two three four", [1, 1], ["one two", "three four"]),
+        ("one two three four", [3, 1], ["one two three", "four"]),
+        ("一二三四", [1, 1], ["一二", "三四"]),
+        ("ab", [1, 1, 1], ["a", "b", ""]),
+        ("", [1, 1], ["", ""]),
+        ("a b", [0, 0], ["a", "b"]),
+    ],
+)
+def test_split_translation(
+    text: str,
+    weights: list[int],
+    expected: list[str],
+) -> None:
+    assert split_translation(text, weights) == expected
+
+
+def test_join_split_groups() -> None:
+    texts = {1: ("I was going",), 2: ("to the store.", "Bye")}
+    groups = [[(1, 0), (2, 0)], [(2, 1)]]
+    joined = join_groups(texts, groups)
+    assert joined == {0: ("I was going to the store.",), 1: ("Bye",)}
+    translated = {0: ("J'allais au magasin.",), 1: ("Salut",)}
+    assert split_groups(texts, groups, translated) == {
+        1: ("J'allais",),
+        2: ("au magasin.", "Salut"),
+    }
@@ -1,23 +1,43 @@
+from collections.abc import Generator
 from io import StringIO
+from pathlib import Path
 
 import pytest
+import trio
 
 from subtitle_translate.subtitle_parser import (
+    SRTPushParser,
     Subtitle,
+    VTTBlock,
+    VTTPushParser,
     convert_text,
+    convert_text_vtt,
     duration_to_srt_fragment,
     duration_to_vtt_fragment,
+    extract_text_runs,
+    format_time_fragments,
+    format_timestamps,
     modify_subtitles,
+    modify_subtitles_vtt,
+    parse_file_srt_async,
+    parse_file_vtt_async,
+    parse_subtitle_blocks_vtt,
     parse_subtitle_text_srt,
     parse_subtitle_text_vtt,
     parse_time_fragment_srt,
     parse_time_fragment_vtt,
     parse_timestamp_srt,
     parse_timestamp_vtt,
+    replace_text_runs,
     time_to_timestamp_srt,
     time_to_timestamp_vtt,
+    write_chunks_file_async,
     write_subtitles_srt,
+    write_subtitles_srt_file,
+    write_subtitles_srt_file_async,
     write_subtitles_vtt,
+    write_subtitles_vtt_file,
+    write_subtitles_vtt_file_async,
 )
 
 
@@ -33,6 +53,10 @@ def test_parse_timestamp_vtt() -> None:
     assert parse_timestamp_vtt("00:00:00.000") == 0
 
 
+def test_parse_timestamp_vtt_no_hours() -> None:
+    assert parse_timestamp_vtt("01:30.500") == 90500
+
+
 def test_time_to_timestamp_srt() -> None:
     assert time_to_timestamp_srt(90050) == "00:01:30,050"
     assert time_to_timestamp_srt(3600000) == "01:00:00,000"
@@ -67,6 +91,12 @@ def test_parse_time_fragment_vtt() -> None:
     )
 
 
+def test_parse_time_fragment_vtt_settings() -> None:
+    assert parse_time_fragment_vtt(
+        "00:01.000 --> 00:05.000 align:start line:0",
+    ) == (1000, 5000)
+
+
 def test_duration_to_srt_fragment() -> None:
     assert (
         duration_to_srt_fragment((0, 5000)) == "00:00:00,000 --> 00:00:05,000"
@@ -87,6 +117,29 @@ def test_duration_to_vtt_fragment() -> None:
     )
 
 
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_format_timestamps(use_numpy: bool) -> None:
+    assert format_timestamps([0, 90050, 360001500], ",", use_numpy) == [
+        "00:00:00,000",
+        "00:01:30,050",
+        "100:00:01,500",
+    ]
+    assert format_timestamps([90050], ".", use_numpy) == ["00:01:30.050"]
+    assert format_timestamps([], ",", use_numpy) == []
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_format_time_fragments(use_numpy: bool) -> None:
+    assert format_time_fragments(
+        [(0, 5000), (60000, 65000)],
+        ".",
+        use_numpy,
+    ) == [
+        "00:00:00.000 --> 00:00:05.000",
+        "00:01:00.000 --> 00:01:05.000",
+    ]
+
+
 def test_parse_subtitle_text_srt() -> None:
     subtitle_data = StringIO(
         """1
@@ -159,6 +212,142 @@ Another subtitle.
     assert result == expected
 
 
+VTT_BLOCKS_TEXT = """STYLE
+::cue {
+  color: yellow;
+}
+
+NOTE This is a comment
+spanning two lines
+
+intro
+00:00.000 --> 00:05.000 align:start line:0
+<v Roger>Hello &amp; welcome.</v>
+
+00:00:05.000 --> 00:00:10.000
+<c.loud>Another</c> <i>subtitle</i>.
+"""
+
+
+def test_parse_subtitle_blocks_vtt() -> None:
+    result = tuple(parse_subtitle_blocks_vtt(StringIO(VTT_BLOCKS_TEXT)))
+    assert result == (
+        VTTBlock("STYLE", "STYLE\n::cue {\n  color: yellow;\n}"),
+        VTTBlock("NOTE", "NOTE This is a comment\nspanning two lines"),
+        Subtitle(
+            (0, 5000),
+            "<v Roger>Hello &amp; welcome.</v>",
+            "intro",
+            "align:start line:0",
+        ),
+        Subtitle((5000, 10000), "<c.loud>Another</c> <i>subtitle</i>."),
+    )
+
+
+def test_write_subtitles_vtt_blocks() -> None:
+    blocks = tuple(parse_subtitle_blocks_vtt(StringIO(VTT_BLOCKS_TEXT)))
+    output = StringIO()
+    write_subtitles_vtt(output, blocks)
+    assert tuple(parse_subtitle_blocks_vtt(StringIO(output.getvalue()))) == (
+        blocks
+    )
+    assert "intro\n00:00:00.000 --> 00:00:05.000 align:start line:0\n" in (
+        output.getvalue()
+    )
+
+
+def test_extract_text_runs() -> None:
+    assert extract_text_runs("<v Roger>Hello &amp; welcome.</v>") == (
+        "Hello & welcome.",
+    )
+    assert extract_text_runs("<c.loud>Another</c> <i>subtitle</i>.") == (
+        "Another",
+        "subtitle",
+        ".",
+    )
+    assert extract_text_runs("<00:00:01.000><b></b>") == ()
+
+
+def test_replace_text_runs() -> None:
+    assert (
+        replace_text_runs(
+            "<v Roger> Hello &amp; welcome. </v>",
+            ["Bonjour & bienvenue."],
+        )
+        == "<v Roger> Bonjour &amp; bienvenue. </v>"
+    )
+
+
+def test_convert_and_modify_text_vtt() -> None:
+    blocks = parse_subtitle_blocks_vtt(StringIO(VTT_BLOCKS_TEXT))
+    subs, texts = convert_text_vtt(
+        (index, block)
+        for index, block in enumerate(blocks)
+        if isinstance(block, Subtitle)
+    )
+    assert texts == {
+        2: ("Hello & welcome.",),
+        3: ("Another", "subtitle", "."),
+    }
+    subs = modify_subtitles_vtt(
+        subs,
+        {2: ("Bonjour.",), 3: ("Un autre", "sous-titre", "!")},
+    )
+    assert subs[2].html == "<v Roger>Bonjour.</v>"
+    assert subs[2].settings == "align:start line:0"
+    assert subs[3].html == "<c.loud>Un autre</c> <i>sous-titre</i>!"
+
+
+SRT_UNICODE_TEXT = """1
+00:00:00,000 --> 00:00:05,000
+<i>Ça va ? ♪ 日本語</i>
+
+2
+00:00:05,000 --> 00:00:10,000
+Second line.
+Third line.
+
+"""
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 4096])
+def test_srt_push_parser(chunk_size: int) -> None:
+    data = SRT_UNICODE_TEXT.encode("utf-8")
+    parser = SRTPushParser()
+    result = []
+    for index in range(0, len(data), chunk_size):
+        result.extend(parser.feed(data[index : index + chunk_size]))
+    result.extend(parser.close())
+    assert result == list(parse_subtitle_text_srt(StringIO(SRT_UNICODE_TEXT)))
+
+
+def test_srt_push_parser_emits_early() -> None:
+    parser = SRTPushParser()
+    assert parser.feed(b"1\r\n00:00:00,000 --> 00:00:05,000\r\nHi\r\n") == []
+    assert parser.feed(b"\r\n2\r\n") == [(1, Subtitle((0, 5000), "Hi"))]
+
+
+def test_srt_push_parser_missing_newline() -> None:
+    parser = SRTPushParser()
+    parser.feed(b"1\n00:00:00,000 --> 00:00:05,000\nNo end")
+    with pytest.raises(AssertionError):
+        parser.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4096])
+def test_vtt_push_parser(chunk_size: int) -> None:
+    data = f"WEBVTT\n\n{VTT_BLOCKS_TEXT}".encode()
+    parser = VTTPushParser()
+    result = []
+    for index in range(0, len(data), chunk_size):
+        result.extend(parser.feed(data[index : index + chunk_size]))
+    result.extend(parser.close())
+    assert result == [
+        ["WEBVTT"],
+        *parse_subtitle_blocks_vtt(StringIO(VTT_BLOCKS_TEXT)),
+    ]
+
+
 def test_write_subtitles_srt():
     subs = {
         1: Subtitle((0, 5000), "<b>This is a subtitle.</b>"),
@@ -187,6 +376,121 @@ def test_write_subtitles_vtt():
     assert output.getvalue() == expected_output
 
 
+@pytest.mark.parametrize("buffer_size", [1, 40, 1 << 16])
+def test_write_subtitles_srt_buffer_size(buffer_size: int) -> None:
+    subs = {
+        index: Subtitle((index * 1000, index * 1000 + 500), f"Line {index}")
+        for index in range(1, 50)
+    }
+    output = StringIO()
+    write_subtitles_srt(output, subs, buffer_size)
+    expected = StringIO()
+    for subtitle_id, subtitle in subs.items():
+        expected.write(f"{subtitle_id}\n")
+        expected.write(f"{duration_to_srt_fragment(subtitle.duration)}\n")
+        expected.write(f"{subtitle.html}\n\n")
+    assert output.getvalue() == expected.getvalue()
+
+
+@pytest.mark.parametrize("atomic", [True, False])
+def test_write_subtitles_srt_file(tmp_path: Path, atomic: bool) -> None:
+    subs = {1: Subtitle((0, 5000), "<b>This is a subtitle.</b>")}
+    path = tmp_path / "out.srt"
+    path.write_text("old contents", encoding="utf-8")
+    write_subtitles_srt_file(str(path), subs, atomic)
+    assert path.read_text(encoding="utf-8") == (
+        "1\n00:00:00,000 --> 00:00:05,000\n<b>This is a subtitle.</b>\n\n"
+    )
+    assert [p.name for p in tmp_path.iterdir()] == ["out.srt"]
+
+
+def test_write_subtitles_vtt_file_atomic_failure(tmp_path: Path) -> None:
+    path = tmp_path / "out.vtt"
+    path.write_text("old contents", encoding="utf-8")
+
+    def bad_subs() -> Generator[Subtitle, None, None]:
+        yield Subtitle((0, 5000), "Fine.")
+        raise ValueError("Broken generator")
+
+    with pytest.raises(ValueError, match="Broken generator"):
+        write_subtitles_vtt_file(
+            str(path),
+            ["WEBVTT"],
+            bad_subs(),
+            atomic=True,
+        )
+    assert path.read_text(encoding="utf-8") == "old contents"
+    assert [p.name for p in tmp_path.iterdir()] == ["out.vtt"]
+
+
+def test_write_subtitles_vtt_file(tmp_path: Path) -> None:
+    path = tmp_path / "out.vtt"
+    write_subtitles_vtt_file(
+        str(path),
+        ["WEBVTT", "Language: en"],
+        [Subtitle((0, 5000), "This is a subtitle.")],
+    )
+    assert path.read_text(encoding="utf-8") == (
+        "WEBVTT\nLanguage: en\n\n"
+        "00:00:00.000 --> 00:00:05.000\nThis is a subtitle.\n\n"
+    )
+
+
+@pytest.mark.trio
+@pytest.mark.parametrize("atomic", [True, False])
+async def test_srt_file_async_round_trip(tmp_path: Path, atomic: bool) -> None:
+    subs = {
+        1: Subtitle((0, 5000), "<b>This is a subtitle.</b>"),
+        2: Subtitle((5000, 10000), "<p>Another subtitle.\nSecond line.</p>"),
+    }
+    path = tmp_path / "out.srt"
+    await write_subtitles_srt_file_async(str(path), subs, atomic)
+    files = await trio.Path(tmp_path).iterdir()
+    assert [p.name for p in files] == ["out.srt"]
+    assert dict(await parse_file_srt_async(str(path))) == subs
+
+
+@pytest.mark.trio
+async def test_write_chunks_file_async_cancelled(tmp_path: Path) -> None:
+    path = tmp_path / "out.srt"
+    path.write_text("old contents", encoding="utf-8")
+
+    def slow_chunks() -> Generator[str, None, None]:
+        yield "first chunk"
+        # Cancelled while writing, cleanup must still happen
+        cancel_scope.cancel()
+        yield "second chunk"
+
+    with trio.CancelScope() as cancel_scope:
+        await write_chunks_file_async(
+            str(path),
+            slow_chunks(),
+            atomic=True,
+            buffer_size=1,
+        )
+    assert cancel_scope.cancelled_caught
+    assert path.read_text(encoding="utf-8") == "old contents"
+    files = await trio.Path(tmp_path).iterdir()
+    assert [p.name for p in files] == ["out.srt"]
+
+
+@pytest.mark.trio
+async def test_vtt_file_async_round_trip(tmp_path: Path) -> None:
+    path = trio.Path(tmp_path / "in.vtt")
+    await path.write_text(
+        f"WEBVTT\nLanguage: en\n\n{VTT_BLOCKS_TEXT}",
+        "utf-8",
+    )
+    header, blocks = await parse_file_vtt_async(str(path))
+    assert header == ["WEBVTT", "Language: en"]
+    assert blocks == list(
+        parse_subtitle_blocks_vtt(StringIO(VTT_BLOCKS_TEXT)),
+    )
+    out_path = tmp_path / "out.vtt"
+    await write_subtitles_vtt_file_async(str(out_path), header, blocks)
+    assert await parse_file_vtt_async(str(out_path)) == (header, blocks)
+
+
 def test_convert_text() -> None:
     subs = {
         1: Subtitle((0, 5000), "<b>This is a subtitle.</b>"),
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+import trio
+
+from subtitle_translate import translate
+from subtitle_translate.translation_cache import TranslationCache
+
+
+@pytest.mark.trio
+async def test_translate_stream_async(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    in_flight = 0
+    max_seen = 0
+
+    async def fake_translate(
+        client: httpx.AsyncClient,
+        sentence: str,
+        to_lang: str,
+        source_lang: str = "auto",
+    ) -> str:
+        nonlocal in_flight, max_seen
+        in_flight += 1
+        max_seen = max(max_seen, in_flight)
+        await trio.sleep(0.001 * (len(sentence) % 3))
+        in_flight -= 1
+        return f"{to_lang}:{sentence}"
+
+    monkeypatch.setattr(translate, "get_translated_coroutine", fake_translate)
+
+    results: dict[int, str] = {}
+    async with httpx.AsyncClient() as client:
+        count = await translate.translate_stream_async(
+            client,
+            ((index, f"line {index}") for index in range(50)),
+            "en",
+            "fr",
+            results.__setitem__,
+            max_in_flight=4,
+        )
+    assert count == 50
+    assert results == {index: f"en:line {index}" for index in range(50)}
+    assert max_seen <= 4
+
+
+@pytest.mark.trio
+async def test_translate_async_cache(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    requests: list[str] = []
+
+    async def fake_translate(
+        client: httpx.AsyncClient,
+        sentence: str,
+        to_lang: str,
+        source_lang: str = "auto",
+    ) -> str:
+        requests.append(sentence)
+        await trio.lowlevel.checkpoint()
+        return f"{to_lang}:{sentence}"
+
+    monkeypatch.setattr(translate, "get_translated_coroutine", fake_translate)
+
+    cache = TranslationCache()
+    async with httpx.AsyncClient() as client:
+        first = await translate.translate_async(
+            client,
+            ["a", "b"],
+            "en",
+            "fr",
+            cache,
+        )
+        second = await translate.translate_async(
+            client,
+            ["b", "c"],
+            "en",
+            "fr",
+            cache,
+        )
+        # Other language pairs are cached separately
+        third = await translate.translate_async(
+            client,
+            ["a"],
+            "de",
+            "fr",
+            cache,
+        )
+    assert first == ["en:a", "en:b"]
+    assert second == ["en:b", "en:c"]
+    assert third == ["de:a"]
+    assert sorted(requests) == ["a", "a", "b", "c"]
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 4
+
+
+@pytest.mark.trio
+async def test_get_translated_cached_fuzzy(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    requests: list[str] = []
+
+    async def fake_translate(
+        client: httpx.AsyncClient,
+        sentence: str,
+        to_lang: str,
+        source_lang: str = "auto",
+    ) -> str:
+        requests.append(sentence)
+        await trio.lowlevel.checkpoint()
+        return sentence.upper()
+
+    monkeypatch.setattr(translate, "get_translated_coroutine", fake_translate)
+
+    cache = TranslationCache(fuzzy_threshold=0.8)
+    async with httpx.AsyncClient() as client:
+        for sentence in ("where are you going?", "where are you going"):
+            assert (
+                await translate.get_translated_cached(
+                    client,
+                    sentence,
+                    "en",
+                    "fr",
+                    cache,
+                )
+                == "WHERE ARE YOU GOING?"
+            )
+    assert requests == ["where are you going?"]
+    assert cache.stats.fuzzy_hits == 1
+
+
+@pytest.mark.trio
+async def test_translate_async_max_in_flight(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    running = 0
+    max_seen = 0
+
+    async def fake_translate(
+        client: httpx.AsyncClient,
+        sentence: str,
+        to_lang: str,
+        source_lang: str = "auto",
+    ) -> str:
+        nonlocal running, max_seen
+        running += 1
+        max_seen = max(max_seen, running)
+        await trio.sleep(0.001)
+        running -= 1
+        return f"{to_lang}:{sentence}"
+
+    monkeypatch.setattr(translate, "get_translated_coroutine", fake_translate)
+
+    sentences = [f"line {index}" for index in range(20)]
+    async with httpx.AsyncClient() as client:
+        result = await translate.translate_async(
+            client,
+            sentences,
+            "en",
+            "fr",
+            max_in_flight=3,
+        )
+    assert result == [f"en:{sentence}" for sentence in sentences]
+    assert max_seen == 3
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from subtitle_translate.translation_cache import (
+    CacheStats,
+    TranslationCache,
+    entry_size,
+)
+
+
+class FakeClock:
+    """Clock that only moves when told to."""
+
+    __slots__ = ("now",)
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return current time."""
+        return self.now
+
+
+def test_get_put() -> None:
+    cache = TranslationCache()
+    assert cache.get("fr", "en", "bonjour") is None
+    cache.put("fr", "en", "bonjour", "hello")
+    assert cache.get("fr", "en", "bonjour") == "hello"
+    assert cache.get("fr", "de", "bonjour") is None
+    assert len(cache) == 1
+    assert cache.size == entry_size(("fr", "en", "bonjour"), "hello")
+    assert cache.stats == CacheStats(1, 2, 0, 1, cache.size)
+
+
+def test_replace_keeps_size() -> None:
+    cache = TranslationCache()
+    cache.put("fr", "en", "a", "first")
+    cache.put("fr", "en", "a", "x")
+    assert cache.get("fr", "en", "a") == "x"
+    assert cache.size == entry_size(("fr", "en", "a"), "x")
+    assert cache.evictions == 0
+
+
+def test_max_entries_least_recently_used() -> None:
+    cache = TranslationCache(max_entries=2)
+    cache.put("fr", "en", "a", "A")
+    cache.put("fr", "en", "b", "B")
+    # Using a makes b least recently used
+    assert cache.get("fr", "en", "a") == "A"
+    cache.put("fr", "en", "c", "C")
+    assert cache.get("fr", "en", "b") is None
+    assert cache.get("fr", "en", "a") == "A"
+    assert cache.get("fr", "en", "c") == "C"
+    assert cache.evictions == 1
+
+
+def test_max_bytes() -> None:
+    size = entry_size(("fr", "en", "a"), "A")
+    cache = TranslationCache(max_entries=None, max_bytes=size * 2)
+    for text in "abc":
+        cache.put("fr", "en", text, text.upper())
+    assert len(cache) == 2
+    assert cache.size == size * 2
+    assert cache.get("fr", "en", "a") is None
+    # Entries larger than the whole cache are not stored
+    cache.put("fr", "en", "long" * 10, "LONG")
+    assert len(cache) == 2
+
+
+def test_ttl() -> None:
+    clock = FakeClock()
+    cache = TranslationCache(ttl=10, clock=clock)
+    cache.put("fr", "en", "a", "A")
+    clock.now = 5
+    cache.put("fr", "en", "b", "B")
+    assert cache.get("fr", "en", "a") == "A"
+    clock.now = 10
+    assert cache.get("fr", "en", "a") is None
+    assert cache.evictions == 1
+    assert cache.expire() == 0
+    clock.now = 15
+    assert cache.expire() == 1
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_clear() -> None:
+    cache = TranslationCache()
+    cache.put("fr", "en", "a", "A")
+    assert cache.get("fr", "en", "a") == "A"
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
+    assert cache.hits == 1
+
+
+def test_fuzzy() -> None:
+    cache = TranslationCache(fuzzy_threshold=0.6)
+    assert cache.get_fuzzy("fr", "en", "Où vas-tu ?") is None
+    cache.put("fr", "en", "Où vas-tu ?", "Where are you going?")
+    found = cache.get_fuzzy("fr", "en", "Où vas-tu !")
+    assert found is not None
+    translated, match = found
+    assert translated == "Where are you going?"
+    assert match.text == "Où vas-tu ?"
+    assert cache.get_fuzzy("fr", "de", "Où vas-tu !") is None
+    assert cache.get_fuzzy("fr", "en", "Bonjour") is None
+    stats = cache.stats
+    assert stats.fuzzy_hits == 1
+    assert stats.fuzzy_similarity == match.similarity
+
+
+def test_fuzzy_same_words_only() -> None:
+    cache = TranslationCache(fuzzy_threshold=0.1)
+    cache.put("en", "fr", "I have 3 apples in my bag.", "J'ai 3 pommes.")
+    cache.put("en", "fr", "Stop!", "Arr\u00eate !")
+    # Similar enough, but means something else
+    assert cache.get_fuzzy("en", "fr", "I have 4 apples in my bag.") is None
+    found = cache.get_fuzzy("en", "fr", "stop")
+    assert found is not None
+    assert found[0] == "Arr\u00eate !"
+    assert cache.stats.fuzzy_hits == 1
+
+
+def test_fuzzy_off() -> None:
+    cache = TranslationCache()
+    cache.put("fr", "en", "Où vas-tu ?", "Where are you going?")
+    assert cache.get_fuzzy("fr", "en", "Où vas-tu ?") is None
+
+
+def test_fuzzy_forgets_evicted() -> None:
+    clock = FakeClock()
+    cache = TranslationCache(
+        max_entries=1,
+        ttl=10,
+        clock=clock,
+        fuzzy_threshold=0.5,
+    )
+    cache.put("fr", "en", "Bonjour mon ami", "Hello my friend")
+    cache.put("fr", "en", "Au revoir", "Goodbye")
+    assert cache.get_fuzzy("fr", "en", "Bonjour mon amie") is None
+    # Expired entries are not matched
+    clock.now = 10
+    assert cache.get_fuzzy("fr", "en", "Au revoir !") is None
+    assert len(cache) == 0
+    # Entries too large to store are not matched either
+    cache.max_bytes = 30
+    cache.put("fr", "en", "Au revoir", "Goodbye")
+    cache.put("fr", "en", "Au revoir", "Goodbye" * 10)
+    assert cache.get_fuzzy("fr", "en", "Au revoir !") is None
+
+
+def test_trusted() -> None:
+    clock = FakeClock()
+    cache = TranslationCache(ttl=10, clock=clock)
+    cache.put("fr", "en", "Salut", "Hi", trusted=True)
+    cache.put("fr", "en", "Salut", "Hello")
+    clock.now = 100
+    # Trusted entries never expire and are not replaced by others
+    assert cache.get("fr", "en", "Salut") == "Hi"
+    assert list(cache.items()) == [(("fr", "en", "Salut"), "Hi", True)]
+    cache.put("fr", "en", "Salut", "Hey", trusted=True)
+    assert cache.get("fr", "en", "Salut") == "Hey"
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import gzip
+from typing import TYPE_CHECKING
+
+import pytest
+
+from subtitle_translate.translation_cache import TranslationCache
+from subtitle_translate.translation_memory import (
+    MemoryEntry,
+    append_new,
+    cache_entries,
+    load_into_cache,
+    merge_memory,
+    parallel_entries,
+    read_memory,
+    run,
+    text_hash,
+    write_memory,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+ENTRIES = [
+    MemoryEntry("fr", "en", "Bonjour", "Hello"),
+    MemoryEntry("fr", "en", "Merci\n", "Thanks\n"),
+    MemoryEntry("fr", "de", "Bonjour", "Hallo", trusted=True),
+]
+
+
+def test_entry_round_trip() -> None:
+    for entry in ENTRIES:
+        line = entry.dump()
+        assert line.endswith(b"\n")
+        assert line.count(b"\n") == 1
+        assert MemoryEntry.load(line) == entry
+    assert ENTRIES[0].key == ("fr", "en", text_hash("Bonjour"))
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        b'{"src": "fr"}',
+        b"[1, 2]",
+        b'{"src": 1, "dst": "en", "text": "a", "translation": "b"}',
+    ],
+)
+def test_entry_load_invalid(line: bytes) -> None:
+    with pytest.raises(ValueError, match="Invalid memory entry"):
+        MemoryEntry.load(line)
+
+
+def test_write_read(tmp_path: Path) -> None:
+    path = str(tmp_path / "memory.jsonl.gz")
+    assert write_memory(path, ENTRIES[:2]) == 2
+    assert write_memory(path, ENTRIES[2:], append=True) == 1
+    assert list(read_memory(path)) == ENTRIES
+    # Still a plain gzip file of JSON lines
+    with gzip.open(path, "rb") as fp:
+        assert len(fp.read().splitlines()) == 3
+
+
+def test_read_invalid_line(tmp_path: Path) -> None:
+    path = str(tmp_path / "memory.jsonl.gz")
+    with gzip.open(path, "wb") as fp:
+        fp.write(ENTRIES[0].dump() + b"\nnot json\n")
+    with pytest.raises(ValueError, match=r"memory\.jsonl\.gz:3"):
+        list(read_memory(path))
+
+
+def test_append_new(tmp_path: Path) -> None:
+    path = str(tmp_path / "memory.jsonl.gz")
+    assert append_new(path, ENTRIES[:2]) == 2
+    assert append_new(path, [*ENTRIES, ENTRIES[2]]) == 1
+    assert list(read_memory(path)) == ENTRIES
+
+
+def test_merge(tmp_path: Path) -> None:
+    first = str(tmp_path / "first.jsonl.gz")
+    second = str(tmp_path / "second.jsonl.gz")
+    write_memory(first, ENTRIES[:2])
+    newer = MemoryEntry("fr", "en", "Bonjour", "Hi")
+    write_memory(second, [newer, ENTRIES[2]])
+    assert merge_memory(first, [first, second]) == (3, 1)
+    assert sorted(read_memory(first)) == sorted([newer, *ENTRIES[1:]])
+
+
+def test_cache_round_trip() -> None:
+    cache = TranslationCache()
+    assert load_into_cache(cache, ENTRIES) == 3
+    assert cache.get("fr", "de", "Bonjour") == "Hallo"
+    assert sorted(cache_entries(cache)) == sorted(ENTRIES)
+
+
+def test_run(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    first = str(tmp_path / "first.jsonl.gz")
+    output = str(tmp_path / "output.jsonl.gz")
+    write_memory(first, ENTRIES)
+    run(["merge", output, first, first])
+    assert "Wrote 3 entries" in capsys.readouterr().out
+    run(["stats", output])
+    assert capsys.readouterr().out == "fr -> de: 1\nfr -> en: 2\n"
+    with pytest.raises(SystemExit):
+        run(["stats", str(tmp_path / "missing.jsonl.gz")])
+
+
+def test_stats_distinct(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    path = str(tmp_path / "memory.jsonl.gz")
+    # Same text translated again is still one entry
+    write_memory(
+        path,
+        [*ENTRIES, MemoryEntry("fr", "en", "Bonjour", "Hi"), ENTRIES[1]],
+    )
+    assert len(list(read_memory(path))) == 5
+    run(["stats", path])
+    assert capsys.readouterr().out == "fr -> de: 1\nfr -> en: 2\n"
+
+
+def test_trusted_wins(tmp_path: Path) -> None:
+    path = str(tmp_path / "memory.jsonl.gz")
+    machine = MemoryEntry("fr", "en", "Salut", "Hello")
+    human = MemoryEntry("fr", "en", "Salut", "Hi", trusted=True)
+    assert append_new(path, [machine]) == 1
+    assert append_new(path, [human, machine]) == 1
+    assert append_new(path, [human]) == 0
+    assert merge_memory(path, [path]) == (1, 1)
+    assert list(read_memory(path)) == [human]
+    write_memory(path, [human, machine])
+    assert merge_memory(path, [path]) == (1, 1)
+    assert list(read_memory(path)) == [human]
+
+
+def test_import(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    source = tmp_path / "movie.srt"
+    translated = tmp_path / "movie.fr.srt"
+    cue = "1\n00:00:01,000 --> 00:00:02,000\n<i>{}</i>\n\n"
+    source.write_text(cue.format("Good morning"), encoding="utf-8")
+    translated.write_text(cue.format("Bonjour"), encoding="utf-8")
+    assert list(
+        parallel_entries(str(source), str(translated), "en", "fr"),
+    ) == [
+        MemoryEntry("en", "fr", "Good morning", "Bonjour", trusted=True),
+    ]
+    memory = str(tmp_path / "memory.jsonl.gz")
+    command = ["import", memory, str(source), str(translated)]
+    run([*command, "--source-lang", "en", "--dest-lang", "fr"])
+    assert capsys.readouterr().out == f"Added 1 entries to {memory!r}.\n"
+    assert [entry.trusted for entry in read_memory(memory)] == [True]
@@ -0,0 +1,148 @@
+"""Benchmark extricate flattening and rebuilding on generated documents.
+
+Reports time and peak memory of each operation for documents that stress
+depth, width, array length, string size and unicode keys. Run with
+`python tools/benchmark_extricate.py`, add `--scale` to grow documents.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import TYPE_CHECKING, Any
+
+from subtitle_translate import extricate
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+def deep_document(depth: int) -> Any:
+    """Return dicts and lists nested depth levels deep."""
+    data: Any = "leaf"
+    for level in range(depth):
+        data = {f"level{level}": data, "n": level} if level % 2 else [data, 1]
+    return data
+
+
+def wide_document(width: int) -> dict[str, Any]:
+    """Return one dict with width keys of mixed leaf types."""
+    return {
+        f"key{index}": (f"text {index}", index, index / 2, None, True)[
+            index % 5
+        ]
+        for index in range(width)
+    }
+
+
+def records_document(length: int) -> list[dict[str, Any]]:
+    """Return array of dicts with the same keys, like subtitle exports."""
+    return [
+        {"start": index, "end": index + 1, "text": f"line {index}"}
+        for index in range(length)
+    ]
+
+
+def long_strings_document(count: int) -> list[str]:
+    """Return array of long strings."""
+    return [f"{index} " * 5000 for index in range(count)]
+
+
+def unicode_keys_document(width: int) -> dict[str, Any]:
+    """Return nested dicts with non-ascii keys."""
+    return {
+        f"ключ{index}": {"名前": f"値{index}", "émoji 🐈": [index, "ü"]}
+        for index in range(width)
+    }
+
+
+ROW = "{:<14}{:<14}{:>9}{:>10}{:>10}"
+
+
+def measure(function: Callable[[], Any]) -> tuple[float, int, Any]:
+    """Return seconds taken, peak bytes allocated, and result of function.
+
+    Time and memory are measured in separate runs, because tracing
+    allocations slows everything down.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def report(
+    document: str,
+    operation: str,
+    leaves: int,
+    elapsed: float,
+    peak: int,
+) -> None:
+    """Print a row of results."""
+    print(
+        ROW.format(
+            document,
+            operation,
+            leaves,
+            f"{elapsed:.4f}",
+            f"{peak / 2**20:.2f}",
+        ),
+    )
+
+
+def run(scale: int) -> None:
+    """Run every benchmark and print a table of results."""
+    documents = {
+        "deep": deep_document(200 * scale),
+        "wide": wide_document(20000 * scale),
+        "records": records_document(20000 * scale),
+        "long strings": long_strings_document(50 * scale),
+        "unicode keys": unicode_keys_document(5000 * scale),
+    }
+    print(ROW.format("document", "operation", "leaves", "seconds", "peak MiB"))
+    for name, data in documents.items():
+        elapsed, peak, (keys, values) = measure(
+            lambda data=data: extricate.dict_to_list(data),
+        )
+        leaves = len(keys)
+        report(name, "dict_to_list", leaves, elapsed, peak)
+
+        elapsed, peak, result = measure(
+            lambda keys=keys, values=values: extricate.list_to_dict(
+                keys,
+                values,
+            ),
+        )
+        report(name, "list_to_dict", leaves, elapsed, peak)
+        if result != data:
+            raise AssertionError(f"{name} document did not round trip")
+
+        elapsed, peak, _paths = measure(
+            lambda data=data: list(extricate.iter_paths(data)),
+        )
+        report(name, "iter_paths", leaves, elapsed, peak)
+
+
+def main() -> None:
+    """Parse arguments and run benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=1,
+        help="Multiply size of every generated document (default: 1).",
+    )
+    args = parser.parse_args()
+    run(args.scale)
+
+
+if __name__ == "__main__":
+    main()